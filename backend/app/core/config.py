@@ -1,10 +1,179 @@
+from typing import Literal
+
+from pydantic import BaseModel
 from pydantic_settings import BaseSettings
 
 
+# =====================================================
+# 数据库引擎配置档（连接池 + SQLite PRAGMA）
+# =====================================================
+
+class EngineProfile(BaseModel):
+    """
+    一组数据库引擎参数
+
+    - pool_*：连接池（SQLite 内存库会忽略）
+    - sqlite_*：每个新连接建立时执行的 PRAGMA（仅 SQLite）
+    """
+    echo: bool = False
+
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: int = 30
+    pool_recycle: int = -1
+    pool_pre_ping: bool = False
+
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_mmap_size: int = 0
+    sqlite_cache_size: int = -2000  # 负数表示 KiB
+    sqlite_busy_timeout: int = 5000  # 毫秒
+
+
+ENGINE_PROFILES: dict[str, EngineProfile] = {
+    # 本地开发：打印 SQL，小连接池
+    "dev": EngineProfile(
+        echo=True,
+    ),
+    # 压测：关闭 echo，放大连接池和 SQLite 缓存
+    "bench": EngineProfile(
+        pool_size=20,
+        max_overflow=20,
+        pool_recycle=1800,
+        sqlite_mmap_size=256 * 1024 * 1024,
+        sqlite_cache_size=-64000,
+    ),
+    # 生产：连接保活 + 定期回收，写锁等待更长
+    "prod": EngineProfile(
+        pool_size=10,
+        max_overflow=20,
+        pool_recycle=1800,
+        pool_pre_ping=True,
+        sqlite_mmap_size=256 * 1024 * 1024,
+        sqlite_cache_size=-64000,
+        sqlite_busy_timeout=10000,
+    ),
+}
+
+
 class Settings(BaseSettings):
     DATABASE_URL: str = "sqlite:///./test.db"
     JWT_SECRET_KEY: str = "dev-secret"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
 
+    # =====================================================
+    # 数据库访问模式
+    # - False：同步 Session（FastAPI 线程池执行）
+    # - True：AsyncSession（aiosqlite / asyncpg，不占线程池）
+    # =====================================================
+    DB_ASYNC: bool = False
+    ASYNC_DATABASE_URL: str | None = None
+
+    # 引擎配置档：dev / bench / prod
+    DB_PROFILE: Literal["dev", "bench", "prod"] = "dev"
+
+    # 列表 total 缓存（秒 / 最多缓存的用户数）
+    TOTALS_CACHE_TTL: float = 30.0
+    TOTALS_CACHE_MAX_USERS: int = 10000
+
+    # 题库缓存（最多缓存的题目数 / 秒）
+    CATALOG_MAX_SIZE: int = 5000
+    CATALOG_TTL: float = 60.0
+
+    # 已编译判题规则（JudgeSpec）最多缓存的题目数
+    JUDGE_SPEC_CACHE_SIZE: int = 50000
+    JUDGE_EXPRESSION_CACHE_SIZE: int = 50000
+
+    # 当前用户缓存（get_current_user）
+    # - TTL 决定封号 / 权限变更在其它 worker 上最迟多久生效
+    # - BY_TOKEN：额外按 token 缓存解码结果，省掉重复的 JWT 校验
+    PRINCIPAL_CACHE_ENABLED: bool = True
+    PRINCIPAL_CACHE_TTL: float = 30.0
+    PRINCIPAL_CACHE_MAX_SIZE: int = 10000
+    PRINCIPAL_CACHE_BY_TOKEN: bool = False
+
+    # =====================================================
+    # 密码哈希（Argon2）
+    # - 代价参数默认与 passlib 默认值一致，已有哈希不受影响
+    # - EXECUTOR：thread / process 为独立的有界执行器；
+    #   inline 为旧行为（与请求共用 FastAPI 线程池），用于压测对比
+    # - MAX_PENDING：执行中 + 排队的上限，超过直接返回 503
+    # =====================================================
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536  # KiB
+    ARGON2_PARALLELISM: int = 4
+    PASSWORD_HASH_EXECUTOR: Literal["thread", "process", "inline"] = "thread"
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 64
+
+    # /metrics（Prometheus 文本格式）：按路由统计延迟、SQL 条数 / 耗时、连接池等待
+    METRICS_ENABLED: bool = True
+
+    # 路由 SQL 条数预算（@query_budget）：off / log（记 warning）/ raise（返回 500，测试用）
+    QUERY_BUDGET_MODE: Literal["off", "log", "raise"] = "log"
+
+    # 列表接口快速序列化：跳过 response_model 校验，orjson 直接编码（可信数据）
+    FAST_JSON: bool = False
+
+    # =====================================================
+    # 提交答案写入模式
+    # - sync：请求内提交事务（默认）
+    # - write_behind：判题后立即返回（202，id 为 null），后台线程攒批落库
+    #   FLUSH_SIZE / FLUSH_INTERVAL：攒满多少条或等多少秒写一批
+    #   MAX_PENDING：待落库上限，超过返回 503
+    #   SPOOL_PATH：本地追加日志，崩溃重启后重放；多 worker 时文件名里写 {pid}
+    #   （如 /var/spool/app/attempts-{pid}.jsonl），每个进程一个文件，
+    #   启动时顺带重放已退出进程留下的文件
+    #   SPOOL_SEGMENT_SIZE：spool 每写满这么多条切一个分段（<path>.<最后序号>），
+    #   分段里的记录全部落库后删除，持续高峰下 spool 也不会无限增长
+    # =====================================================
+    ATTEMPT_WRITE_MODE: Literal["sync", "write_behind"] = "sync"
+    ATTEMPT_FLUSH_SIZE: int = 500
+    ATTEMPT_FLUSH_INTERVAL: float = 0.2
+    ATTEMPT_MAX_PENDING: int = 20000
+    ATTEMPT_SPOOL_PATH: str | None = None
+    ATTEMPT_SPOOL_FSYNC: bool = False
+    ATTEMPT_SPOOL_SEGMENT_SIZE: int = 10000
+
+    # =====================================================
+    # 题目分桶统计（problem_stats_rollups）
+    # - 小时桶 / 天桶保留天数（<= 0 表示永久保留）
+    # - COMPACT_INTERVAL：后台清理过期分桶的间隔（秒），0 表示不启动
+    # =====================================================
+    ROLLUP_HOURLY_RETENTION_DAYS: int = 14
+    ROLLUP_DAILY_RETENTION_DAYS: int = 0
+    ROLLUP_COMPACT_INTERVAL: float = 3600.0
+
+    # =====================================================
+    # 全文搜索（SQLite FTS5）
+    # - MAX_RANKED：命中太多时只对最新的这么多道命中题目算相关度排序
+    #   （bm25 要给每条命中打分，「求」这类几乎每题都有的词会很慢），0 表示不限
+    # =====================================================
+    SEARCH_MAX_RANKED: int = 5000
+
+    # =====================================================
+    # 推荐下一题（/problems/next）
+    # - POOL_TTL：按难度分组的题目 ID 池的 TTL（秒，本进程改题目时立即失效）
+    # - SOLVED_CACHE：每个用户已做对题目集合的缓存（TTL 秒 / 最多缓存的用户数）
+    # =====================================================
+    RECOMMEND_POOL_TTL: float = 60.0
+    RECOMMEND_SOLVED_CACHE_TTL: float = 300.0
+    RECOMMEND_SOLVED_CACHE_MAX_USERS: int = 10000
+
+    # =====================================================
+    # 用户做题位图（题目列表的 attempted / solved 标记）
+    # - CACHE：每个用户位图的进程内缓存（TTL 秒 / 最多缓存的用户数）
+    # =====================================================
+    BITMAP_CACHE_TTL: float = 300.0
+    BITMAP_CACHE_MAX_USERS: int = 10000
+
+    @property
+    def count_queries(self) -> bool:
+        return self.METRICS_ENABLED or self.QUERY_BUDGET_MODE != "off"
+
+    @property
+    def engine_profile(self) -> EngineProfile:
+        return ENGINE_PROFILES[self.DB_PROFILE]
+
 
 settings = Settings()
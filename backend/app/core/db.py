@@ -1,12 +1,101 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from typing import Any, Callable, TypeVar
 
-from app.core.config import settings
+from sqlalchemy import Engine, create_engine, event, make_url
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import EngineProfile, settings
+from app.core.metrics import (
+    TimedAsyncAdaptedQueuePool,
+    TimedQueuePool,
+    instrument_engine,
+)
+
+T = TypeVar("T")
+
+# 路由层拿到的会话类型（取决于 Settings.DB_ASYNC）
+DbSession = Session | AsyncSession
+
+
+# =====================================================
+# Engine Profile
+# =====================================================
+
+def _is_memory_sqlite(url: str) -> bool:
+    db_url = make_url(url)
+    return (
+        db_url.get_backend_name() == "sqlite"
+        and db_url.database in (None, "", ":memory:")
+    )
+
+
+def _engine_kwargs(url: str, profile: EngineProfile) -> dict[str, Any]:
+    """
+    根据配置档生成 create_engine 参数
+    """
+    kwargs: dict[str, Any] = {"echo": profile.echo}
+
+    # SQLite 内存库使用单连接池，不接受连接池参数
+    if not _is_memory_sqlite(url):
+        kwargs.update(
+            pool_size=profile.pool_size,
+            max_overflow=profile.max_overflow,
+            pool_timeout=profile.pool_timeout,
+            pool_recycle=profile.pool_recycle,
+            pool_pre_ping=profile.pool_pre_ping,
+        )
+        # 开启指标时换成会记录取连接等待时间的连接池
+        if settings.METRICS_ENABLED:
+            is_async = make_url(url).get_dialect().is_async
+            kwargs["poolclass"] = (
+                TimedAsyncAdaptedQueuePool if is_async else TimedQueuePool
+            )
+
+    return kwargs
+
+
+def _install_sqlite_pragmas(sync_engine: Engine, profile: EngineProfile) -> None:
+    """
+    每个新 SQLite 连接建立时执行 PRAGMA
+
+    - WAL：读写不互斥，并发提交不再整体串行
+    - busy_timeout：写锁冲突时等待，而不是立刻 "database is locked"
+    """
+    if sync_engine.dialect.name != "sqlite":
+        return
+
+    pragmas = [
+        f"PRAGMA busy_timeout = {int(profile.sqlite_busy_timeout)}",
+        f"PRAGMA synchronous = {profile.sqlite_synchronous}",
+        f"PRAGMA cache_size = {int(profile.sqlite_cache_size)}",
+        f"PRAGMA mmap_size = {int(profile.sqlite_mmap_size)}",
+    ]
+    if not _is_memory_sqlite(str(sync_engine.url)):
+        pragmas.insert(0, f"PRAGMA journal_mode = {profile.sqlite_journal_mode}")
+
+    @event.listens_for(sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+# =====================================================
+# Sync Engine（建表 / 脚本 / 同步模式路由）
+# =====================================================
 
 engine = create_engine(
     settings.DATABASE_URL,
-    echo=True,
+    **_engine_kwargs(settings.DATABASE_URL, settings.engine_profile),
 )
+_install_sqlite_pragmas(engine, settings.engine_profile)
+if settings.count_queries:
+    instrument_engine(engine)
 
 SessionLocal = sessionmaker(
     autocommit=False,
@@ -17,9 +106,132 @@ SessionLocal = sessionmaker(
 Base = declarative_base()
 
 
-def get_db():
+def create_missing_indexes(bind: Engine) -> None:
+    """
+    给已存在的表补建新索引（create_all 只建新表，不会改动老表）
+    """
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=bind, checkfirst=True)
+
+
+_UPSERT_INSERTS = {
+    "sqlite": sqlite.insert,
+    "postgresql": postgresql.insert,
+}
+
+
+def check_upsert_supported(bind: Engine) -> None:
+    """
+    启动时检查：提交答案时的统计累加依赖 upsert，不支持的数据库直接拒绝启动，
+    而不是等到每次提交时才报错
+    """
+    dialect = bind.dialect.name
+    if dialect not in _UPSERT_INSERTS:
+        raise RuntimeError(
+            f"Unsupported database {dialect}: statistics need ON CONFLICT "
+            f"upserts ({', '.join(_UPSERT_INSERTS)})"
+        )
+
+
+def upsert_insert(dialect: str) -> Callable[..., Any]:
+    """
+    支持 ON CONFLICT DO NOTHING / DO UPDATE 的 insert()（SQLite / PostgreSQL 写法相同）
+
+    方言已在启动时由 check_upsert_supported 检查过
+    """
+    return _UPSERT_INSERTS[dialect]
+
+
+# =====================================================
+# Async Engine（仅 DB_ASYNC=True 时创建）
+# =====================================================
+
+_ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+}
+
+
+def _build_async_url(url: str) -> str:
+    """
+    由同步 DATABASE_URL 推导异步驱动 URL
+    """
+    sync_url = make_url(url)
+    driver = _ASYNC_DRIVERS.get(sync_url.get_backend_name())
+    if driver is None:
+        raise ValueError(
+            f"No async driver known for {sync_url.get_backend_name()}, "
+            "set ASYNC_DATABASE_URL explicitly"
+        )
+    return sync_url.set(drivername=driver).render_as_string(
+        hide_password=False
+    )
+
+
+if settings.DB_ASYNC:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    _async_url = (
+        settings.ASYNC_DATABASE_URL
+        or _build_async_url(settings.DATABASE_URL)
+    )
+    async_engine = create_async_engine(
+        _async_url,
+        **_engine_kwargs(_async_url, settings.engine_profile),
+    )
+    _install_sqlite_pragmas(async_engine.sync_engine, settings.engine_profile)
+    if settings.count_queries:
+        instrument_engine(async_engine.sync_engine)
+
+    # 异步模式下提交后不过期对象，避免在 greenlet 外触发懒加载
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine,
+        autoflush=False,
+        expire_on_commit=False,
+    )
+else:
+    async_engine = None
+    AsyncSessionLocal = None
+
+
+# =====================================================
+# Session 依赖
+# =====================================================
+
+def get_sync_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# 路由统一依赖 get_db，具体实现由 Settings.DB_ASYNC 决定
+get_db = get_async_db if settings.DB_ASYNC else get_sync_db
+
+
+async def run_db(
+    db: DbSession,
+    fn: Callable[..., T],
+    /,
+    *args: Any,
+    **kwargs: Any,
+) -> T:
+    """
+    在当前数据库模式下执行 CRUD 函数
+
+    - AsyncSession：run_sync 在事件循环内执行，IO 走异步驱动
+    - Session：交给线程池执行（与原先 def 路由行为一致）
+
+    CRUD 层只写一份（同步 Session API），两种模式共用。
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
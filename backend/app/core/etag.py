@@ -0,0 +1,37 @@
+import hashlib
+import secrets
+from typing import Optional
+
+from fastapi import Response, status
+
+
+# 进程启动时随机生成：进程内的版本号只在本进程有意义，换进程 / 重启后旧 ETag 全部失效
+PROCESS_EPOCH = secrets.token_hex(4)
+
+
+def short_digest(value: object) -> str:
+    return hashlib.blake2b(repr(value).encode(), digest_size=8).hexdigest()
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    If-None-Match 是否命中（弱比较：忽略 W/ 前缀；支持 "*" 和逗号分隔的多个值）
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        candidate.strip().removeprefix("W/") == etag
+        for candidate in if_none_match.split(",")
+    )
+
+
+def not_modified(etag: str) -> Response:
+    """
+    304 响应（不带 body，不经过 response_model 序列化）
+    """
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag},
+    )
@@ -0,0 +1,42 @@
+from collections import OrderedDict
+from typing import Hashable
+
+
+class KeyedGenerations:
+    """
+    按 key 记录修改时钟，给进程内缓存的「加载期间有没有被改过」判断用
+
+    - current()：加载前取当前时钟
+    - touch(key)：key 被修改（提交后增量更新缓存时调用）
+    - fresh(key, since)：since 之后 key 没被修改过，加载结果可以写回
+
+    只修改某个 key 不会让其它 key 正在进行的加载作废；
+    只保留最近 max_keys 个 key 的时钟，更早被挤出去的 key 一律按最后挤出的时钟算
+    （最多让少量加载放弃写回，不会写回旧值）
+
+    本身不加锁，由调用方在自己的锁里调用
+    """
+
+    def __init__(self, *, max_keys: int) -> None:
+        self._max_keys = max_keys
+        self._clock = 0
+        self._floor = 0
+        self._touched: "OrderedDict[Hashable, int]" = OrderedDict()
+
+    def current(self) -> int:
+        return self._clock
+
+    def touch(self, key: Hashable) -> None:
+        self._clock += 1
+        self._touched[key] = self._clock
+        self._touched.move_to_end(key)
+        while len(self._touched) > self._max_keys:
+            _, self._floor = self._touched.popitem(last=False)
+
+    def touch_all(self) -> None:
+        self._clock += 1
+        self._floor = self._clock
+        self._touched.clear()
+
+    def fresh(self, key: Hashable, since: int) -> bool:
+        return self._touched.get(key, self._floor) <= since
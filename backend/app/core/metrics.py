@@ -0,0 +1,349 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import Engine, event
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+# =====================================================
+# Per-Request Stats（ContextVar，随请求传进线程池 / greenlet）
+# =====================================================
+
+class RequestStats:
+    """
+    单个请求内累计的数据库开销（由 SQL / 连接池钩子写入）
+    """
+    __slots__ = ("sql_count", "sql_seconds", "pool_wait_seconds")
+
+    def __init__(self) -> None:
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.pool_wait_seconds = 0.0
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar(
+    "request_stats",
+    default=None,
+)
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    return _current.get()
+
+
+@contextmanager
+def request_stats_scope() -> Iterator[RequestStats]:
+    """
+    在当前上下文开始统计；外层已有统计时直接复用（嵌套不会互相遮蔽）
+    """
+    stats = _current.get()
+    if stats is not None:
+        yield stats
+        return
+
+    stats = RequestStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+# =====================================================
+# Registry（进程内聚合，/metrics 输出 Prometheus 文本格式）
+# =====================================================
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+# name, help, type, 采集函数 -> [(labels, value)]
+Collector = Tuple[str, str, str, Callable[[], Iterable[Tuple[dict, float]]]]
+
+
+class _RouteSeries:
+    __slots__ = (
+        "buckets",
+        "count",
+        "latency_sum",
+        "sql_count",
+        "sql_seconds",
+        "pool_wait_seconds",
+        "statuses",
+    )
+
+    def __init__(self) -> None:
+        # 每个桶只记落在该区间的次数，输出时再做累加
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.latency_sum = 0.0
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.pool_wait_seconds = 0.0
+        self.statuses: Dict[int, int] = {}
+
+
+class MetricsRegistry:
+    """
+    按 (method, route) 聚合的请求指标
+
+    - route 用路由模板（/problems/{problem_id}），不会随参数膨胀
+    - 每个请求结束时只拿一次锁
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._routes: Dict[Tuple[str, str], _RouteSeries] = {}
+        self._collectors: List[Collector] = []
+
+        # 请求之外（启动 / 脚本 / 后台线程）执行的 SQL
+        self.background_sql_count = 0
+        self.background_sql_seconds = 0.0
+
+    def observe_request(
+        self,
+        *,
+        method: str,
+        route: str,
+        status: int,
+        seconds: float,
+        stats: RequestStats,
+    ) -> None:
+        index = bisect_left(LATENCY_BUCKETS, seconds)
+        with self._lock:
+            series = self._routes.get((method, route))
+            if series is None:
+                series = self._routes[(method, route)] = _RouteSeries()
+            series.buckets[index] += 1
+            series.count += 1
+            series.latency_sum += seconds
+            series.sql_count += stats.sql_count
+            series.sql_seconds += stats.sql_seconds
+            series.pool_wait_seconds += stats.pool_wait_seconds
+            series.statuses[status] = series.statuses.get(status, 0) + 1
+
+    def observe_background_sql(self, seconds: float) -> None:
+        with self._lock:
+            self.background_sql_count += 1
+            self.background_sql_seconds += seconds
+
+    def register_collector(
+        self,
+        name: str,
+        help_text: str,
+        metric_type: str,
+        collect: Callable[[], Iterable[Tuple[dict, float]]],
+    ) -> None:
+        """
+        注册额外指标（缓存命中率、执行器队列等），在 /metrics 时现取
+        """
+        self._collectors.append((name, help_text, metric_type, collect))
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+            self.background_sql_count = 0
+            self.background_sql_seconds = 0.0
+
+    # ---------------- Exposition ----------------
+
+    def render(self) -> str:
+        with self._lock:
+            routes = [
+                (key, _snapshot(series))
+                for key, series in sorted(self._routes.items())
+            ]
+            background = (
+                self.background_sql_count,
+                self.background_sql_seconds,
+            )
+
+        lines: List[str] = []
+
+        def header(name: str, help_text: str, metric_type: str) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+
+        name = "app_http_request_duration_seconds"
+        header(name, "HTTP request latency by route", "histogram")
+        for (method, route), series in routes:
+            labels = _labels(method=method, route=route)
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, series.buckets):
+                cumulative += count
+                lines.append(
+                    f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+                )
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {series.count}')
+            lines.append(f"{name}_sum{{{labels}}} {series.latency_sum}")
+            lines.append(f"{name}_count{{{labels}}} {series.count}")
+
+        name = "app_http_requests_total"
+        header(name, "HTTP requests by route and status", "counter")
+        for (method, route), series in routes:
+            for status, count in sorted(series.statuses.items()):
+                labels = _labels(method=method, route=route, status=status)
+                lines.append(f"{name}{{{labels}}} {count}")
+
+        per_route = (
+            ("app_db_statements_total",
+             "SQL statements executed while serving the route",
+             "sql_count"),
+            ("app_db_statement_seconds_total",
+             "Time spent executing SQL while serving the route",
+             "sql_seconds"),
+            ("app_db_pool_wait_seconds_total",
+             "Time spent waiting for a pooled connection",
+             "pool_wait_seconds"),
+        )
+        for name, help_text, attr in per_route:
+            header(name, help_text, "counter")
+            for (method, route), series in routes:
+                labels = _labels(method=method, route=route)
+                lines.append(f"{name}{{{labels}}} {getattr(series, attr)}")
+
+        header(
+            "app_db_background_statements_total",
+            "SQL statements executed outside of a request",
+            "counter",
+        )
+        lines.append(f"app_db_background_statements_total {background[0]}")
+        header(
+            "app_db_background_statement_seconds_total",
+            "Time spent executing SQL outside of a request",
+            "counter",
+        )
+        lines.append(
+            f"app_db_background_statement_seconds_total {background[1]}"
+        )
+
+        for name, help_text, metric_type, collect in self._collectors:
+            header(name, help_text, metric_type)
+            for labels, value in collect():
+                rendered = _labels(**labels)
+                lines.append(
+                    f"{name}{{{rendered}}} {value}" if rendered
+                    else f"{name} {value}"
+                )
+
+        return "\n".join(lines) + "\n"
+
+
+def _snapshot(series: _RouteSeries) -> _RouteSeries:
+    copy = _RouteSeries()
+    copy.buckets = list(series.buckets)
+    copy.count = series.count
+    copy.latency_sum = series.latency_sum
+    copy.sql_count = series.sql_count
+    copy.sql_seconds = series.sql_seconds
+    copy.pool_wait_seconds = series.pool_wait_seconds
+    copy.statuses = dict(series.statuses)
+    return copy
+
+
+def _labels(**labels) -> str:
+    return ",".join(
+        f'{key}="{_escape(str(value))}"' for key, value in labels.items()
+    )
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+metrics = MetricsRegistry()
+
+
+# =====================================================
+# SQLAlchemy Hooks
+# =====================================================
+
+def instrument_engine(sync_engine: Engine) -> None:
+    """
+    给引擎挂 SQL 计数 / 计时钩子（异步引擎传 async_engine.sync_engine）
+    """
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        context._metrics_started = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._metrics_started
+        stats = _current.get()
+        if stats is None:
+            metrics.observe_background_sql(elapsed)
+            return
+        stats.sql_count += 1
+        stats.sql_seconds += elapsed
+
+
+class _TimedCheckoutMixin:
+    """
+    记录从连接池取连接的等待时间（含池里没有空闲连接时新建连接的时间）
+    """
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            stats = _current.get()
+            if stats is not None:
+                stats.pool_wait_seconds += time.perf_counter() - started
+
+
+class TimedQueuePool(_TimedCheckoutMixin, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+# =====================================================
+# ASGI Middleware
+# =====================================================
+
+class MetricsMiddleware:
+    """
+    纯 ASGI 中间件：计时、记录状态码，请求结束后按路由模板汇总
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        token = _current.set(stats)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            _current.reset(token)
+            # 路由匹配后 FastAPI 会把 route 写进 scope
+            route = getattr(scope.get("route"), "path", None) or "<unmatched>"
+            metrics.observe_request(
+                method=scope["method"],
+                route=route,
+                status=status,
+                seconds=elapsed,
+                stats=stats,
+            )
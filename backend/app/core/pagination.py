@@ -0,0 +1,48 @@
+import base64
+import json
+from typing import Any, Optional, Sequence
+
+
+# =====================================================
+# Opaque Cursor（keyset 分页）
+# =====================================================
+
+def encode_cursor(kind: str, key: int) -> str:
+    """
+    生成不透明游标（base64url(JSON)）
+
+    kind 区分列表类型，避免把题目游标拿去翻做题记录
+    """
+    payload = json.dumps({"k": kind, "id": key}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).rstrip(b"=").decode()
+
+
+def decode_cursor(kind: str, cursor: str) -> int:
+    """
+    解析游标，返回其中的 id
+
+    游标非法时抛出 ValueError
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload: Any = json.loads(base64.urlsafe_b64decode(padded))
+        key = payload["id"]
+        if payload["k"] != kind or not isinstance(key, int):
+            raise ValueError
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor")
+
+    return key
+
+
+def next_cursor(
+    kind: str,
+    items: Sequence[Any],
+    limit: int,
+) -> Optional[str]:
+    """
+    本页取满时返回指向最后一条的游标，否则说明已到末尾
+    """
+    if len(items) < limit:
+        return None
+    return encode_cursor(kind, items[-1].id)
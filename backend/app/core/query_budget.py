@@ -0,0 +1,128 @@
+import logging
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional, TypeVar
+
+from app.core.config import settings
+from app.core.metrics import request_stats_scope
+
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable)
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """
+    一个请求 / 代码块执行的 SQL 条数超过了预算
+    """
+
+
+# =====================================================
+# 声明预算（路由装饰器）
+# =====================================================
+
+def query_budget(max_queries: int) -> Callable[[F], F]:
+    """
+    声明路由最多执行多少条 SQL（按缓存全部未命中的最坏情况填）
+
+    放在 @router.xxx 下面；只给函数打标记，不改变调用方式：
+
+        @router.get("/me")
+        @query_budget(2)
+        async def read_my_attempts(...): ...
+    """
+
+    def decorator(fn: F) -> F:
+        fn.__query_budget__ = max_queries
+        return fn
+
+    return decorator
+
+
+def get_query_budget(endpoint) -> Optional[int]:
+    return getattr(endpoint, "__query_budget__", None)
+
+
+# =====================================================
+# 计数（测试 / 脚本）
+# =====================================================
+
+class QueryCounter:
+    """
+    count_queries() 产出的计数器，count 为进入代码块之后执行的 SQL 条数
+    """
+
+    def __init__(self, stats) -> None:
+        self._stats = stats
+        self._start = stats.sql_count
+
+    @property
+    def count(self) -> int:
+        return self._stats.sql_count - self._start
+
+
+@contextmanager
+def count_queries(max_queries: Optional[int] = None) -> Iterator[QueryCounter]:
+    """
+    统计代码块执行的 SQL 条数；给了 max_queries 时超出即抛 QueryBudgetExceeded
+
+        with count_queries(3) as counter:
+            crud_problem.get_problem_list(db, limit=20)
+
+    依赖 db.py 在引擎上挂的计数钩子（METRICS_ENABLED 或 QUERY_BUDGET_MODE 非 off）
+    """
+    with request_stats_scope() as stats:
+        counter = QueryCounter(stats)
+        yield counter
+
+    if max_queries is not None and counter.count > max_queries:
+        raise QueryBudgetExceeded(
+            f"{counter.count} queries executed, budget is {max_queries}"
+        )
+
+
+# =====================================================
+# 请求级检查（ASGI Middleware）
+# =====================================================
+
+class QueryBudgetMiddleware:
+    """
+    在响应开始时比较 SQL 条数和路由声明的预算
+
+    - log：超出时记 warning
+    - raise：超出时抛 QueryBudgetExceeded（响应尚未开始，客户端收到 500）
+    - 只统计到响应开始为止；流式响应在发送 body 时的查询不计入
+    """
+
+    def __init__(self, app, *, mode: str = settings.QUERY_BUDGET_MODE) -> None:
+        self.app = app
+        self.mode = mode
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.mode == "off":
+            await self.app(scope, receive, send)
+            return
+
+        with request_stats_scope() as stats:
+            start = stats.sql_count
+
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    self._check(scope, stats.sql_count - start)
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
+
+    def _check(self, scope, count: int) -> None:
+        budget = get_query_budget(scope.get("endpoint"))
+        if budget is None or count <= budget:
+            return
+
+        route = getattr(scope.get("route"), "path", scope["path"])
+        message = (
+            f"{scope['method']} {route} executed {count} queries, "
+            f"budget is {budget}"
+        )
+        if self.mode == "raise":
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
@@ -1,11 +1,17 @@
+import asyncio
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Any, Optional
+from typing import Any, Callable, Optional, TypeVar
 
 from jose import jwt, JWTError
 from passlib.context import CryptContext
+from starlette.concurrency import run_in_threadpool
 
 from app.core.config import settings
 
+T = TypeVar("T")
+
 
 # =====================================================
 # Password hashing (Argon2 – 推荐)
@@ -14,6 +20,9 @@ from app.core.config import settings
 pwd_context = CryptContext(
     schemes=["argon2"],
     deprecated="auto",
+    argon2__time_cost=settings.ARGON2_TIME_COST,
+    argon2__memory_cost=settings.ARGON2_MEMORY_COST,
+    argon2__parallelism=settings.ARGON2_PARALLELISM,
 )
 
 
@@ -31,6 +40,112 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+# =====================================================
+# Password hashing executor（有界，不占用请求线程池）
+# =====================================================
+
+class PasswordHashBusy(Exception):
+    """
+    哈希任务排队已满（调用方应返回 503，让客户端稍后重试）
+    """
+
+
+class PasswordHashPool:
+    """
+    Argon2 专用执行器
+
+    - thread：argon2-cffi 计算时释放 GIL，线程即可并行
+    - process：进程池，完全隔离 CPU 占用
+    - inline：旧行为，放到 FastAPI 默认线程池（与读接口抢线程）
+
+    执行中 + 排队的任务数超过 max_pending 时直接拒绝，
+    登录洪峰不会无限堆积请求
+    """
+
+    def __init__(self, *, kind: str, workers: int, max_pending: int) -> None:
+        self.kind = kind
+        self._workers = workers
+        self._max_pending = max_pending
+        self._lock = threading.Lock()
+        self._executor: Optional[Executor] = None
+        self.pending = 0
+        self.rejected = 0
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.kind == "process":
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self._workers,
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self._workers,
+                        thread_name_prefix="password-hash",
+                    )
+            return self._executor
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        with self._lock:
+            if self.pending >= self._max_pending:
+                self.rejected += 1
+                raise PasswordHashBusy("Too many concurrent password operations")
+            self.pending += 1
+
+        try:
+            if self.kind == "inline":
+                return await run_in_threadpool(fn, *args)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "executor": self.kind,
+                "workers": self._workers,
+                "pending": self.pending,
+                "max_pending": self._max_pending,
+                "rejected": self.rejected,
+            }
+
+
+password_hash_pool = PasswordHashPool(
+    kind=settings.PASSWORD_HASH_EXECUTOR,
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """
+    在哈希执行器上计算密码哈希（队列满时抛 PasswordHashBusy）
+    """
+    return await password_hash_pool.run(get_password_hash, password)
+
+
+async def verify_password_async(
+    plain_password: str,
+    hashed_password: str,
+) -> bool:
+    """
+    在哈希执行器上校验密码（队列满时抛 PasswordHashBusy）
+    """
+    return await password_hash_pool.run(
+        verify_password,
+        plain_password,
+        hashed_password,
+    )
+
+
 # =====================================================
 # JWT
 # =====================================================
@@ -61,13 +176,22 @@ def create_access_token(
     )
 
 
-def decode_access_token(token: str) -> Optional[str]:
+def decode_access_token_claims(token: str) -> Optional[dict[str, Any]]:
+    """
+    校验并解码 JWT，返回完整 payload（含 sub / exp）
+    """
     try:
-        payload = jwt.decode(
+        return jwt.decode(
             token,
             settings.JWT_SECRET_KEY,
             algorithms=[ALGORITHM],
         )
-        return payload.get("sub")
     except JWTError:
         return None
+
+
+def decode_access_token(token: str) -> Optional[str]:
+    payload = decode_access_token_claims(token)
+    if payload is None:
+        return None
+    return payload.get("sub")
@@ -0,0 +1,40 @@
+from operator import attrgetter
+from typing import Any, Callable, Dict, Type
+
+import orjson
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+
+# =====================================================
+# Fast JSON（FAST_JSON=True 时列表接口使用）
+# - 跳过 response_model：数据来自数据库 / 题库缓存，类型已可信，不再逐字段校验
+# - orjson 直接编码成 bytes
+# =====================================================
+
+class FastJSONResponse(Response):
+    """
+    orjson 编码的 JSONResponse
+
+    OPT_UTC_Z：UTC 时间输出为 "Z"，与 Pydantic 的 JSON 输出保持一致
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+
+
+def field_extractor(schema: Type[BaseModel]) -> Callable[[Any], Dict[str, Any]]:
+    """
+    按 schema 的字段列表从对象上取属性，生成可直接编码的 dict
+
+    字段列表取自 schema 本身，schema 增删字段时这里自动跟着变；
+    不做类型转换，只适用于字段类型已与 schema 一致的可信对象
+    """
+    names = tuple(schema.model_fields)
+    getter = attrgetter(*names)
+
+    def extract(obj: Any) -> Dict[str, Any]:
+        return dict(zip(names, getter(obj)))
+
+    return extract
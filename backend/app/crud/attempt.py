@@ -1,13 +1,26 @@
-from typing import List, Tuple
+from datetime import datetime, timezone
+from typing import List, Optional, Sequence, Tuple
 from sqlalchemy import func
 
 
 from sqlalchemy.orm import Session
-from sqlalchemy import select
+from sqlalchemy import insert, select
 
 from app.models.attempt import Attempt
-from app.models.problem import Problem
+from app.crud.problem import apply_problem_counters
+from app.services.bitmaps import (
+    ProblemBitmapDeltas,
+    apply_problem_bitmaps,
+    user_bitmaps,
+)
+from app.services.catalog import problem_catalog
+from app.services.counters import ProblemCounterDeltas
+from app.services.ingest import attempt_writer
 from app.services.judge import judge_answer
+from app.services.recommend import solved_sets
+from app.services.rollups import ProblemRollupDeltas, apply_problem_rollups
+from app.services.stats import UserStatsDeltas, apply_user_stats
+from app.services.totals import list_totals
 from app.schemas.attempt import AttemptCreate
 
 
@@ -25,8 +38,8 @@ def create_attempt(
     创建一次做题记录（提交答案）
     """
 
-    # 1️⃣ 获取题目
-    problem = db.get(Problem, attempt_in.problem_id)
+    # 1️⃣ 获取题目（题库缓存，未命中才查库）
+    problem = problem_catalog.get(db, attempt_in.problem_id)
     if not problem:
         raise ValueError("Problem not found")
 
@@ -47,17 +60,260 @@ def create_attempt(
 
     db.add(attempt)
 
-    # 4️⃣ 更新题目统计
-    problem.submit_count += 1
-    if is_correct:
-        problem.correct_count += 1
+    # 4️⃣ 更新题目统计 + 用户学习统计（原子累加，和 Attempt 同一事务提交）
+    deltas = ProblemCounterDeltas()
+    deltas.add(problem.id, is_correct=is_correct)
+    apply_problem_counters(db, deltas=deltas)
+
+    now = datetime.now(timezone.utc)
+    stats = UserStatsDeltas()
+    stats.add(user_id, problem, is_correct=is_correct, day=now.date())
+    apply_user_stats(db, deltas=stats)
+
+    rollups = ProblemRollupDeltas()
+    rollups.add(
+        problem.id,
+        is_correct=is_correct,
+        time_spent=attempt_in.time_spent,
+        at=now,
+    )
+    apply_problem_rollups(db, deltas=rollups)
 
+    bitmaps = ProblemBitmapDeltas()
+    bitmaps.add(user_id, problem.id, is_correct=is_correct)
+    apply_problem_bitmaps(db, deltas=bitmaps)
+
+    mark = problem_catalog.mark()
+    attempt_mark = list_totals.attempt_mark()
     db.commit()
     db.refresh(attempt)
 
+    problem_catalog.apply_counters(deltas, mark=mark)
+    list_totals.add_attempts(user_id, 1, mark=attempt_mark)
+    user_bitmaps.apply(bitmaps)
+    if is_correct:
+        solved_sets.add(user_id, [problem.id])
+
     return attempt
 
 
+_attempts = Attempt.__table__
+
+
+def _insert_attempts(db: Session, rows: List[dict]) -> list:
+    """
+    一条 INSERT ... VALUES (...), (...) RETURNING，结果与 rows 顺序对齐
+
+    sort_by_parameter_order 在 SQLite 上会退化成逐行 INSERT；
+    RETURNING 本身不保证顺序，但同一条语句内自增 id 按 VALUES 顺序分配，按 id 排序即可
+    """
+    inserted = db.execute(
+        insert(_attempts)
+        .values(rows)
+        .returning(_attempts.c.id, _attempts.c.created_at)
+    ).all()
+    return sorted(inserted, key=lambda row: row.id)
+
+
+def _judge_batch(
+    db: Session,
+    *,
+    user_id: int,
+    attempts_in: Sequence[AttemptCreate],
+) -> Tuple[
+    List[Tuple[Optional[Attempt], Optional[str]]],
+    List[dict],
+    ProblemCounterDeltas,
+    UserStatsDeltas,
+]:
+    """
+    批量判题：返回 (results, rows, deltas, stats)
+
+    results 与 attempts_in 一一对应；rows 为成功条目的待插入数据（顺序一致）
+    """
+
+    # 一次取出所有涉及的题目（题库缓存未命中的合并成一次查询）
+    problems = problem_catalog.get_many(
+        db,
+        [item.problem_id for item in attempts_in],
+    )
+
+    results: List[Tuple[Optional[Attempt], Optional[str]]] = []
+    rows: List[dict] = []
+    deltas = ProblemCounterDeltas()
+    stats = UserStatsDeltas()
+    today = datetime.now(timezone.utc).date()
+
+    for item in attempts_in:
+        problem = problems.get(item.problem_id)
+        if problem is None:
+            results.append((None, "Problem not found"))
+            continue
+
+        try:
+            is_correct = judge_answer(
+                problem=problem,
+                user_answer=item.user_answer,
+            )
+        except ValueError as e:
+            results.append((None, str(e)))
+            continue
+
+        attempt = Attempt(
+            user_id=user_id,
+            problem_id=problem.id,
+            user_answer=item.user_answer,
+            is_correct=is_correct,
+            time_spent=item.time_spent,
+        )
+        results.append((attempt, None))
+        rows.append({
+            "user_id": user_id,
+            "problem_id": problem.id,
+            "user_answer": item.user_answer,
+            "is_correct": is_correct,
+            "time_spent": item.time_spent,
+        })
+        deltas.add(problem.id, is_correct=is_correct)
+        stats.add(user_id, problem, is_correct=is_correct, day=today)
+
+    return results, rows, deltas, stats
+
+
+def _rollup_deltas(rows: List[dict], *, at: datetime) -> ProblemRollupDeltas:
+    rollups = ProblemRollupDeltas()
+    for row in rows:
+        rollups.add(
+            row["problem_id"],
+            is_correct=row["is_correct"],
+            time_spent=row["time_spent"],
+            at=at,
+        )
+    return rollups
+
+
+def _bitmap_deltas(rows: List[dict]) -> ProblemBitmapDeltas:
+    bitmaps = ProblemBitmapDeltas()
+    for row in rows:
+        bitmaps.add(
+            row["user_id"],
+            row["problem_id"],
+            is_correct=row["is_correct"],
+        )
+    return bitmaps
+
+
+def _accepted_attempts(
+    results: List[Tuple[Optional[Attempt], Optional[str]]],
+):
+    return (attempt for attempt, _ in results if attempt is not None)
+
+
+def create_attempt_batch(
+    db: Session,
+    *,
+    user_id: int,
+    attempts_in: Sequence[AttemptCreate],
+) -> List[Tuple[Optional[Attempt], Optional[str]]]:
+    """
+    批量提交答案（一次查询、一次批量插入、一次提交）
+
+    返回与 attempts_in 一一对应的 (attempt, error)：
+    - 成功：(Attempt, None)
+    - 失败：(None, 错误原因)，不影响其它条目
+    """
+
+    # 1️⃣ 一次取题 + 逐条判题，同时聚合统计增量
+    results, rows, deltas, stats = _judge_batch(
+        db,
+        user_id=user_id,
+        attempts_in=attempts_in,
+    )
+    if not rows:
+        return results
+
+    # 2️⃣ 批量插入 + 合并后的统计更新，一次提交
+    inserted = _insert_attempts(db, rows)
+    apply_problem_counters(db, deltas=deltas)
+    apply_user_stats(db, deltas=stats)
+    apply_problem_rollups(
+        db,
+        deltas=_rollup_deltas(rows, at=datetime.now(timezone.utc)),
+    )
+    bitmaps = _bitmap_deltas(rows)
+    apply_problem_bitmaps(db, deltas=bitmaps)
+    mark = problem_catalog.mark()
+    attempt_mark = list_totals.attempt_mark()
+    db.commit()
+
+    problem_catalog.apply_counters(deltas, mark=mark)
+    list_totals.add_attempts(user_id, len(rows), mark=attempt_mark)
+    user_bitmaps.apply(bitmaps)
+    solved_sets.add_from_stats(stats)
+
+    # 3️⃣ 回填 id / created_at（对象不挂在 Session 上，提交后也可直接读取）
+    accepted = _accepted_attempts(results)
+    for attempt, (attempt_id, created_at) in zip(accepted, inserted):
+        attempt.id, attempt.created_at = attempt_id, created_at
+
+    return results
+
+
+# =====================================================
+# Create（write-behind：判题后入队，后台线程落库）
+# =====================================================
+
+def enqueue_attempt(
+    db: Session,
+    *,
+    user_id: int,
+    attempt_in: AttemptCreate,
+) -> Attempt:
+    """
+    判题后交给 attempt_writer，立即返回（id 为 None，落库后才有）
+
+    db 只用于题库缓存未命中时取题；队列满时抛 AttemptWriterBusy
+    """
+    results = enqueue_attempt_batch(
+        db,
+        user_id=user_id,
+        attempts_in=[attempt_in],
+    )
+    attempt, error = results[0]
+    if attempt is None:
+        raise ValueError(error)
+    return attempt
+
+
+def enqueue_attempt_batch(
+    db: Session,
+    *,
+    user_id: int,
+    attempts_in: Sequence[AttemptCreate],
+) -> List[Tuple[Optional[Attempt], Optional[str]]]:
+    """
+    create_attempt_batch 的 write-behind 版本（整批一起入队）
+    """
+    results, rows, _, _ = _judge_batch(
+        db,
+        user_id=user_id,
+        attempts_in=attempts_in,
+    )
+    if not rows:
+        return results
+
+    # 提交时间在入队时确定，不依赖落库时刻
+    created_at = datetime.now(timezone.utc)
+    for row in rows:
+        row["created_at"] = created_at
+    attempt_writer.submit_many(rows)
+
+    for attempt in _accepted_attempts(results):
+        attempt.created_at = created_at
+
+    return results
+
+
 # =====================================================
 # Read
 # =====================================================
@@ -68,27 +324,51 @@ def get_attempt_list_by_user(
     user_id: int,
     skip: int = 0,
     limit: int = 20,
-) -> Tuple[int, List[Attempt]]:
+    before_id: Optional[int] = None,
+    include_total: bool = True,
+) -> Tuple[Optional[int], List[Attempt]]:
     """
-    获取某个用户的做题记录列表
+    获取某个用户的做题记录列表（最新在前）
     返回 (total, items)
+
+    total：
+    - 优先读缓存的用户做题数（提交时累加），未命中才 COUNT
+    - include_total=False 时不计算，返回 None
+
+    分页方式：
+    - before_id 为空：OFFSET/LIMIT，按 created_at 倒序（兼容旧接口）
+    - before_id 不为空：keyset，取 id < before_id 的下一页，忽略 skip
+      （created_at 由数据库在插入时生成，与自增 id 同序）
     """
 
-    stmt = (
-        select(Attempt)
-        .where(Attempt.user_id == user_id)
-        .order_by(Attempt.created_at.desc())
-    )
+    stmt = select(Attempt).where(Attempt.user_id == user_id)
+
+    total: Optional[int] = None
+    if include_total:
+        total, generation = list_totals.get_attempt_total(user_id)
+        if total is None:
+            total = db.scalar(
+                select(func.count()).select_from(stmt.subquery())
+            ) or 0
+            list_totals.set_attempt_total(
+                user_id, total, generation=generation,
+            )
 
-    # ✅ total 明确是 int
-    total: int = db.scalar(
-        select(func.count()).select_from(stmt.subquery())
-    ) or 0
+    if before_id is not None:
+        page = (
+            stmt.where(Attempt.id < before_id)
+            .order_by(Attempt.id.desc())
+        )
+    else:
+        page = (
+            stmt.order_by(Attempt.created_at.desc(), Attempt.id.desc())
+            .offset(skip)
+        )
 
     # ✅ 显式转换为 list，类型检查通过
     items = list(
         db.scalars(
-            stmt.offset(skip).limit(limit)
+            page.limit(limit)
         )
     )
 
@@ -1,10 +1,17 @@
 from typing import List, Optional, Tuple
 
 from sqlalchemy.orm import Session
-from sqlalchemy import select, func
+from sqlalchemy import bindparam, select, func, update
+from sqlalchemy.orm.util import identity_key
 
 from app.models.problem import Problem
 from app.schemas.problem import ProblemCreate, ProblemUpdate
+from app.services.catalog import ProblemSnapshot, problem_catalog
+from app.services.counters import ProblemCounterDeltas
+from app.services.judge import invalidate_judge_spec
+from app.services.recommend import difficulty_pools
+from app.services.search import index_problems
+from app.services.totals import list_totals
 
 
 # =====================================================
@@ -31,9 +38,16 @@ def create_problem(
     )
 
     db.add(problem)
+    db.flush()
+    # 全文索引和题目同一事务写入
+    index_problems(db, [(problem.id, problem.title, problem.content)])
     db.commit()
     db.refresh(problem)
 
+    problem_catalog.invalidate(problem.id)
+    list_totals.invalidate_problems()
+    difficulty_pools.invalidate()
+
     return problem
 
 
@@ -64,13 +78,25 @@ def get_problem_list(
     difficulty: Optional[int] = None,
     problem_type: Optional[str] = None,
     is_active: bool = True,
-) -> Tuple[int, List[Problem]]:
+    after_id: Optional[int] = None,
+    include_total: bool = True,
+) -> Tuple[Optional[int], List[ProblemSnapshot]]:
     """
     获取题目列表（分页 + 筛选）
     返回 (total, items)
+
+    只查询本页的题目 id，题目内容从 problem_catalog 取（未命中的合并成一次查询）
+
+    total：
+    - 优先读按筛选条件缓存的 COUNT，未命中才查询
+    - include_total=False 时不计算，返回 None
+
+    分页方式：
+    - after_id 为空：OFFSET/LIMIT（兼容旧接口）
+    - after_id 不为空：keyset，取 id > after_id 的下一页，忽略 skip
     """
 
-    stmt = select(Problem)
+    stmt = select(Problem.id)
 
     if is_active is not None:
         stmt = stmt.where(Problem.is_active == is_active)
@@ -81,19 +107,35 @@ def get_problem_list(
     if problem_type is not None:
         stmt = stmt.where(Problem.problem_type == problem_type)
 
-    # ✅ 关键点 1：明确 total 一定是 int
-    total: int = db.scalar(
-        select(func.count()).select_from(stmt.subquery())
-    ) or 0
-
-    # ✅ 关键点 2：明确 items 是 List[Problem]
-    items: List[Problem] = (
+    total: Optional[int] = None
+    if include_total:
+        key = (is_active, difficulty, problem_type)
+        total, generation = list_totals.get_problem_total(key)
+        if total is None:
+            total = db.scalar(
+                select(func.count()).select_from(stmt.subquery())
+            ) or 0
+            list_totals.set_problem_total(key, total, generation=generation)
+
+    page = stmt.order_by(Problem.id)
+    if after_id is not None:
+        page = page.where(Problem.id > after_id)
+    else:
+        page = page.offset(skip)
+
+    page_ids: List[int] = list(
         db.scalars(
-            stmt.offset(skip).limit(limit)
+            page.limit(limit)
         )
-        .all()
     )
 
+    snapshots = problem_catalog.get_many(db, page_ids)
+    items: List[ProblemSnapshot] = [
+        snapshots[problem_id]
+        for problem_id in page_ids
+        if problem_id in snapshots
+    ]
+
     return total, items
 
 
@@ -115,9 +157,16 @@ def update_problem(
     for field, value in update_data.items():
         setattr(problem, field, value)
 
+    if "title" in update_data or "content" in update_data:
+        index_problems(db, [(problem.id, problem.title, problem.content)])
     db.commit()
     db.refresh(problem)
 
+    problem_catalog.invalidate(problem.id)
+    invalidate_judge_spec(problem.id)
+    list_totals.invalidate_problems()
+    difficulty_pools.invalidate()
+
     return problem
 
 
@@ -125,6 +174,45 @@ def update_problem(
 # Statistics
 # =====================================================
 
+_problems = Problem.__table__
+
+# 原子累加：SET x = x + :delta，不读旧值，并发下不会丢失更新
+_apply_counters_stmt = (
+    update(_problems)
+    .where(_problems.c.id == bindparam("pid"))
+    .values(
+        submit_count=_problems.c.submit_count + bindparam("d_submit"),
+        correct_count=_problems.c.correct_count + bindparam("d_correct"),
+    )
+)
+
+
+def apply_problem_counters(
+    db: Session,
+    *,
+    deltas: ProblemCounterDeltas,
+) -> None:
+    """
+    把统计增量写入数据库（不提交，由调用方控制事务）
+
+    - 每道题一条原子 UPDATE，多道题走 executemany
+    - 当前 Session 里已加载的 Problem 会过期计数字段，下次访问重新读取
+    """
+    if not deltas:
+        return
+
+    params = [
+        {"pid": problem_id, "d_submit": submits, "d_correct": correct}
+        for problem_id, submits, correct in deltas.items()
+    ]
+    db.execute(_apply_counters_stmt, params)
+
+    for row in params:
+        problem = db.identity_map.get(identity_key(Problem, row["pid"]))
+        if problem is not None:
+            db.expire(problem, ["submit_count", "correct_count"])
+
+
 def increase_submit_count(
     db: Session,
     *,
@@ -134,12 +222,8 @@ def increase_submit_count(
     """
     提交一次答案后更新统计信息
     """
-    problem = db.get(Problem, problem_id)
-    if not problem:
-        return
-
-    problem.submit_count += 1
-    if is_correct:
-        problem.correct_count += 1
+    deltas = ProblemCounterDeltas()
+    deltas.add(problem_id, is_correct=is_correct)
 
+    apply_problem_counters(db, deltas=deltas)
     db.commit()
@@ -3,6 +3,7 @@ from sqlalchemy import select
 
 from app.models.user import User
 from app.schemas.user import UserCreate
+from app.services.principals import principal_cache
 
 
 # =====================================================
@@ -88,4 +89,7 @@ def update_user(
     db.commit()
     db.refresh(user)
 
+    # is_active / is_superuser 等变更立即对 get_current_user 生效
+    principal_cache.invalidate(user.id)
+
     return user
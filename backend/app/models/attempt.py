@@ -4,6 +4,7 @@ from sqlalchemy import (
     Boolean,
     DateTime,
     ForeignKey,
+    Index,
     func,
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
@@ -20,6 +21,15 @@ class Attempt(Base):
 
     __tablename__ = "attempts"
 
+    # =====================================================
+    # Composite Indexes（按查询形状建）
+    # - 我的做题记录：user_id 过滤 + created_at 倒序（rowid 隐含在索引末尾，兜住 id desc）
+    # - keyset 翻页（user_id + id < cursor）走 ix_attempts_user_id
+    # =====================================================
+    __table_args__ = (
+        Index("ix_attempts_user_created", "user_id", "created_at"),
+    )
+
     # =====================================================
     # Primary Key
     # =====================================================
@@ -0,0 +1,40 @@
+from sqlalchemy import Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.db import Base
+
+
+class IngestCheckpoint(Base):
+    """
+    写后台（write-behind）落库进度
+
+    表示：某个 spool 文件里，序号不超过 last_seq 的记录都已提交到数据库
+    与批量 INSERT 在同一事务里更新，重放 spool 时据此跳过已落库的记录
+    """
+
+    __tablename__ = "ingest_checkpoints"
+
+    # =====================================================
+    # Primary Key
+    # =====================================================
+    name: Mapped[str] = mapped_column(
+        String(100),
+        primary_key=True,
+        comment="写入通道名（attempts:<spool 绝对路径>）"
+    )
+
+    # =====================================================
+    # Progress
+    # =====================================================
+    last_seq: Mapped[int] = mapped_column(
+        Integer,
+        nullable=False,
+        default=0,
+        comment="已提交的最大序号"
+    )
+
+    def __repr__(self) -> str:
+        return (
+            f"<IngestCheckpoint name={self.name} "
+            f"last_seq={self.last_seq}>"
+        )
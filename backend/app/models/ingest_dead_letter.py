@@ -0,0 +1,68 @@
+from sqlalchemy import DateTime, Integer, String, Text, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.db import Base
+
+
+class IngestDeadLetter(Base):
+    """
+    写后台（write-behind）无法落库的记录
+
+    表示：某条已判题的做题记录在数据库里永久失败（如外键 / 约束冲突），
+    被从批次里拆出来单独保存，不再阻塞后面的记录；修复数据后可按 payload 重新写入
+    """
+
+    __tablename__ = "ingest_dead_letters"
+
+    # =====================================================
+    # Primary Key
+    # =====================================================
+    id: Mapped[int] = mapped_column(
+        Integer,
+        primary_key=True,
+        comment="ID"
+    )
+
+    # =====================================================
+    # Source
+    # =====================================================
+    name: Mapped[str] = mapped_column(
+        String(100),
+        nullable=False,
+        index=True,
+        comment="写入通道名（同 ingest_checkpoints.name）"
+    )
+
+    seq: Mapped[int] = mapped_column(
+        Integer,
+        nullable=False,
+        comment="记录在 spool 里的序号"
+    )
+
+    # =====================================================
+    # Content
+    # =====================================================
+    payload: Mapped[str] = mapped_column(
+        Text,
+        nullable=False,
+        comment="原始记录（JSON）"
+    )
+
+    error: Mapped[str] = mapped_column(
+        Text,
+        nullable=False,
+        comment="落库失败的异常"
+    )
+
+    created_at: Mapped[DateTime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+        comment="进入死信的时间"
+    )
+
+    def __repr__(self) -> str:
+        return (
+            f"<IngestDeadLetter id={self.id} name={self.name} "
+            f"seq={self.seq}>"
+        )
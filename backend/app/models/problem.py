@@ -6,6 +6,7 @@ from sqlalchemy import (
     DateTime,
     ForeignKey,
     JSON,
+    Index,
     func,
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
@@ -22,6 +23,23 @@ class Problem(Base):
 
     __tablename__ = "problems"
 
+    # =====================================================
+    # Composite Indexes（按 get_problem_list 的筛选组合建）
+    # - 列表只查 id（= rowid），这些索引都是覆盖索引
+    # - 每种等值组合一条索引，索引内按 rowid 有序，ORDER BY id 不用排序
+    # =====================================================
+    __table_args__ = (
+        Index("ix_problems_active", "is_active"),
+        Index("ix_problems_active_difficulty", "is_active", "difficulty"),
+        Index("ix_problems_active_type", "is_active", "problem_type"),
+        Index(
+            "ix_problems_active_difficulty_type",
+            "is_active",
+            "difficulty",
+            "problem_type",
+        ),
+    )
+
     # =====================================================
     # Primary Key
     # =====================================================
@@ -50,7 +68,7 @@ class Problem(Base):
     problem_type: Mapped[str] = mapped_column(
         String(50),
         nullable=False,
-        comment="题目类型：single / multiple / numeric / text"
+        comment="题目类型：single / multiple / numeric / text / expression"
     )
 
     difficulty: Mapped[int] = mapped_column(
@@ -0,0 +1,86 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.db import Base
+
+
+class ProblemStatsRollup(Base):
+    """
+    题目统计按时间分桶的汇总（hour / day 两种粒度，UTC 对齐）
+
+    提交答案时和 Attempt 同一事务原子累加（见 services.rollups），
+    后台看板按时间范围查询只读这张表，不扫 attempts；
+    小时桶保留 ROLLUP_HOURLY_RETENTION_DAYS 天，过期由 compact_rollups 清理
+    """
+
+    __tablename__ = "problem_stats_rollups"
+    __table_args__ = (
+        # 过期清理：按粒度 + 桶起点范围删除
+        Index(
+            "ix_problem_stats_rollups_granularity_bucket",
+            "granularity",
+            "bucket_start",
+        ),
+    )
+
+    # =====================================================
+    # Primary Key（题目 + 粒度 + 桶起点，范围查询直接走主键）
+    # =====================================================
+    problem_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("problems.id"),
+        primary_key=True,
+        comment="题目 ID"
+    )
+
+    granularity: Mapped[str] = mapped_column(
+        String(10),
+        primary_key=True,
+        comment="粒度：hour / day"
+    )
+
+    bucket_start: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        primary_key=True,
+        comment="桶起点（UTC，整点 / 零点）"
+    )
+
+    # =====================================================
+    # Counters
+    # =====================================================
+    submit_count: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        nullable=False,
+        comment="提交次数"
+    )
+
+    correct_count: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        nullable=False,
+        comment="正确次数"
+    )
+
+    time_spent_total: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        nullable=False,
+        comment="做题耗时之和（秒）"
+    )
+
+    time_spent_count: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        nullable=False,
+        comment="带耗时的提交次数（算平均耗时用）"
+    )
+
+    def __repr__(self) -> str:
+        return (
+            f"<ProblemStatsRollup problem_id={self.problem_id} "
+            f"{self.granularity}={self.bucket_start} "
+            f"{self.correct_count}/{self.submit_count}>"
+        )
@@ -0,0 +1,57 @@
+from sqlalchemy import BigInteger, ForeignKey, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.db import Base
+
+
+class UserProblemBitmap(Base):
+    """
+    用户做过 / 做对过的题目位图（每行一个 63 位的字）
+
+    题目 problem_id 落在第 problem_id // 63 个字的第 problem_id % 63 位；
+    只用 63 位，保证值在有符号 BIGINT 范围内为非负数。
+    提交答案时在同一事务里按位或（见 services.bitmaps），并发提交不会丢失；
+    题目列表的 attempted / solved 标记只读这张表（且有进程内缓存），不 join attempts
+    """
+
+    __tablename__ = "user_problem_bitmaps"
+
+    # =====================================================
+    # Primary Key（用户 + 字序号，按用户范围读取直接走主键）
+    # =====================================================
+    user_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("users.id"),
+        primary_key=True,
+        comment="用户 ID"
+    )
+
+    word: Mapped[int] = mapped_column(
+        Integer,
+        primary_key=True,
+        autoincrement=False,
+        comment="字序号（problem_id // 63）"
+    )
+
+    # =====================================================
+    # Bits
+    # =====================================================
+    attempted_bits: Mapped[int] = mapped_column(
+        BigInteger,
+        default=0,
+        nullable=False,
+        comment="做过的题目位"
+    )
+
+    solved_bits: Mapped[int] = mapped_column(
+        BigInteger,
+        default=0,
+        nullable=False,
+        comment="做对过的题目位"
+    )
+
+    def __repr__(self) -> str:
+        return (
+            f"<UserProblemBitmap user_id={self.user_id} word={self.word} "
+            f"attempted={self.attempted_bits:#x} solved={self.solved_bits:#x}>"
+        )
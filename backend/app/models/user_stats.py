@@ -0,0 +1,172 @@
+from datetime import date, datetime
+
+from sqlalchemy import Date, DateTime, ForeignKey, Integer, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.db import Base
+
+
+class UserStats(Base):
+    """
+    用户学习统计（每个用户一行）
+
+    提交答案时在同一事务里原子累加（见 services.stats），读取时不扫 attempts；
+    与 attempts 不一致时用 scripts.rebuild_stats 重算
+    """
+
+    __tablename__ = "user_stats"
+
+    # =====================================================
+    # Primary Key
+    # =====================================================
+    user_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("users.id"),
+        primary_key=True,
+        comment="用户 ID"
+    )
+
+    # =====================================================
+    # Counters
+    # =====================================================
+    total_attempts: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        nullable=False,
+        comment="提交次数"
+    )
+
+    correct_attempts: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        nullable=False,
+        comment="正确次数"
+    )
+
+    solved_count: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        nullable=False,
+        comment="做对过的不同题目数"
+    )
+
+    # =====================================================
+    # Streak（按 UTC 日期）
+    # =====================================================
+    current_streak: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        nullable=False,
+        comment="截至 last_active_date 的连续做题天数"
+    )
+
+    longest_streak: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        nullable=False,
+        comment="历史最长连续做题天数"
+    )
+
+    last_active_date: Mapped[date | None] = mapped_column(
+        Date,
+        nullable=True,
+        comment="最近一次做题的日期"
+    )
+
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+        comment="更新时间"
+    )
+
+    def __repr__(self) -> str:
+        return (
+            f"<UserStats user_id={self.user_id} "
+            f"total={self.total_attempts} solved={self.solved_count}>"
+        )
+
+
+class UserStatsBreakdown(Base):
+    """
+    用户按维度拆分的正确率（dimension = difficulty / type）
+    """
+
+    __tablename__ = "user_stats_breakdown"
+
+    user_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("users.id"),
+        primary_key=True,
+        comment="用户 ID"
+    )
+
+    dimension: Mapped[str] = mapped_column(
+        String(20),
+        primary_key=True,
+        comment="维度：difficulty / type"
+    )
+
+    key: Mapped[str] = mapped_column(
+        String(50),
+        primary_key=True,
+        comment="维度取值（难度等级或题目类型）"
+    )
+
+    total: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        nullable=False,
+        comment="提交次数"
+    )
+
+    correct: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        nullable=False,
+        comment="正确次数"
+    )
+
+    def __repr__(self) -> str:
+        return (
+            f"<UserStatsBreakdown user_id={self.user_id} "
+            f"{self.dimension}={self.key} {self.correct}/{self.total}>"
+        )
+
+
+class UserSolvedProblem(Base):
+    """
+    用户做对过的题目（每个用户每道题一行）
+
+    用来判断一次正确提交是不是「第一次做对」，从而维护 solved_count
+    """
+
+    __tablename__ = "user_solved_problems"
+
+    user_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("users.id"),
+        primary_key=True,
+        comment="用户 ID"
+    )
+
+    problem_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("problems.id"),
+        primary_key=True,
+        comment="题目 ID"
+    )
+
+    solved_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+        comment="第一次做对的时间"
+    )
+
+    def __repr__(self) -> str:
+        return (
+            f"<UserSolvedProblem user_id={self.user_id} "
+            f"problem_id={self.problem_id}>"
+        )
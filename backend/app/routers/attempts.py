@@ -1,23 +1,58 @@
-from typing import List
+from datetime import datetime, timezone
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
 
-from app.core.db import get_db
+from app.core.config import settings
+from app.core.db import DbSession, get_db, run_db
+from app.core.pagination import decode_cursor, next_cursor
+from app.core.serialization import FastJSONResponse, field_extractor
 from app.routers.deps import get_current_user
-from app.models.user import User
+from app.services.principals import Principal
 from app.schemas.attempt import (
+    AttemptBatchCreate,
+    AttemptBatchOut,
     AttemptCreate,
     AttemptOut,
     AttemptListOut,
 )
 from app.crud.attempt import (
     create_attempt,
+    create_attempt_batch,
+    enqueue_attempt,
+    enqueue_attempt_batch,
     get_attempt_list_by_user,
 )
+from app.services.attempt_export import (
+    DEFAULT_BATCH_SIZE,
+    MEDIA_TYPES,
+    AttemptExportFilter,
+    ExportFormat,
+    export_attempts,
+)
+from app.services.ingest import AttemptWriterBusy
+from app.core.query_budget import query_budget
 
 router = APIRouter()
 
+_attempt_out = field_extractor(AttemptOut)
+
+
+def _write_behind() -> bool:
+    return settings.ATTEMPT_WRITE_MODE == "write_behind"
+
+
+def _attempt_writer_busy() -> HTTPException:
+    """
+    写后台队列已满：503 + Retry-After，让客户端稍后重试
+    """
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Server busy, please retry",
+        headers={"Retry-After": "1"},
+    )
+
 
 # =====================================================
 # Submit Answer
@@ -29,18 +64,23 @@ router = APIRouter()
     status_code=status.HTTP_201_CREATED,
     summary="提交答案"
 )
-def submit_attempt(
+@query_budget(10)
+async def submit_attempt(
     attempt_in: AttemptCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    response: Response,
+    db: DbSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
 ):
     """
     提交一道题的答案
+
+    write-behind 模式下判题后立即返回 202（id 为 null），后台批量落库
     """
 
     try:
-        attempt = create_attempt(
-            db=db,
+        attempt = await run_db(
+            db,
+            enqueue_attempt if _write_behind() else create_attempt,
             user_id=current_user.id,
             attempt_in=attempt_in,
         )
@@ -49,10 +89,66 @@ def submit_attempt(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=str(e),
         )
+    except AttemptWriterBusy:
+        raise _attempt_writer_busy()
 
+    if _write_behind():
+        response.status_code = status.HTTP_202_ACCEPTED
     return attempt
 
 
+# =====================================================
+# Submit Answers (Batch)
+# =====================================================
+
+@router.post(
+    "/batch",
+    response_model=AttemptBatchOut,
+    status_code=status.HTTP_201_CREATED,
+    summary="批量提交答案"
+)
+@query_budget(9)
+async def submit_attempt_batch(
+    batch_in: AttemptBatchCreate,
+    response: Response,
+    db: DbSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """
+    一次提交多道题的答案（整批一次提交事务）
+
+    单条失败（如题目不存在）只体现在对应条目的 error 中；
+    write-behind 模式下整批入队后返回 202
+    """
+
+    try:
+        results = await run_db(
+            db,
+            enqueue_attempt_batch if _write_behind() else create_attempt_batch,
+            user_id=current_user.id,
+            attempts_in=batch_in.items,
+        )
+    except AttemptWriterBusy:
+        raise _attempt_writer_busy()
+
+    if _write_behind():
+        response.status_code = status.HTTP_202_ACCEPTED
+
+    return {
+        "items": [
+            {
+                "index": index,
+                "problem_id": item.problem_id,
+                "attempt": attempt,
+                "error": error,
+            }
+            for index, (item, (attempt, error)) in enumerate(
+                zip(batch_in.items, results)
+            )
+        ],
+    }
+
+
 # =====================================================
 # My Attempts
 # =====================================================
@@ -62,24 +158,117 @@ def submit_attempt(
     response_model=AttemptListOut,
     summary="获取我的做题记录"
 )
-def read_my_attempts(
+@query_budget(3)
+async def read_my_attempts(
     skip: int = 0,
     limit: int = 20,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    cursor: Optional[str] = Query(
+        None,
+        description="上一页返回的 next_cursor；传入后忽略 skip",
+    ),
+    include_total: bool = Query(
+        True,
+        description="是否返回 total；翻页时可传 false 省掉 COUNT",
+    ),
+    db: DbSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
 ):
     """
     获取当前用户的做题记录（分页）
+
+    - 默认 skip/limit 分页
+    - 传 cursor 时做 keyset 分页，翻页深度不影响耗时
     """
 
-    total, items = get_attempt_list_by_user(
-        db=db,
+    try:
+        before_id = (
+            decode_cursor("attempt", cursor) if cursor is not None else None
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+
+    total, items = await run_db(
+        db,
+        get_attempt_list_by_user,
         user_id=current_user.id,
         skip=skip,
         limit=limit,
+        before_id=before_id,
+        include_total=include_total,
     )
 
+    cursor_out = next_cursor("attempt", items, limit)
+
+    if settings.FAST_JSON:
+        return FastJSONResponse({
+            "total": total,
+            "items": [_attempt_out(item) for item in items],
+            "next_cursor": cursor_out,
+        })
+
     return {
         "total": total,
         "items": items,
+        "next_cursor": cursor_out,
     }
+
+
+# =====================================================
+# Export（流式导出）
+# =====================================================
+
+@router.get(
+    "/export",
+    summary="导出做题记录（NDJSON / CSV）",
+    response_class=StreamingResponse,
+)
+@query_budget(1)
+async def export_attempt_history(
+    fmt: ExportFormat = Query("ndjson", alias="format"),
+    user_id: Optional[int] = Query(
+        None,
+        description="只导出该用户（管理员可指定任意用户；普通用户只能导出自己的）",
+    ),
+    problem_id: Optional[int] = Query(None),
+    start: Optional[datetime] = Query(
+        None,
+        description="created_at 起（含；不带时区按 UTC）",
+    ),
+    end: Optional[datetime] = Query(
+        None,
+        description="created_at 止（不含；不带时区按 UTC）",
+    ),
+    current_user: Principal = Depends(get_current_user),
+):
+    """
+    按提交顺序流式导出做题记录，服务端游标逐批读取，内存占用与导出行数无关
+
+    不返回 total、不做 COUNT；管理员不传 user_id 时导出全部用户
+    """
+    if not current_user.is_superuser:
+        if user_id is not None and user_id != current_user.id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not enough permissions",
+            )
+        user_id = current_user.id
+
+    filters = AttemptExportFilter(
+        user_id=user_id,
+        problem_id=problem_id,
+        start=start,
+        end=end,
+    )
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    return StreamingResponse(
+        export_attempts(fmt, filters, batch_size=DEFAULT_BATCH_SIZE),
+        media_type=MEDIA_TYPES[fmt],
+        headers={
+            "Content-Disposition": (
+                f'attachment; filename="attempts-{stamp}.{fmt}"'
+            ),
+        },
+    )
@@ -1,11 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
 
-from app.core.db import get_db
+from app.core.db import DbSession, get_db, run_db
 from app.core.security import (
-    get_password_hash,
-    verify_password,
+    PasswordHashBusy,
+    get_password_hash_async,
+    verify_password_async,
     create_access_token,
 )
 from app.crud.user import (
@@ -15,11 +15,23 @@ from app.crud.user import (
 )
 from app.schemas.user import UserCreate, UserOut
 from app.schemas.token import Token  # 你需要新增这个 schema（下面给你）
+from app.core.query_budget import query_budget
 
 
 router = APIRouter()
 
 
+def _password_hash_busy() -> HTTPException:
+    """
+    哈希执行器排队已满：503 + Retry-After，让客户端稍后重试
+    """
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Server busy, please retry",
+        headers={"Retry-After": "1"},
+    )
+
+
 # =====================================================
 # 注册
 # =====================================================
@@ -29,9 +41,10 @@ router = APIRouter()
     status_code=status.HTTP_201_CREATED,
     summary="注册",
 )
-def register(
+@query_budget(4)
+async def register(
     user_in: UserCreate,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
 ):
     """
     用户注册
@@ -41,25 +54,29 @@ def register(
     """
 
     # 1) 检查用户名是否存在
-    if get_user_by_username(db, user_in.username):
+    if await run_db(db, get_user_by_username, user_in.username):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username already registered",
         )
 
     # 2) 检查邮箱是否存在
-    if get_user_by_email(db, user_in.email):
+    if await run_db(db, get_user_by_email, user_in.email):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered",
         )
 
-    # 3) 哈希密码
-    hashed_password = get_password_hash(user_in.password)
+    # 3) 哈希密码（CPU 密集，放到专用的有界执行器）
+    try:
+        hashed_password = await get_password_hash_async(user_in.password)
+    except PasswordHashBusy:
+        raise _password_hash_busy()
 
     # 4) 创建用户
-    user = create_user(
+    user = await run_db(
         db,
+        create_user,
         user_in=user_in,
         hashed_password=hashed_password,
     )
@@ -75,9 +92,10 @@ def register(
     response_model=Token,
     summary="登录（获取 JWT）",
 )
-def login(
+@query_budget(1)
+async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
 ):
     """
     用户登录，返回 JWT Access Token
@@ -88,15 +106,23 @@ def login(
     """
 
     # 1) 查用户
-    user = get_user_by_username(db, form_data.username)
+    user = await run_db(db, get_user_by_username, form_data.username)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Incorrect username or password",
         )
 
-    # 2) 校验密码
-    if not verify_password(form_data.password, user.hashed_password):
+    # 2) 校验密码（专用的有界执行器）
+    try:
+        password_ok = await verify_password_async(
+            form_data.password,
+            user.hashed_password,
+        )
+    except PasswordHashBusy:
+        raise _password_hash_busy()
+
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Incorrect username or password",
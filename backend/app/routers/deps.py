@@ -1,60 +1,92 @@
+from typing import Optional
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
 
-from app.core.db import get_db
-from app.core.security import decode_access_token
+from app.core.db import DbSession, get_db, run_db
+from app.core.security import decode_access_token_claims
 from app.crud.user import get_user_by_id
-from app.models.user import User
+from app.services.principals import Principal, principal_cache
 
 
 # OAuth2 规范的 Bearer Token 依赖
 # tokenUrl 要和登录接口一致
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
+# 不带 Authorization 头时不报错（公开接口里的可选登录）
+optional_oauth2_scheme = OAuth2PasswordBearer(
+    tokenUrl="/auth/login",
+    auto_error=False,
+)
+
 
-def get_current_user(
+async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db),
-) -> User:
+    db: DbSession = Depends(get_db),
+) -> Principal:
     """
     获取当前登录用户（通用依赖）
 
     使用方式：
-        current_user: User = Depends(get_current_user)
+        current_user: Principal = Depends(get_current_user)
+
+    命中 principal_cache 时不访问数据库
     """
 
-    # 1️⃣ 解码 JWT
-    user_id = decode_access_token(token)
-    if not user_id:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authentication credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+    # 1️⃣ 解码 JWT（可选：按 token 缓存校验结果）
+    user_id = principal_cache.get_user_id(token)
+    if user_id is None:
+        claims = decode_access_token_claims(token)
+        if not claims or not claims.get("sub"):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid authentication credentials",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        user_id = int(claims["sub"])
+        # 没有 exp 的 token 不按 token 缓存（不知道什么时候该失效）
+        expires_at = claims.get("exp")
+        if principal_cache.by_token and expires_at is not None:
+            principal_cache.put_token(token, user_id, float(expires_at))
 
-    # 2️⃣ 查询用户
-    user = get_user_by_id(db, int(user_id))
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+    # 2️⃣ 查询用户（优先读缓存）
+    principal, generation = principal_cache.get(user_id)
+    if principal is None:
+        user = await run_db(db, get_user_by_id, user_id)
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User not found",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        principal = Principal.from_user(user)
+        principal_cache.put(principal, generation=generation)
 
     # 3️⃣ 检查用户状态
-    if not user.is_active:
+    if not principal.is_active:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Inactive user",
         )
 
-    return user
+    return principal
+
+
+async def get_optional_user(
+    token: Optional[str] = Depends(optional_oauth2_scheme),
+    db: DbSession = Depends(get_db),
+) -> Optional[Principal]:
+    """
+    可选登录：没带 token 时返回 None；带了就按 get_current_user 校验（无效仍然 401）
+    """
+    if token is None:
+        return None
+    return await get_current_user(token=token, db=db)
 
 
-def get_current_superuser(
-    current_user: User = Depends(get_current_user),
-) -> User:
+async def get_current_superuser(
+    current_user: Principal = Depends(get_current_user),
+) -> Principal:
     """
     获取当前管理员用户（管理员接口用）
     """
@@ -0,0 +1,104 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.core.db import engine
+from app.core.metrics import metrics
+from app.core.query_budget import query_budget
+from app.core.security import password_hash_pool
+from app.services.catalog import problem_catalog
+from app.services.ingest import attempt_writer
+from app.services.principals import principal_cache
+
+
+router = APIRouter()
+
+
+# =====================================================
+# Collectors（进程内缓存 / 执行器 / 连接池的现值）
+# =====================================================
+
+def _cache_samples():
+    for cache, stats in (
+        ("problem_catalog", problem_catalog.stats()),
+        ("principal", principal_cache.stats()),
+    ):
+        for result in ("hits", "misses"):
+            yield {"cache": cache, "result": result}, stats[result]
+
+
+def _cache_sizes():
+    yield {"cache": "problem_catalog"}, problem_catalog.stats()["size"]
+    yield {"cache": "principal"}, principal_cache.stats()["size"]
+
+
+def _password_hash_samples():
+    stats = password_hash_pool.stats()
+    yield {"state": "pending"}, stats["pending"]
+    yield {"state": "rejected"}, stats["rejected"]
+
+
+def _attempt_writer_samples():
+    stats = attempt_writer.stats()
+    for state in (
+        "pending", "flushed", "failures", "rejected", "replayed",
+        "dead_lettered",
+    ):
+        yield {"state": state}, stats[state]
+
+
+def _pool_checked_out():
+    checked_out = getattr(engine.pool, "checkedout", None)
+    if checked_out is not None:
+        yield {}, checked_out()
+
+
+metrics.register_collector(
+    "app_cache_lookups_total",
+    "In-process cache lookups by result",
+    "counter",
+    _cache_samples,
+)
+metrics.register_collector(
+    "app_cache_entries",
+    "Entries currently held by in-process caches",
+    "gauge",
+    _cache_sizes,
+)
+metrics.register_collector(
+    "app_password_hash_jobs",
+    "Password hash executor pending jobs and total rejections",
+    "gauge",
+    _password_hash_samples,
+)
+metrics.register_collector(
+    "app_attempt_writer_attempts",
+    "Write-behind attempt writer: pending now, totals since start",
+    "gauge",
+    _attempt_writer_samples,
+)
+metrics.register_collector(
+    "app_db_pool_checked_out",
+    "Connections currently checked out of the sync engine pool",
+    "gauge",
+    _pool_checked_out,
+)
+
+
+# =====================================================
+# Endpoint
+# =====================================================
+
+@router.get(
+    "/metrics",
+    response_class=PlainTextResponse,
+    include_in_schema=False,
+)
+@query_budget(0)
+async def read_metrics():
+    """
+    Prometheus 文本格式指标
+    """
+    return PlainTextResponse(
+        metrics.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
@@ -1,22 +1,105 @@
-from typing import Optional
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List, Literal, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy.orm import Session
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    Header,
+    HTTPException,
+    Query,
+    Response,
+    UploadFile,
+    status,
+)
+from starlette.concurrency import run_in_threadpool
 
-from app.core.db import get_db
+from app.core.config import settings
+from app.core.db import DbSession, get_db, run_db
+from app.core.etag import (
+    PROCESS_EPOCH,
+    etag_matches,
+    not_modified,
+    short_digest,
+)
+from app.core.pagination import decode_cursor, next_cursor
+from app.core.serialization import FastJSONResponse, field_extractor
 from app.schemas.problem import (
     ProblemCreate,
+    ProblemImportOut,
     ProblemOut,
     ProblemListOut,
+    ProblemRecommendationOut,
+    ProblemRollupOut,
+    ProblemSearchOut,
     ProblemUpdate,
 )
 from app.crud import problem as crud_problem
-from app.routers.deps import get_current_user, get_current_superuser
-from app.models.user import User
+from app.services.bitmaps import UserProblemBits, user_bitmaps
+from app.services.catalog import problem_catalog
+from app.services.problem_import import (
+    DEFAULT_CHUNK_SIZE,
+    ImportFormat,
+    ProblemImporter,
+    detect_format,
+    iter_records,
+    take_chunk,
+)
+from app.services.recommend import difficulty_pools, recommend_next_problem
+from app.services.rollups import as_utc, get_problem_rollups
+from app.services.search import SearchUnavailable, search_problems
+from app.routers.deps import (
+    get_current_superuser,
+    get_current_user,
+    get_optional_user,
+)
+from app.services.principals import Principal
+from app.core.query_budget import query_budget
 
 
 router = APIRouter()
 
+_problem_out = field_extractor(ProblemOut)
+
+
+# =====================================================
+# ETag
+# - 详情：内容摘要（加载快照时算好）+ 统计计数，跨进程一致
+# - 列表：进程 epoch + 题库版本（create/update/提交都会递增）+ 查询参数
+#   另按 CATALOG_TTL 分桶，其它进程的改动最多延迟一个 TTL 反映到 ETag；
+#   登录时再带上用户 ID 和做题位图摘要（响应里有 attempted / solved 标记）
+# =====================================================
+
+def _problem_etag(problem) -> str:
+    return (
+        f'"p{problem.id}-{problem.digest}-'
+        f'{problem.submit_count}-{problem.correct_count}"'
+    )
+
+
+def _list_items(items, bits: Optional[UserProblemBits]) -> list:
+    """
+    列表项 dict + 当前用户的做题标记（标记取自位图缓存，不查 attempts）
+    """
+    rows = []
+    for item in items:
+        row = _problem_out(item)
+        if bits is None:
+            row["attempted"] = row["solved"] = None
+        else:
+            row["attempted"], row["solved"] = bits.flags(item.id)
+        rows.append(row)
+    return rows
+
+
+def _problem_list_etag(*params) -> str:
+    ttl_bucket = int(time.time() // settings.CATALOG_TTL)
+    return (
+        f'"l{PROCESS_EPOCH}-{problem_catalog.version}-{ttl_bucket}-'
+        f'{short_digest(params)}"'
+    )
+
 
 # =====================================================
 # Public APIs（不需要登录）
@@ -27,49 +110,219 @@ router = APIRouter()
     response_model=ProblemListOut,
     summary="获取题目列表",
 )
-def read_problem_list(
+@query_budget(5)
+async def read_problem_list(
     *,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
     difficulty: Optional[int] = Query(None, ge=1, le=5),
     problem_type: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(
+        None,
+        description="上一页返回的 next_cursor；传入后忽略 skip",
+    ),
+    include_total: bool = Query(
+        True,
+        description="是否返回 total；翻页时可传 false 省掉 COUNT",
+    ),
+    if_none_match: Optional[str] = Header(None),
+    current_user: Optional[Principal] = Depends(get_optional_user),
 ):
     """
     题目列表（分页 + 筛选）
+
+    - 默认 skip/limit 分页
+    - 传 cursor 时按 id 做 keyset 分页，翻页深度不影响耗时
+    - 带 If-None-Match 且题库没有变化时直接 304，不查库
+    - 登录时每道题带 attempted / solved 标记（读用户做题位图，有进程内缓存）
     """
-    total, items = crud_problem.get_problem_list(
-        db=db,
+    try:
+        after_id = (
+            decode_cursor("problem", cursor) if cursor is not None else None
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+
+    bits = None
+    if current_user is not None:
+        bits = user_bitmaps.peek(current_user.id)
+        if bits is None:
+            bits = await run_db(db, user_bitmaps.get, current_user.id)
+
+    # 先取版本再查库：查询期间发生的变化只会让下次 ETag 不同，不会漏掉
+    etag = _problem_list_etag(
+        skip if after_id is None else None,
+        limit,
+        difficulty,
+        problem_type,
+        after_id,
+        include_total,
+        current_user.id if current_user else None,
+        bits.digest if bits else None,
+    )
+    if etag_matches(if_none_match, etag):
+        not_modified_response = not_modified(etag)
+        not_modified_response.headers["Vary"] = "Authorization"
+        return not_modified_response
+
+    total, items = await run_db(
+        db,
+        crud_problem.get_problem_list,
         skip=skip,
         limit=limit,
         difficulty=difficulty,
         problem_type=problem_type,
         is_active=True,
+        after_id=after_id,
+        include_total=include_total,
     )
 
+    cursor_out = next_cursor("problem", items, limit)
+
+    if settings.FAST_JSON:
+        return FastJSONResponse(
+            {
+                "total": total,
+                "items": _list_items(items, bits),
+                "next_cursor": cursor_out,
+            },
+            headers={"ETag": etag, "Vary": "Authorization"},
+        )
+
+    response.headers["ETag"] = etag
+    response.headers["Vary"] = "Authorization"
     return {
         "total": total,
+        "items": items if bits is None else _list_items(items, bits),
+        "next_cursor": cursor_out,
+    }
+
+
+# 必须声明在 /{problem_id} 之前，否则 "search" 会被当成题目 ID
+@router.get(
+    "/search",
+    response_model=ProblemSearchOut,
+    summary="全文搜索题目",
+)
+@query_budget(1)
+async def search_problem_list(
+    *,
+    db: DbSession = Depends(get_db),
+    q: str = Query(..., min_length=1, max_length=200, description="搜索词"),
+    difficulty: Optional[int] = Query(None, ge=1, le=5),
+    problem_type: Optional[str] = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=1000),
+):
+    """
+    按标题和题干全文搜索（标题命中排在前面）
+
+    - 中文按连续字短语匹配；最后一个英文词 / 数字按前缀匹配
+    - LaTeX 命令按命令名匹配（如搜 frac 能找到 \\frac{1}{2}）
+    """
+    try:
+        items, has_more = await run_db(
+            db,
+            search_problems,
+            query=q,
+            difficulty=difficulty,
+            problem_type=problem_type,
+            limit=limit,
+            offset=offset,
+        )
+    except SearchUnavailable as e:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail=str(e),
+        )
+
+    return {
         "items": items,
+        "next_offset": offset + limit if has_more else None,
     }
 
 
+# 同样必须声明在 /{problem_id} 之前
+@router.get(
+    "/next",
+    response_model=ProblemRecommendationOut,
+    summary="推荐下一题",
+)
+@query_budget(5)
+async def read_next_problem(
+    *,
+    db: DbSession = Depends(get_db),
+    difficulty: Optional[int] = Query(
+        None,
+        ge=1,
+        le=5,
+        description="指定难度；不传时按做题情况估计",
+    ),
+    problem_type: Optional[str] = Query(None),
+    exclude: List[int] = Query(
+        [],
+        max_length=50,
+        description="本次不要推荐的题目（如刚跳过的）",
+    ),
+    current_user: Principal = Depends(get_current_user),
+):
+    """
+    从目标难度（没有可做的题时向相邻难度扩展）里随机挑一道没做对过的启用题目
+
+    已做对集合和按难度分组的题目 ID 都在进程内缓存，缓存命中时只查一次
+    用户的难度拆分统计，耗时与做题记录条数无关；全部做完时返回 404
+    """
+    # 池子可能来自其它进程改动之前（TTL 内）：挑到已停用的题目时重建一次再挑
+    for _ in range(2):
+        level, problem_id = await run_db(
+            db,
+            recommend_next_problem,
+            user_id=current_user.id,
+            difficulty=difficulty,
+            problem_type=problem_type,
+            exclude=exclude,
+        )
+        if problem_id is None:
+            break
+        problem = problem_catalog.peek(problem_id)
+        if problem is None:
+            problem = await run_db(db, problem_catalog.get, problem_id)
+        if problem is not None and problem.is_active:
+            return {"target_difficulty": level, "problem": problem}
+        difficulty_pools.invalidate()
+
+    raise HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="No unsolved problem available",
+    )
+
+
 @router.get(
     "/{problem_id}",
     response_model=ProblemOut,
     summary="获取单个题目",
 )
-def read_problem(
+@query_budget(1)
+async def read_problem(
     *,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
+    response: Response,
     problem_id: int,
+    if_none_match: Optional[str] = Header(None),
 ):
     """
-    获取单个题目详情
+    获取单个题目详情（优先读题库缓存）
+
+    带 If-None-Match 且题目未变时返回 304（缓存命中时不查库、不序列化）
     """
-    problem = crud_problem.get_problem_by_id(
-        db=db,
-        problem_id=problem_id,
-    )
+    problem = problem_catalog.peek(problem_id)
+    if problem is None:
+        problem = await run_db(db, problem_catalog.get, problem_id)
 
     if not problem or not problem.is_active:
         raise HTTPException(
@@ -77,6 +330,11 @@ def read_problem(
             detail="Problem not found",
         )
 
+    etag = _problem_etag(problem)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    response.headers["ETag"] = etag
     return problem
 
 
@@ -90,17 +348,19 @@ def read_problem(
     status_code=status.HTTP_201_CREATED,
     summary="创建题目（管理员）",
 )
-def create_problem(
+@query_budget(5)
+async def create_problem(
     *,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
     problem_in: ProblemCreate,
-    current_user: User = Depends(get_current_superuser),
+    current_user: Principal = Depends(get_current_superuser),
 ):
     """
     创建题目（仅管理员）
     """
-    problem = crud_problem.create_problem(
-        db=db,
+    problem = await run_db(
+        db,
+        crud_problem.create_problem,
         problem_in=problem_in,
         created_by_id=current_user.id,
     )
@@ -108,23 +368,80 @@ def create_problem(
     return problem
 
 
+# 语句条数随文件大小增长（每块一条 INSERT + 一次提交），不设 @query_budget
+@router.post(
+    "/import",
+    response_model=ProblemImportOut,
+    summary="批量导入题目（管理员）",
+)
+async def import_problems(
+    *,
+    db: DbSession = Depends(get_db),
+    file: UploadFile = File(..., description="JSONL（每行一个题目）或 CSV（表头为字段名）"),
+    fmt: Optional[ImportFormat] = Query(
+        None,
+        alias="format",
+        description="文件格式，默认按扩展名判断",
+    ),
+    chunk_size: int = Query(DEFAULT_CHUNK_SIZE, ge=1, le=10000),
+    dry_run: bool = Query(False, description="只校验，不写库"),
+    current_user: Principal = Depends(get_current_superuser),
+):
+    """
+    流式导入题目：按块解析 + ProblemCreate 校验 + 批量 INSERT，每块一个事务
+
+    上传文件由 Starlette 落到临时文件，内存占用与文件大小无关；
+    某一行出错只记入 errors，不影响其它行（已提交的块不会回滚）
+    """
+    fmt = fmt or detect_format(file.filename)
+    if fmt is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Unknown file format, pass format=jsonl or format=csv",
+        )
+
+    importer = ProblemImporter(
+        created_by_id=current_user.id,
+        dry_run=dry_run,
+    )
+    records = iter_records(file.file, fmt)
+    try:
+        while True:
+            chunk = await run_in_threadpool(take_chunk, records, chunk_size)
+            if not chunk:
+                break
+            await run_db(db, importer.import_chunk, chunk)
+    except UnicodeDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=(
+                "File must be UTF-8 encoded "
+                f"({importer.report.inserted} rows imported before the error)"
+            ),
+        )
+
+    return importer.report.as_dict()
+
+
 @router.patch(
     "/{problem_id}",
     response_model=ProblemOut,
     summary="更新题目（管理员）",
 )
-def update_problem(
+@query_budget(6)
+async def update_problem(
     *,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
     problem_id: int,
     problem_in: ProblemUpdate,
-    current_user: User = Depends(get_current_superuser),
+    current_user: Principal = Depends(get_current_superuser),
 ):
     """
     更新题目（仅管理员）
     """
-    problem = crud_problem.get_problem_by_id(
-        db=db,
+    problem = await run_db(
+        db,
+        crud_problem.get_problem_by_id,
         problem_id=problem_id,
     )
 
@@ -134,10 +451,87 @@ def update_problem(
             detail="Problem not found",
         )
 
-    problem = crud_problem.update_problem(
-        db=db,
+    problem = await run_db(
+        db,
+        crud_problem.update_problem,
         problem=problem,
         problem_in=problem_in,
     )
 
     return problem
+
+
+@router.get(
+    "/catalog/stats",
+    summary="题库缓存统计（管理员）",
+)
+@query_budget(1)
+async def read_catalog_stats(
+    current_user: Principal = Depends(get_current_superuser),
+):
+    """
+    题库缓存命中 / 未命中 / 淘汰次数
+    """
+    return problem_catalog.stats()
+
+
+# 不传 start 时默认查询的时长
+_ROLLUP_DEFAULT_SPAN = {
+    "hour": timedelta(hours=48),
+    "day": timedelta(days=30),
+}
+
+
+@router.get(
+    "/{problem_id}/rollups",
+    response_model=ProblemRollupOut,
+    summary="题目分桶统计（管理员）",
+)
+@query_budget(2)
+async def read_problem_rollups(
+    *,
+    db: DbSession = Depends(get_db),
+    problem_id: int,
+    granularity: Literal["hour", "day"] = Query("day"),
+    start: Optional[datetime] = Query(
+        None,
+        description="起始时间（含，向下对齐到桶起点；默认 end 之前 48 小时 / 30 天）",
+    ),
+    end: Optional[datetime] = Query(None, description="结束时间（不含，默认现在）"),
+    current_user: Principal = Depends(get_current_superuser),
+):
+    """
+    按小时 / 天统计某道题的提交数、正确率、耗时（只读分桶汇总表，不扫做题记录）
+
+    小时粒度只保留最近 ROLLUP_HOURLY_RETENTION_DAYS 天
+    """
+    end = as_utc(end) if end else datetime.now(timezone.utc)
+    start = start or end - _ROLLUP_DEFAULT_SPAN[granularity]
+
+    try:
+        buckets = await run_db(
+            db,
+            get_problem_rollups,
+            problem_id=problem_id,
+            granularity=granularity,
+            start=start,
+            end=end,
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+
+    submits = sum(bucket["submit_count"] for bucket in buckets)
+    correct = sum(bucket["correct_count"] for bucket in buckets)
+    return {
+        "problem_id": problem_id,
+        "granularity": granularity,
+        "start": buckets[0]["bucket_start"] if buckets else start,
+        "end": end,
+        "submit_count": submits,
+        "correct_count": correct,
+        "accuracy": round(correct / submits, 4) if submits else 0.0,
+        "buckets": buckets,
+    }
@@ -1,8 +1,14 @@
+from datetime import datetime, timezone
+
 from fastapi import APIRouter, Depends
 
+from app.core.db import DbSession, get_db, run_db
+from app.schemas.stats import UserStatsOut
 from app.schemas.user import UserOut
-from app.models.user import User
-from app.routers.deps import get_current_user
+from app.services.stats import get_user_stats
+from app.services.principals import Principal, principal_cache
+from app.routers.deps import get_current_superuser, get_current_user
+from app.core.query_budget import query_budget
 
 
 router = APIRouter()
@@ -12,8 +18,9 @@ router = APIRouter()
     "/me",
     response_model=UserOut,
 )
-def read_current_user(
-    current_user: User = Depends(get_current_user),
+@query_budget(1)
+async def read_current_user(
+    current_user: Principal = Depends(get_current_user),
 ):
     """
     获取当前登录用户信息
@@ -22,3 +29,40 @@ def read_current_user(
         Authorization: Bearer <access_token>
     """
     return current_user
+
+
+@router.get(
+    "/me/stats",
+    response_model=UserStatsOut,
+    summary="当前用户学习统计",
+)
+@query_budget(3)
+async def read_current_user_stats(
+    db: DbSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """
+    正确率、做对题数、连续做题天数，以及按难度 / 类型拆分的正确率
+
+    读的是提交时增量维护的 user_stats，不扫做题记录
+    """
+    return await run_db(
+        db,
+        get_user_stats,
+        user_id=current_user.id,
+        today=datetime.now(timezone.utc).date(),
+    )
+
+
+@router.get(
+    "/principal-cache/stats",
+    summary="当前用户缓存统计（管理员）",
+)
+@query_budget(1)
+async def read_principal_cache_stats(
+    current_user: Principal = Depends(get_current_superuser),
+):
+    """
+    get_current_user 缓存的命中 / 未命中 / 失效次数
+    """
+    return principal_cache.stats()
@@ -31,6 +31,22 @@ class AttemptCreate(AttemptBase):
     pass
 
 
+# =====================================================
+# Batch Create（批量提交）
+# =====================================================
+
+class AttemptBatchCreate(BaseModel):
+    """
+    批量提交答案（一次会话结束时统一提交）
+    """
+    items: List[AttemptCreate] = Field(
+        ...,
+        min_length=1,
+        max_length=100,
+        description="待提交的答案列表"
+    )
+
+
 # =====================================================
 # Read / Response
 # =====================================================
@@ -39,7 +55,10 @@ class AttemptOut(BaseModel):
     """
     返回给前端的做题记录
     """
-    id: int
+    id: Optional[int] = Field(
+        None,
+        description="记录 ID（write-behind 模式下提交时尚未落库，为 null）"
+    )
     problem_id: int
     user_answer: str
     is_correct: bool
@@ -74,5 +93,39 @@ class AttemptListOut(BaseModel):
     """
     做题记录列表
     """
-    total: int
+    total: Optional[int] = Field(
+        None,
+        description="总数（include_total=false 时为 null）"
+    )
     items: List[AttemptOut]
+    next_cursor: Optional[str] = Field(
+        None,
+        description="下一页游标（传给 cursor 参数；为空表示没有更多）"
+    )
+
+
+# =====================================================
+# Batch Response
+# =====================================================
+
+class AttemptBatchItemOut(BaseModel):
+    """
+    批量提交中单条答案的结果（与请求 items 一一对应）
+    """
+    index: int = Field(..., description="在请求 items 中的下标")
+    problem_id: int
+    attempt: Optional[AttemptOut] = Field(
+        None,
+        description="成功时返回做题记录"
+    )
+    error: Optional[str] = Field(
+        None,
+        description="失败原因（如题目不存在）"
+    )
+
+
+class AttemptBatchOut(BaseModel):
+    """
+    批量提交结果
+    """
+    items: List[AttemptBatchItemOut]
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional, Dict, List
+from typing import Literal, Optional, Dict, List
 
 from pydantic import BaseModel, Field
 
@@ -17,7 +17,7 @@ class ProblemBase(BaseModel):
 
     problem_type: str = Field(
         ...,
-        description="题目类型：single / multiple / numeric / text"
+        description="题目类型：single / multiple / numeric / text / expression"
     )
 
     difficulty: int = Field(
@@ -87,9 +87,134 @@ class ProblemOut(ProblemBase):
 # List Response
 # =====================================================
 
+class ProblemListItemOut(ProblemOut):
+    """
+    列表里的题目（带当前用户的做题标记）
+    """
+    attempted: Optional[bool] = Field(
+        None,
+        description="当前用户是否做过（未登录时为 null）"
+    )
+    solved: Optional[bool] = Field(
+        None,
+        description="当前用户是否做对过（未登录时为 null）"
+    )
+
+
 class ProblemListOut(BaseModel):
     """
     题目列表响应（分页用）
     """
-    total: int
-    items: List[ProblemOut]
+    total: Optional[int] = Field(
+        None,
+        description="总数（include_total=false 时为 null）"
+    )
+    items: List[ProblemListItemOut]
+    next_cursor: Optional[str] = Field(
+        None,
+        description="下一页游标（传给 cursor 参数；为空表示没有更多）"
+    )
+
+
+# =====================================================
+# Stats Rollups（分桶统计，管理员看板）
+# =====================================================
+
+class ProblemRollupBucket(BaseModel):
+    """
+    一个时间桶内的提交统计
+    """
+    bucket_start: datetime = Field(..., description="桶起点（UTC）")
+    submit_count: int
+    correct_count: int
+    accuracy: float = Field(..., description="正确率（0~1）")
+    time_spent_total: int = Field(..., description="做题耗时之和（秒）")
+    avg_time_spent: Optional[float] = Field(
+        None,
+        description="平均耗时（秒，只算带耗时的提交；没有时为 null）"
+    )
+
+
+class ProblemRollupOut(BaseModel):
+    """
+    题目在一段时间内的分桶统计
+    """
+    problem_id: int
+    granularity: Literal["hour", "day"]
+    start: datetime
+    end: datetime
+    submit_count: int = Field(..., description="范围内提交次数")
+    correct_count: int = Field(..., description="范围内正确次数")
+    accuracy: float = Field(..., description="范围内正确率（0~1）")
+    buckets: List[ProblemRollupBucket]
+
+
+# =====================================================
+# Bulk Import（批量导入报告）
+# =====================================================
+
+class ProblemImportError(BaseModel):
+    """
+    导入失败的一行
+    """
+    row: int = Field(..., description="文件中的行号（CSV 为该条记录结束的行）")
+    error: str
+
+
+class ProblemImportOut(BaseModel):
+    """
+    批量导入结果
+    """
+    total: int = Field(..., description="读到的记录数")
+    inserted: int = Field(..., description="成功写入的条数（dry_run 时为校验通过的条数）")
+    failed: int = Field(..., description="失败条数")
+    errors: List[ProblemImportError] = Field(
+        default_factory=list,
+        description="失败明细（最多 1000 条）"
+    )
+    errors_truncated: bool = Field(
+        False,
+        description="失败明细是否被截断"
+    )
+
+
+# =====================================================
+# Search
+# =====================================================
+
+class ProblemSearchHit(BaseModel):
+    """
+    搜索命中（title / snippet 为已转义的 HTML，命中词用 <mark></mark> 包裹）
+    """
+    id: int
+    title: str
+    problem_type: str
+    difficulty: int
+    snippet: str = Field(..., description="正文中命中位置附近的片段")
+    score: float = Field(
+        ...,
+        description="相关度（bm25 取负，越大越相关；常见词的值可能非常小）",
+    )
+
+
+class ProblemSearchOut(BaseModel):
+    """
+    搜索结果（按相关度降序）
+    """
+    items: List[ProblemSearchHit]
+    next_offset: Optional[int] = Field(
+        None,
+        description="下一页的 offset；没有更多结果时为 null"
+    )
+
+
+# =====================================================
+# Recommendation
+# =====================================================
+
+class ProblemRecommendationOut(BaseModel):
+    """
+    推荐的下一题
+    """
+    target_difficulty: int = Field(..., description="按做题情况估计的目标难度")
+    problem: ProblemOut
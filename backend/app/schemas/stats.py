@@ -0,0 +1,49 @@
+from datetime import date
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+
+# =====================================================
+# Accuracy Breakdown
+# =====================================================
+
+class AccuracyBucket(BaseModel):
+    """
+    某个难度等级 / 题目类型下的正确率
+    """
+    key: str = Field(..., description="难度等级或题目类型")
+    total: int = Field(..., description="提交次数")
+    correct: int = Field(..., description="正确次数")
+    accuracy: float = Field(..., description="正确率（0~1）")
+
+
+# =====================================================
+# User Stats
+# =====================================================
+
+class UserStatsOut(BaseModel):
+    """
+    当前用户的学习统计
+    """
+    total_attempts: int = Field(..., description="提交次数")
+    correct_attempts: int = Field(..., description="正确次数")
+    accuracy: float = Field(..., description="总正确率（0~1）")
+    solved_count: int = Field(..., description="做对过的不同题目数")
+    current_streak: int = Field(
+        ...,
+        description="当前连续做题天数（按 UTC 日期，昨天和今天都没做题时为 0）"
+    )
+    longest_streak: int = Field(..., description="历史最长连续做题天数")
+    last_active_date: Optional[date] = Field(
+        None,
+        description="最近一次做题的日期（UTC）"
+    )
+    by_difficulty: List[AccuracyBucket] = Field(
+        default_factory=list,
+        description="按难度拆分"
+    )
+    by_type: List[AccuracyBucket] = Field(
+        default_factory=list,
+        description="按题目类型拆分"
+    )
@@ -0,0 +1,169 @@
+import csv
+import io
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Iterator, Literal, Optional
+
+import orjson
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.db import SessionLocal
+from app.models.attempt import Attempt
+
+
+ExportFormat = Literal["ndjson", "csv"]
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+EXPORT_COLUMNS = (
+    "id",
+    "user_id",
+    "problem_id",
+    "user_answer",
+    "is_correct",
+    "time_spent",
+    "created_at",
+)
+
+# 服务端游标每次取的行数（也是每次写出的块大小）
+DEFAULT_BATCH_SIZE = 1000
+
+
+def _as_naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # created_at 按无时区 UTC 存；SQLite 绑定带时区的值时只丢掉时区、不换算，
+    # 所以先换算成 UTC 再去掉时区（无时区的值按 UTC 处理）
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+@dataclass(frozen=True)
+class AttemptExportFilter:
+    """
+    导出范围；created_at 为 [start, end)（带时区的时间先换算成 UTC）
+    """
+    user_id: Optional[int] = None
+    problem_id: Optional[int] = None
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "start", _as_naive_utc(self.start))
+        object.__setattr__(self, "end", _as_naive_utc(self.end))
+
+
+# =====================================================
+# Query（服务端游标，流式读取）
+# =====================================================
+
+_attempts = Attempt.__table__
+
+
+def _export_stmt(filters: AttemptExportFilter):
+    stmt = select(*(_attempts.c[name] for name in EXPORT_COLUMNS))
+    if filters.user_id is not None:
+        stmt = stmt.where(_attempts.c.user_id == filters.user_id)
+    if filters.problem_id is not None:
+        stmt = stmt.where(_attempts.c.problem_id == filters.problem_id)
+    if filters.start is not None:
+        stmt = stmt.where(_attempts.c.created_at >= filters.start)
+    if filters.end is not None:
+        stmt = stmt.where(_attempts.c.created_at < filters.end)
+    # 按用户筛选时按 (created_at, id) 排序，由 ix_attempts_user_created 兜住；
+    # 其它情况按 id（与写入顺序一致，按题目筛选时由 problem_id 单列索引兜住）
+    if filters.user_id is not None:
+        return stmt.order_by(_attempts.c.created_at, _attempts.c.id)
+    return stmt.order_by(_attempts.c.id)
+
+
+def iter_attempt_batches(
+    db: Session,
+    filters: AttemptExportFilter,
+    *,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Iterator[list]:
+    """
+    每次产出 batch_size 行（Row 元组），内存只占一批
+    """
+    result = db.execute(
+        _export_stmt(filters).execution_options(
+            stream_results=True,
+            yield_per=batch_size,
+        )
+    )
+    try:
+        for partition in result.partitions():
+            yield partition
+    finally:
+        result.close()
+
+
+# =====================================================
+# Encoding
+# =====================================================
+
+def _encode_ndjson(batch: list) -> bytes:
+    return b"".join(
+        orjson.dumps(dict(zip(EXPORT_COLUMNS, row)), option=orjson.OPT_UTC_Z)
+        + b"\n"
+        for row in batch
+    )
+
+
+class _CSVEncoder:
+    def __init__(self) -> None:
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer, lineterminator="\n")
+
+    def header(self) -> bytes:
+        return self._encode([EXPORT_COLUMNS])
+
+    def __call__(self, batch: list) -> bytes:
+        return self._encode(
+            [
+                (
+                    row.id,
+                    row.user_id,
+                    row.problem_id,
+                    row.user_answer,
+                    int(row.is_correct),
+                    "" if row.time_spent is None else row.time_spent,
+                    row.created_at.isoformat(),
+                )
+                for row in batch
+            ]
+        )
+
+    def _encode(self, rows) -> bytes:
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        self._writer.writerows(rows)
+        return self._buffer.getvalue().encode("utf-8")
+
+
+def export_attempts(
+    fmt: ExportFormat,
+    filters: AttemptExportFilter,
+    *,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    session_factory: Callable[[], Session] = SessionLocal,
+) -> Iterator[bytes]:
+    """
+    逐批产出编码好的字节块（NDJSON：每行一个对象；CSV：首块为表头）
+
+    自己开 Session：StreamingResponse 在路由函数返回之后才开始迭代，
+    请求依赖里的 Session 那时已经关闭
+    """
+    if fmt == "ndjson":
+        encode = _encode_ndjson
+    else:
+        encode = _CSVEncoder()
+        yield encode.header()
+
+    with session_factory() as db:
+        for batch in iter_attempt_batches(db, filters, batch_size=batch_size):
+            yield encode(batch)
@@ -0,0 +1,277 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import bindparam, delete, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.db import upsert_insert
+from app.core.etag import short_digest
+from app.core.generations import KeyedGenerations
+from app.models.attempt import Attempt
+from app.models.user_problem_bitmap import UserProblemBitmap
+
+
+# 每个字的位数（不用符号位）
+WORD_BITS = 63
+
+
+def _locate(problem_id: int) -> Tuple[int, int]:
+    word, bit = divmod(problem_id, WORD_BITS)
+    return word, 1 << bit
+
+
+# =====================================================
+# Bitmap Deltas
+# =====================================================
+
+class ProblemBitmapDeltas:
+    """
+    按 (用户, 字) 合并的待置位
+
+    一批提交里同一个字只发一行；最终一条 executemany upsert 写入
+    """
+
+    __slots__ = ("_words",)
+
+    def __init__(self) -> None:
+        self._words: Dict[Tuple[int, int], List[int]] = {}
+
+    def add(self, user_id: int, problem_id: int, *, is_correct: bool) -> None:
+        word, mask = _locate(problem_id)
+        bits = self._words.get((user_id, word))
+        if bits is None:
+            bits = self._words[(user_id, word)] = [0, 0]
+        bits[0] |= mask
+        if is_correct:
+            bits[1] |= mask
+
+    def __len__(self) -> int:
+        return len(self._words)
+
+    def __bool__(self) -> bool:
+        return bool(self._words)
+
+
+# =====================================================
+# Apply（提交路径，不提交事务）
+# =====================================================
+
+_bitmaps = UserProblemBitmap.__table__
+
+
+@lru_cache(maxsize=None)
+def _upsert_stmt(dialect: str):
+    stmt = upsert_insert(dialect)(_bitmaps).values(
+        user_id=bindparam("user_id"),
+        word=bindparam("word"),
+        attempted_bits=bindparam("attempted"),
+        solved_bits=bindparam("solved"),
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=["user_id", "word"],
+        set_={
+            name: _bitmaps.c[name].bitwise_or(stmt.excluded[name])
+            for name in ("attempted_bits", "solved_bits")
+        },
+    )
+
+
+def apply_problem_bitmaps(db: Session, *, deltas: ProblemBitmapDeltas) -> None:
+    """
+    把待置位写入数据库（按位或，不提交，由调用方和 Attempt 放在同一事务）
+    """
+    if not deltas:
+        return
+
+    params = [
+        {
+            "user_id": user_id,
+            "word": word,
+            "attempted": attempted,
+            "solved": solved,
+        }
+        for (user_id, word), (attempted, solved) in deltas._words.items()
+    ]
+    db.execute(_upsert_stmt(db.get_bind().dialect.name), params)
+
+
+# =====================================================
+# User Bitmaps Cache
+# =====================================================
+
+class UserProblemBits:
+    """
+    一个用户的位图快照（只读；更新时整体替换，读者不需要加锁）
+    """
+
+    __slots__ = ("attempted", "solved", "_digest")
+
+    def __init__(
+        self,
+        attempted: Dict[int, int],
+        solved: Dict[int, int],
+    ) -> None:
+        self.attempted = attempted
+        self.solved = solved
+        self._digest: Optional[str] = None
+
+    def flags(self, problem_id: int) -> Tuple[bool, bool]:
+        """
+        (attempted, solved)
+        """
+        word, mask = _locate(problem_id)
+        return (
+            bool(self.attempted.get(word, 0) & mask),
+            bool(self.solved.get(word, 0) & mask),
+        )
+
+    @property
+    def digest(self) -> str:
+        """
+        位图内容摘要（列表 ETag 用；内容相同则摘要相同，跨进程一致）
+        """
+        if self._digest is None:
+            self._digest = short_digest(
+                (sorted(self.attempted.items()), sorted(self.solved.items()))
+            )
+        return self._digest
+
+    def merged(self, words: Iterable[Tuple[int, int, int]]) -> "UserProblemBits":
+        attempted = dict(self.attempted)
+        solved = dict(self.solved)
+        for word, attempted_bits, solved_bits in words:
+            attempted[word] = attempted.get(word, 0) | attempted_bits
+            if solved_bits:
+                solved[word] = solved.get(word, 0) | solved_bits
+        return UserProblemBits(attempted, solved)
+
+
+class UserBitmaps:
+    """
+    用户位图的 LRU 缓存（进程内）
+
+    - 未命中时按主键范围读一次（行数 = 用到的字数，约为做过的题目 ID 跨度 / 63）
+    - 提交答案提交事务后直接合并进已缓存的位图
+    - TTL 兜底其它 worker 的提交
+
+    按用户记 generation，防止「提交之前开始的加载」把旧位图写回缓存；
+    别的用户提交不影响这个用户正在进行的加载
+    """
+
+    def __init__(self, *, ttl: float, max_users: int) -> None:
+        self._ttl = ttl
+        self._max_users = max_users
+        self._lock = threading.Lock()
+        self._generations = KeyedGenerations(max_keys=max_users)
+        self._users: "OrderedDict[int, Tuple[float, UserProblemBits]]" = (
+            OrderedDict()
+        )
+
+    def peek(self, user_id: int) -> Optional[UserProblemBits]:
+        """
+        只读缓存，不查库（未命中 / 过期返回 None）
+        """
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is None or entry[0] <= time.monotonic():
+                return None
+            self._users.move_to_end(user_id)
+            return entry[1]
+
+    def get(self, db: Session, user_id: int) -> UserProblemBits:
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is not None and entry[0] > time.monotonic():
+                self._users.move_to_end(user_id)
+                return entry[1]
+            generation = self._generations.current()
+
+        attempted: Dict[int, int] = {}
+        solved: Dict[int, int] = {}
+        rows = db.execute(
+            select(
+                _bitmaps.c.word,
+                _bitmaps.c.attempted_bits,
+                _bitmaps.c.solved_bits,
+            ).where(_bitmaps.c.user_id == user_id)
+        )
+        for word, attempted_bits, solved_bits in rows:
+            attempted[word] = attempted_bits
+            if solved_bits:
+                solved[word] = solved_bits
+        bits = UserProblemBits(attempted, solved)
+
+        with self._lock:
+            if self._generations.fresh(user_id, generation):
+                self._users[user_id] = (time.monotonic() + self._ttl, bits)
+                self._users.move_to_end(user_id)
+                while len(self._users) > self._max_users:
+                    self._users.popitem(last=False)
+        return bits
+
+    def apply(self, deltas: ProblemBitmapDeltas) -> None:
+        """
+        提交成功后调用：把置位合并进已缓存的位图（未缓存的用户下次读取时加载）
+        """
+        per_user: Dict[int, List[Tuple[int, int, int]]] = {}
+        for (user_id, word), (attempted, solved) in deltas._words.items():
+            per_user.setdefault(user_id, []).append((word, attempted, solved))
+
+        with self._lock:
+            for user_id, words in per_user.items():
+                self._generations.touch(user_id)
+                entry = self._users.get(user_id)
+                if entry is not None:
+                    self._users[user_id] = (entry[0], entry[1].merged(words))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generations.touch_all()
+            self._users.clear()
+
+
+user_bitmaps = UserBitmaps(
+    ttl=settings.BITMAP_CACHE_TTL,
+    max_users=settings.BITMAP_CACHE_MAX_USERS,
+)
+
+
+# =====================================================
+# Rebuild（从 attempts 全量重算）
+# =====================================================
+
+def rebuild_user_bitmaps(
+    db: Session,
+    *,
+    user_ids: Optional[Sequence[int]] = None,
+    chunk_size: int = 10000,
+) -> int:
+    """
+    清空后按 attempts 重算位图（user_ids 为空表示全部用户），返回处理的做题记录数
+
+    会扫 attempts，不要在请求路径上调用
+    """
+    attempts = Attempt.__table__
+    clear = delete(_bitmaps)
+    stmt = select(attempts.c.user_id, attempts.c.problem_id, attempts.c.is_correct)
+    if user_ids:
+        clear = clear.where(_bitmaps.c.user_id.in_(user_ids))
+        stmt = stmt.where(attempts.c.user_id.in_(user_ids))
+    db.execute(clear)
+
+    count = 0
+    result = db.execute(stmt.execution_options(yield_per=chunk_size))
+    for partition in result.partitions():
+        deltas = ProblemBitmapDeltas()
+        for user_id, problem_id, is_correct in partition:
+            deltas.add(user_id, problem_id, is_correct=is_correct)
+        apply_problem_bitmaps(db, deltas=deltas)
+        count += len(partition)
+
+    db.commit()
+    user_bitmaps.clear()
+    return count
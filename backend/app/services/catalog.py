@@ -0,0 +1,285 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.problem import Problem
+from app.services.counters import ProblemCounterDeltas
+
+if TYPE_CHECKING:
+    from app.services.judge import JudgeSpec
+
+
+# =====================================================
+# Snapshot（只读、紧凑的题目表示）
+# =====================================================
+
+@dataclass(frozen=True, slots=True)
+class ProblemSnapshot:
+    """
+    题目的只读快照（不是 ORM 对象，不绑定 Session）
+
+    字段与 ProblemOut 对齐，可直接用于响应序列化和判题
+    options 视为只读，不要原地修改
+
+    digest：除统计计数外、响应可见字段的摘要（加载时算一次，用于 ETag）
+    judge_spec：编译好的判题规则（第一次判题时由 judge_answer 填上；
+    改题会重新加载出新快照，累加计数的 replace 会原样带上）
+    """
+    id: int
+    title: str
+    content: str
+    problem_type: str
+    difficulty: int
+    options: Optional[dict]
+    correct_answer: str
+    submit_count: int
+    correct_count: int
+    is_active: bool
+    created_at: datetime
+    digest: str = field(default="", compare=False)
+    judge_spec: Optional["JudgeSpec"] = field(
+        default=None,
+        compare=False,
+        repr=False,
+    )
+
+    @classmethod
+    def from_row(cls, row) -> "ProblemSnapshot":
+        values = row._mapping
+        source = repr((
+            values["title"],
+            values["content"],
+            values["problem_type"],
+            values["difficulty"],
+            values["options"],
+            values["is_active"],
+            values["created_at"],
+        ))
+        return cls(
+            **values,
+            digest=hashlib.blake2b(
+                source.encode(),
+                digest_size=8,
+            ).hexdigest(),
+        )
+
+
+_SNAPSHOT_COLUMNS = (
+    Problem.id,
+    Problem.title,
+    Problem.content,
+    Problem.problem_type,
+    Problem.difficulty,
+    Problem.options,
+    Problem.correct_answer,
+    Problem.submit_count,
+    Problem.correct_count,
+    Problem.is_active,
+    Problem.created_at,
+)
+
+
+# =====================================================
+# Problem Catalog（进程内 LRU）
+# =====================================================
+
+class ProblemCatalog:
+    """
+    进程内题库缓存
+
+    - LRU 淘汰，最多 max_size 道题
+    - create/update 题目时同步失效（invalidate）
+    - 提交答案提交事务后，直接在快照上累加统计（apply_counters）
+    - TTL 兜底：多进程部署时其它 worker 的改动最多延迟 ttl 秒可见
+
+    generation：失效发生时递增，防止失效前开始的查询把旧快照写回
+    loads：每次加载写回缓存时递增并记在条目上，apply_counters 据此判断
+        快照是不是在提交开始之后才加载的（可能已经包含这次的计数）
+    version：题目或统计在本进程内发生任何变化时递增（列表 ETag 用）
+    """
+
+    def __init__(self, *, max_size: int, ttl: float) -> None:
+        self._max_size = max_size
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: (
+            "OrderedDict[int, Tuple[float, ProblemSnapshot, int]]"
+        ) = OrderedDict()
+        self._generation = 0
+        self._loads = 0
+        self.version = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # ---------------- Read ----------------
+
+    def peek(self, problem_id: int) -> Optional[ProblemSnapshot]:
+        """
+        只查缓存，不访问数据库（未命中返回 None，不计入 miss）
+        """
+        with self._lock:
+            entry = self._entries.get(problem_id)
+            if entry is None or entry[0] <= time.monotonic():
+                return None
+            self._entries.move_to_end(problem_id)
+            self.hits += 1
+            return entry[1]
+
+    def get(
+        self,
+        db: Session,
+        problem_id: int,
+    ) -> Optional[ProblemSnapshot]:
+        """
+        获取单个题目快照，未命中时从数据库加载
+        """
+        return self.get_many(db, [problem_id]).get(problem_id)
+
+    def get_many(
+        self,
+        db: Session,
+        problem_ids: Iterable[int],
+    ) -> Dict[int, ProblemSnapshot]:
+        """
+        批量获取题目快照，所有未命中的题目合并成一次 IN 查询
+
+        不存在的题目不会出现在返回结果中
+        """
+        found: Dict[int, ProblemSnapshot] = {}
+        missing: list[int] = []
+
+        with self._lock:
+            now = time.monotonic()
+            for problem_id in problem_ids:
+                if problem_id in found:
+                    continue
+                entry = self._entries.get(problem_id)
+                if entry is not None and entry[0] > now:
+                    self._entries.move_to_end(problem_id)
+                    found[problem_id] = entry[1]
+                    self.hits += 1
+                else:
+                    missing.append(problem_id)
+            self.misses += len(missing)
+            generation = self._generation
+
+        if not missing:
+            return found
+
+        rows = db.execute(
+            select(*_SNAPSHOT_COLUMNS).where(Problem.id.in_(missing))
+        )
+        loaded = [ProblemSnapshot.from_row(row) for row in rows]
+
+        with self._lock:
+            if generation == self._generation:
+                expires = time.monotonic() + self._ttl
+                self._loads += 1
+                for snapshot in loaded:
+                    self._put(snapshot, expires, self._loads)
+
+        for snapshot in loaded:
+            found[snapshot.id] = snapshot
+
+        return found
+
+    def _put(
+        self,
+        snapshot: ProblemSnapshot,
+        expires: float,
+        loaded: int,
+    ) -> None:
+        self._entries[snapshot.id] = (expires, snapshot, loaded)
+        self._entries.move_to_end(snapshot.id)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    # ---------------- Write ----------------
+
+    def invalidate(self, problem_id: int) -> None:
+        with self._lock:
+            self._generation += 1
+            self.version += 1
+            self._entries.pop(problem_id, None)
+
+    def invalidate_many(self, problem_ids: Iterable[int]) -> None:
+        with self._lock:
+            self._generation += 1
+            self.version += 1
+            for problem_id in problem_ids:
+                self._entries.pop(problem_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self.version += 1
+            self._entries.clear()
+
+    def mark(self) -> int:
+        """
+        提交事务之前调用，返回值传给 apply_counters
+        """
+        with self._lock:
+            return self._loads
+
+    def apply_counters(
+        self,
+        deltas: ProblemCounterDeltas,
+        *,
+        mark: int,
+    ) -> None:
+        """
+        提交成功后把统计增量同步到缓存快照
+
+        mark 之后才写回的快照，读库可能发生在提交之后（已经包含这次的计数），
+        再累加会重复计数，直接丢掉，下次读取时重新加载
+        """
+        with self._lock:
+            self.version += 1
+            for problem_id, submits, correct in deltas.items():
+                entry = self._entries.get(problem_id)
+                if entry is None:
+                    # 可能有正在进行的加载读到了旧计数，让它作废
+                    self._generation += 1
+                    continue
+                if entry[2] > mark:
+                    del self._entries[problem_id]
+                    continue
+                self._entries[problem_id] = (
+                    entry[0],
+                    replace(
+                        entry[1],
+                        submit_count=entry[1].submit_count + submits,
+                        correct_count=entry[1].correct_count + correct,
+                    ),
+                    entry[2],
+                )
+
+    # ---------------- Metrics ----------------
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self._max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+problem_catalog = ProblemCatalog(
+    max_size=settings.CATALOG_MAX_SIZE,
+    ttl=settings.CATALOG_TTL,
+)
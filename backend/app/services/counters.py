@@ -0,0 +1,55 @@
+from typing import Dict, Iterator, Tuple
+
+
+# =====================================================
+# Problem Counter Deltas
+# =====================================================
+
+class ProblemCounterDeltas:
+    """
+    按题目聚合的统计增量（submit_count / correct_count）
+
+    同一事务里的多次提交先在内存里合并，
+    最终每道题只发一条原子 UPDATE（见 crud.problem.apply_problem_counters）
+    """
+
+    __slots__ = ("_deltas",)
+
+    def __init__(self) -> None:
+        self._deltas: Dict[int, list[int]] = {}
+
+    def add(
+        self,
+        problem_id: int,
+        *,
+        is_correct: bool,
+        count: int = 1,
+    ) -> None:
+        delta = self._deltas.get(problem_id)
+        if delta is None:
+            delta = self._deltas[problem_id] = [0, 0]
+        delta[0] += count
+        if is_correct:
+            delta[1] += count
+
+    def merge(self, other: "ProblemCounterDeltas") -> None:
+        for problem_id, (submits, correct) in other._deltas.items():
+            delta = self._deltas.get(problem_id)
+            if delta is None:
+                self._deltas[problem_id] = [submits, correct]
+            else:
+                delta[0] += submits
+                delta[1] += correct
+
+    def items(self) -> Iterator[Tuple[int, int, int]]:
+        """
+        (problem_id, submit 增量, correct 增量)
+        """
+        for problem_id, (submits, correct) in self._deltas.items():
+            yield problem_id, submits, correct
+
+    def __len__(self) -> int:
+        return len(self._deltas)
+
+    def __bool__(self) -> bool:
+        return bool(self._deltas)
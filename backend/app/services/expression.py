@@ -0,0 +1,254 @@
+import math
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+# =====================================================
+# Math Expression（受限的数学表达式求值，给 expression 题型判题用）
+#
+# 不用 eval / ast：自己分词 + 递归下降，边解析边求值（float），只认识下面这些：
+# - 数：3、-2.5、.5、3e5、1.2E-3；后缀 % 表示除以 100
+# - 运算：+ - * / ^ **、× ÷ ·、\cdot \times \div；括号 () {}
+# - 隐式乘法：2pi、3sqrt(2)、2(1+1)、(1)(2)
+# - 常量：pi / π / \pi、e
+# - 函数：sqrt / √ / \sqrt（含 \sqrt[n]{x}）、cbrt、abs、exp、ln、log（常用对数）、
+#   sin、cos、tan；参数可以带括号，也可以直接跟一个数（sqrt2/2 = √2 / 2）
+# - 分数：\frac{a}{b}（\dfrac / \tfrac 同）
+# 结果不是有限实数（除零、负数开平方、溢出）时视为无法解析
+# =====================================================
+
+# 输入长度 / 括号嵌套深度上限（防止恶意输入拖慢判题或撑爆递归）
+MAX_LENGTH = 200
+MAX_DEPTH = 32
+
+_TOKEN = re.compile(
+    r"\s*(?:"
+    r"(?P<number>(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][+-]?\d+)?)"
+    r"|(?P<name>\\?[A-Za-z]+|[π√])"
+    r"|(?P<op>\*\*|[-+*/^%(){}\[\]×÷·−])"
+    r")"
+)
+
+_CONSTANTS: Dict[str, float] = {
+    "pi": math.pi,
+    "π": math.pi,
+    "\\pi": math.pi,
+    "e": math.e,
+}
+
+_FUNCTIONS: Dict[str, Callable[[float], float]] = {
+    "sqrt": math.sqrt,
+    "√": math.sqrt,
+    "\\sqrt": math.sqrt,
+    "cbrt": lambda x: math.copysign(abs(x) ** (1 / 3), x),
+    "abs": abs,
+    "exp": math.exp,
+    "ln": math.log,
+    "\\ln": math.log,
+    "log": math.log10,
+    "\\log": math.log10,
+    "sin": math.sin,
+    "\\sin": math.sin,
+    "cos": math.cos,
+    "\\cos": math.cos,
+    "tan": math.tan,
+    "\\tan": math.tan,
+}
+
+_FRACTIONS = {"\\frac", "\\dfrac", "\\tfrac"}
+
+# 统一成 ASCII 运算符
+_OPERATORS = {
+    "×": "*",
+    "·": "*",
+    "\\cdot": "*",
+    "\\times": "*",
+    "÷": "/",
+    "\\div": "/",
+    "−": "-",
+    "**": "^",
+}
+
+# 只影响排版的 LaTeX 命令，直接跳过
+_IGNORED = {"\\left", "\\right"}
+
+_OPENERS = {"(": ")", "{": "}"}
+
+
+def _tokenize(text: str) -> List[Tuple[str, str]]:
+    tokens: List[Tuple[str, str]] = []
+    position = 0
+    text = text.rstrip()
+    while position < len(text):
+        match = _TOKEN.match(text, position)
+        if match is None or match.end() == position:
+            raise ValueError(f"Unexpected character at {position}")
+        position = match.end()
+        kind = match.lastgroup
+        value = match.group(kind)
+        if value in _IGNORED:
+            continue
+        if value in _OPERATORS:
+            kind, value = "op", _OPERATORS[value]
+        tokens.append((kind, value))
+    return tokens
+
+
+class _Parser:
+    """
+    expr  := term (('+' | '-') term)*
+    term  := unary (('*' | '/') unary | <隐式乘法> power)*
+    unary := ('+' | '-') unary | power
+    power := postfix ('^' unary)?           （右结合：2^3^2 = 2^9）
+    postfix := primary '%'*
+    """
+
+    def __init__(self, tokens: List[Tuple[str, str]]) -> None:
+        self._tokens = tokens
+        self._index = 0
+        self._depth = 0
+
+    # ---------------- Helpers ----------------
+
+    def _peek(self) -> Tuple[str, str]:
+        if self._index < len(self._tokens):
+            return self._tokens[self._index]
+        return ("end", "")
+
+    def _next(self) -> Tuple[str, str]:
+        token = self._peek()
+        self._index += 1
+        return token
+
+    def _expect(self, value: str) -> None:
+        if self._next()[1] != value:
+            raise ValueError(f"Expected {value!r}")
+
+    def _starts_operand(self) -> bool:
+        # 隐式乘法：后面紧跟常量 / 函数 / 括号（跟数字不算，"2 3" 不是 6）
+        kind, value = self._peek()
+        return (kind == "name") or value in _OPENERS
+
+    # ---------------- Grammar ----------------
+
+    def parse(self) -> float:
+        value = self._expr()
+        if self._peek()[0] != "end":
+            raise ValueError("Unexpected trailing input")
+        return value
+
+    def _expr(self) -> float:
+        value = self._term()
+        while self._peek()[1] in ("+", "-"):
+            if self._next()[1] == "+":
+                value += self._term()
+            else:
+                value -= self._term()
+        return value
+
+    def _term(self) -> float:
+        value = self._unary()
+        while True:
+            op = self._peek()[1]
+            if op == "*":
+                self._next()
+                value *= self._unary()
+            elif op == "/":
+                self._next()
+                value /= self._unary()
+            elif self._starts_operand():
+                value *= self._power()
+            else:
+                return value
+
+    def _unary(self) -> float:
+        op = self._peek()[1]
+        if op == "-":
+            self._next()
+            return -self._unary()
+        if op == "+":
+            self._next()
+            return self._unary()
+        return self._power()
+
+    def _power(self) -> float:
+        base = self._postfix()
+        if self._peek()[1] == "^":
+            self._next()
+            return math.pow(base, self._unary())
+        return base
+
+    def _postfix(self) -> float:
+        value = self._primary()
+        while self._peek()[1] == "%":
+            self._next()
+            value /= 100
+        return value
+
+    def _primary(self) -> float:
+        kind, value = self._next()
+        if kind == "number":
+            return float(value)
+        if value in _OPENERS:
+            return self._group(value)
+        if kind != "name":
+            raise ValueError(f"Unexpected {value or 'end of input'!r}")
+
+        if value in _CONSTANTS:
+            return _CONSTANTS[value]
+        if value in _FRACTIONS:
+            numerator = self._braced()
+            return numerator / self._braced()
+        if value in _FUNCTIONS:
+            if value == "\\sqrt" and self._peek()[1] == "[":
+                self._next()
+                index = self._nested(self._expr)
+                self._expect("]")
+                return math.pow(self._postfix(), 1 / index)
+            return _FUNCTIONS[value](self._postfix())
+        raise ValueError(f"Unknown name {value!r}")
+
+    def _group(self, opener: str) -> float:
+        value = self._nested(self._expr)
+        self._expect(_OPENERS[opener])
+        return value
+
+    def _braced(self) -> float:
+        opener = self._next()[1]
+        if opener not in _OPENERS:
+            raise ValueError("Expected a braced group")
+        return self._group(opener)
+
+    def _nested(self, parse: Callable[[], float]) -> float:
+        self._depth += 1
+        if self._depth > MAX_DEPTH:
+            raise ValueError("Expression nested too deeply")
+        try:
+            return parse()
+        finally:
+            self._depth -= 1
+
+
+def evaluate_expression(text: str) -> float:
+    """
+    求值；无法解析或结果不是有限实数时抛 ValueError
+    """
+    if len(text) > MAX_LENGTH:
+        raise ValueError("Expression too long")
+    try:
+        value = _Parser(_tokenize(text)).parse()
+    except (ZeroDivisionError, OverflowError, RecursionError) as e:
+        raise ValueError(str(e)) from None
+    if not math.isfinite(value):
+        raise ValueError("Result is not a finite number")
+    return value
+
+
+def try_evaluate(text: str) -> Optional[float]:
+    """
+    evaluate_expression 的不抛异常版本（无法解析时返回 None，方便缓存）
+    """
+    try:
+        return evaluate_expression(text)
+    except ValueError:
+        return None
@@ -0,0 +1,667 @@
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from collections import defaultdict, deque
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import IO, Callable, Deque, Dict, List, Optional, Tuple
+
+import orjson
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.db import SessionLocal
+from app.crud.problem import apply_problem_counters
+from app.models.attempt import Attempt
+from app.models.ingest_checkpoint import IngestCheckpoint
+from app.models.ingest_dead_letter import IngestDeadLetter
+from app.services.bitmaps import (
+    ProblemBitmapDeltas,
+    apply_problem_bitmaps,
+    user_bitmaps,
+)
+from app.services.catalog import problem_catalog
+from app.services.recommend import solved_sets
+from app.services.counters import ProblemCounterDeltas
+from app.services.rollups import ProblemRollupDeltas, apply_problem_rollups
+from app.services.stats import UserStatsDeltas, apply_user_stats
+from app.services.totals import list_totals
+
+try:
+    import fcntl
+except ImportError:  # Windows：不做跨进程互斥
+    fcntl = None
+
+
+logger = logging.getLogger(__name__)
+
+
+class AttemptWriterBusy(Exception):
+    """
+    写后台队列已满或已关闭（调用方应返回 503，让客户端稍后重试）
+    """
+
+
+# 锁等待 / 死锁 / 连不上数据库（SQLite、PostgreSQL、MySQL 的错误信息，小写）
+_TRANSIENT_MESSAGES = (
+    "database is locked",
+    "database table is locked",
+    "deadlock",
+    "lock wait timeout",
+    "lock timeout",
+    "could not serialize",
+    "could not connect",
+    "connection refused",
+    "can't connect",
+    "lost connection",
+    "server has gone away",
+    "server closed the connection",
+    "terminating connection",
+)
+
+# PostgreSQL SQLSTATE：08xxx 连接异常、40001 序列化失败、40P01 死锁、
+# 55P03 锁等待超时、57P01~57P03 服务端关闭 / 启动中
+_TRANSIENT_SQLSTATES = ("40001", "40P01", "55P03", "57P01", "57P02", "57P03")
+
+
+def _is_transient(error: Exception) -> bool:
+    """
+    重试可能成功的错误：锁等待 / 死锁、连接断开或连不上、连接池等待超时
+
+    其它错误（约束冲突、no such table / column、数据库文件损坏等）对同一批数据
+    每次都会失败，交给二分 + 死信处理
+    """
+    if isinstance(error, PoolTimeoutError):
+        return True
+    if not isinstance(error, DBAPIError):
+        return False
+    if error.connection_invalidated:
+        return True
+
+    orig = error.orig
+    sqlstate = getattr(orig, "pgcode", None) or getattr(orig, "sqlstate", None)
+    if sqlstate and (
+        sqlstate.startswith("08") or sqlstate in _TRANSIENT_SQLSTATES
+    ):
+        return True
+    message = str(orig).lower()
+    return any(pattern in message for pattern in _TRANSIENT_MESSAGES)
+
+
+# =====================================================
+# Pending Attempt（已判题、待落库）
+# =====================================================
+
+@dataclass(slots=True)
+class PendingAttempt:
+    seq: int
+    user_id: int
+    problem_id: int
+    user_answer: str
+    is_correct: bool
+    time_spent: Optional[int]
+    created_at: datetime
+
+    def to_row(self) -> dict:
+        return {
+            "user_id": self.user_id,
+            "problem_id": self.problem_id,
+            "user_answer": self.user_answer,
+            "is_correct": self.is_correct,
+            "time_spent": self.time_spent,
+            "created_at": self.created_at,
+        }
+
+
+# =====================================================
+# Attempt Writer（write-behind）
+# =====================================================
+
+class AttemptWriter:
+    """
+    做题记录写后台
+
+    - submit_many：请求线程里判完题后入队，立即返回
+    - 后台线程按 flush_size 条或 flush_interval 秒批量 INSERT，
+      统计增量合并成一次 UPDATE，整批一个事务
+    - 落库后再同步题库缓存计数和列表 total（读己之写最多延迟一个 flush 周期）
+    - 数据库暂时不可用（连接 / 锁）时整批保留并退避重试，不丢数据；
+      永久错误（约束冲突等）把批次二分到出错的那一条，写进 ingest_dead_letters
+      后跳过，不阻塞后面的记录（启动重放用同一套策略）
+
+    spool_path（可选）：入队前先追加写一行 JSONL，进程崩溃后启动时重放；
+    每 spool_segment_size 条切出一个分段 <spool_path>.<分段最后序号>，
+    检查点越过分段最后序号后删除该分段（当前分段在全部落库时清空）；
+    每批提交时在同一事务里更新 ingest_checkpoints，重放只补未提交的序号。
+    序号是每个 spool 自己的（从 1 开始），所以检查点按 spool 路径分行记录，
+    多个 worker 互不覆盖。
+
+    多 worker 时 spool_path 文件名里写 {pid}（如 attempts-{pid}.jsonl），
+    start() 时换成当前进程号；同时接管已退出进程留下的 spool（拿得到文件锁
+    说明原进程已不在），重放完删掉
+    """
+
+    CHECKPOINT_NAME = "attempts"
+    PID_PLACEHOLDER = "{pid}"
+
+    def __init__(
+        self,
+        *,
+        session_factory: Callable[[], Session],
+        flush_size: int,
+        flush_interval: float,
+        max_pending: int,
+        spool_path: Optional[str] = None,
+        spool_fsync: bool = False,
+        spool_segment_size: int = 10000,
+    ) -> None:
+        self._session_factory = session_factory
+        self._flush_size = flush_size
+        self._flush_interval = flush_interval
+        self._max_pending = max_pending
+        self._spool_template = spool_path
+        self._spool_fsync = spool_fsync
+        self._spool_segment_size = spool_segment_size
+        # start() 时才确定（{pid} 要换成 worker 自己的进程号）
+        self._spool_path: Optional[str] = None
+        self._checkpoint_name = self.CHECKPOINT_NAME
+
+        self._cond = threading.Condition()
+        self._buffer: Deque[PendingAttempt] = deque()
+        self._thread: Optional[threading.Thread] = None
+        self._spool: Optional[IO[bytes]] = None
+        self._spool_lock: Optional[IO[bytes]] = None
+        # 当前分段的条数 / 已切出的分段（路径, 最后序号），按序号递增
+        self._spool_count = 0
+        self._segments: Deque[Tuple[str, int]] = deque()
+        self._running = False
+        self._seq = 0
+
+        # 已入队、尚未提交的条数（包含正在写的那一批）
+        self.pending = 0
+        self.flushed = 0
+        self.batches = 0
+        self.failures = 0
+        self.rejected = 0
+        self.replayed = 0
+        self.dead_lettered = 0
+
+    # ---------------- Lifecycle ----------------
+
+    def start(self) -> None:
+        """
+        重放 spool 中未落库的记录，然后启动后台线程
+        """
+        with self._cond:
+            if self._running:
+                return
+
+        if self._spool_template:
+            self._use_spool(self._spool_template.replace(
+                self.PID_PLACEHOLDER,
+                str(os.getpid()),
+            ))
+            self._open_spool()
+            self._replay()
+            if self.PID_PLACEHOLDER in self._spool_template:
+                self._adopt_orphan_spools()
+
+        with self._cond:
+            self._running = True
+        self._thread = threading.Thread(
+            target=self._run,
+            name="attempt-writer",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 30.0) -> None:
+        """
+        停止接收新记录，把队列里剩下的写完再退出
+        """
+        with self._cond:
+            if not self._running:
+                return
+            self._running = False
+            self._cond.notify_all()
+
+        if self._thread is not None:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                logger.error(
+                    "attempt writer did not drain within %.0fs, "
+                    "%d attempts left%s",
+                    timeout,
+                    self.pending,
+                    " in spool" if self._spool else "",
+                )
+            self._thread = None
+
+        self._close_spool()
+
+    # ---------------- Submit ----------------
+
+    def submit_many(self, rows: List[dict]) -> List[PendingAttempt]:
+        """
+        入队一批已判题的记录（整批接受或整批拒绝）
+
+        rows：user_id / problem_id / user_answer / is_correct / time_spent / created_at
+        """
+        with self._cond:
+            if not self._running:
+                self.rejected += len(rows)
+                raise AttemptWriterBusy("Attempt writer is not running")
+            if self.pending + len(rows) > self._max_pending:
+                self.rejected += len(rows)
+                raise AttemptWriterBusy("Too many attempts waiting")
+
+            items = []
+            for row in rows:
+                self._seq += 1
+                items.append(PendingAttempt(seq=self._seq, **row))
+
+            if self._spool is not None:
+                self._spool.write(b"".join(
+                    orjson.dumps(asdict(item)) + b"\n" for item in items
+                ))
+                self._spool.flush()
+                if self._spool_fsync:
+                    os.fsync(self._spool.fileno())
+                self._spool_count += len(items)
+                if self._spool_count >= self._spool_segment_size:
+                    self._rotate_spool(items[-1].seq)
+
+            was_empty = not self._buffer
+            self._buffer.extend(items)
+            self.pending += len(items)
+            # 攒批开始（队列原本为空）或攒满时唤醒后台线程
+            if was_empty or len(self._buffer) >= self._flush_size:
+                self._cond.notify()
+
+        return items
+
+    # ---------------- Background ----------------
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            self._flush_with_retry(batch)
+
+    def _next_batch(self) -> Optional[List[PendingAttempt]]:
+        with self._cond:
+            while not self._buffer:
+                if not self._running:
+                    return None
+                self._cond.wait()
+
+            # 从第一条入队开始最多等 flush_interval 秒攒批
+            deadline = time.monotonic() + self._flush_interval
+            while len(self._buffer) < self._flush_size and self._running:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            count = min(len(self._buffer), self._flush_size)
+            return [self._buffer.popleft() for _ in range(count)]
+
+    def _flush_with_retry(self, batch: List[PendingAttempt]) -> None:
+        error = self._retry_transient(self._flush, batch)
+        if error is None:
+            return
+
+        if len(batch) > 1:
+            # 按序号顺序先写前半再写后半，检查点保持单调
+            middle = len(batch) // 2
+            self._flush_with_retry(batch[:middle])
+            self._flush_with_retry(batch[middle:])
+            return
+
+        error = self._retry_transient(self._dead_letter, batch[0], error)
+        if error is not None:
+            # 死信都写不进去：只能留在日志里
+            logger.error(
+                "attempt writer dropped attempt %s: %r",
+                orjson.dumps(asdict(batch[0])).decode(),
+                error,
+            )
+            self._committed(batch, dead=True)
+
+    def _retry_transient(self, fn, *args) -> Optional[Exception]:
+        """
+        执行 fn，临时错误退避重试直到成功；返回永久错误（成功返回 None）
+        """
+        delay = 0.1
+        while True:
+            try:
+                fn(*args)
+                return None
+            except Exception as e:
+                self.failures += 1
+                if not _is_transient(e):
+                    logger.warning(
+                        "attempt writer hit a permanent error: %r", e
+                    )
+                    return e
+                logger.exception("attempt writer write failed, retrying")
+                time.sleep(delay)
+                delay = min(delay * 2, 5.0)
+
+    def _flush(self, batch: List[PendingAttempt]) -> None:
+        deltas = ProblemCounterDeltas()
+        per_user: Dict[int, int] = defaultdict(int)
+        for item in batch:
+            deltas.add(item.problem_id, is_correct=item.is_correct)
+            per_user[item.user_id] += 1
+
+        with self._session_factory() as db:
+            # 学习统计按提交时刻的日期计（难度 / 类型取自题库缓存）
+            problems = problem_catalog.get_many(
+                db,
+                [item.problem_id for item in batch],
+            )
+            stats = UserStatsDeltas()
+            rollups = ProblemRollupDeltas()
+            bitmaps = ProblemBitmapDeltas()
+            for item in batch:
+                stats.add(
+                    item.user_id,
+                    problems.get(item.problem_id),
+                    is_correct=item.is_correct,
+                    day=item.created_at.date(),
+                )
+                rollups.add(
+                    item.problem_id,
+                    is_correct=item.is_correct,
+                    time_spent=item.time_spent,
+                    at=item.created_at,
+                )
+                bitmaps.add(
+                    item.user_id,
+                    item.problem_id,
+                    is_correct=item.is_correct,
+                )
+
+            db.execute(insert(Attempt), [item.to_row() for item in batch])
+            apply_problem_counters(db, deltas=deltas)
+            apply_user_stats(db, deltas=stats)
+            apply_problem_rollups(db, deltas=rollups)
+            apply_problem_bitmaps(db, deltas=bitmaps)
+            if self._spool_path:
+                self._save_checkpoint(db, batch[-1].seq)
+            mark = problem_catalog.mark()
+            attempt_mark = list_totals.attempt_mark()
+            db.commit()
+
+        # 已提交：这里再出错也不能让上层重试（会重复插入），只记日志
+        try:
+            problem_catalog.apply_counters(deltas, mark=mark)
+            for user_id, count in per_user.items():
+                list_totals.add_attempts(user_id, count, mark=attempt_mark)
+            solved_sets.add_from_stats(stats)
+            user_bitmaps.apply(bitmaps)
+        except Exception:
+            logger.exception("attempt writer failed to update caches")
+
+        self._committed(batch)
+
+    def _dead_letter(self, item: PendingAttempt, error: Exception) -> None:
+        with self._session_factory() as db:
+            db.add(IngestDeadLetter(
+                name=self._checkpoint_name,
+                seq=item.seq,
+                payload=orjson.dumps(asdict(item)).decode(),
+                error=repr(error),
+            ))
+            if self._spool_path:
+                self._save_checkpoint(db, item.seq)
+            db.commit()
+
+        logger.error(
+            "attempt writer moved attempt seq=%d to ingest_dead_letters",
+            item.seq,
+        )
+        self._committed([item], dead=True)
+
+    def _committed(
+        self,
+        batch: List[PendingAttempt],
+        *,
+        dead: bool = False,
+    ) -> None:
+        with self._cond:
+            self.pending -= len(batch)
+            if dead:
+                self.dead_lettered += len(batch)
+            else:
+                self.flushed += len(batch)
+                self.batches += 1
+            if self._spool is not None:
+                self._release_spool(batch[-1].seq)
+
+    # ---------------- Spool ----------------
+
+    def _use_spool(self, spool_path: str) -> None:
+        self._spool_path = spool_path
+        self._checkpoint_name = self._spool_checkpoint_name(spool_path)
+
+    def _open_spool(self) -> None:
+        # 分段会被改名，互斥锁放在单独的 .lock 文件上
+        self._spool_lock = open(f"{self._spool_path}.lock", "ab")
+        if fcntl is not None:
+            try:
+                fcntl.flock(
+                    self._spool_lock.fileno(),
+                    fcntl.LOCK_EX | fcntl.LOCK_NB,
+                )
+            except OSError:
+                self._spool_lock.close()
+                self._spool_lock = None
+                raise RuntimeError(
+                    f"Attempt spool {self._spool_path} is used by another "
+                    "process; put {pid} in ATTEMPT_SPOOL_PATH when running "
+                    "several workers"
+                )
+        self._spool = open(self._spool_path, "ab")
+
+    def _close_spool(self) -> None:
+        if self._spool is not None:
+            self._spool.close()
+            self._spool = None
+        if self._spool_lock is not None:
+            self._spool_lock.close()
+            self._spool_lock = None
+
+    def _orphan_spool_paths(self) -> List[str]:
+        # 模板匹配到的、别的进程号的 spool（当前分段 / 分段 / .lock 任一存在即算）
+        directory, template = os.path.split(
+            os.path.abspath(self._spool_template)
+        )
+        head, _, tail = template.partition(self.PID_PLACEHOLDER)
+        pattern = re.compile(
+            re.escape(head) + r"(\d+)" + re.escape(tail)
+            + r"(?:\.\d+|\.lock)?"
+        )
+        own = str(os.getpid())
+        pids = set()
+        for name in os.listdir(directory):
+            match = pattern.fullmatch(name)
+            if match and match.group(1) != own:
+                pids.add(match.group(1))
+        return [
+            os.path.join(directory, f"{head}{pid}{tail}")
+            for pid in sorted(pids, key=int)
+        ]
+
+    def _adopt_orphan_spools(self) -> None:
+        """
+        重放已退出 worker 留下的 spool（按它自己的检查点），然后删掉
+        """
+        for path in self._orphan_spool_paths():
+            orphan = AttemptWriter(
+                session_factory=self._session_factory,
+                flush_size=self._flush_size,
+                flush_interval=self._flush_interval,
+                max_pending=self._max_pending,
+            )
+            orphan._use_spool(path)
+            try:
+                orphan._open_spool()
+            except RuntimeError:
+                continue  # 原进程还在运行
+            try:
+                orphan._replay()
+            finally:
+                orphan._close_spool()
+
+            for leftover in (path, f"{path}.lock"):
+                try:
+                    os.remove(leftover)
+                except FileNotFoundError:
+                    pass
+            with self._session_factory() as db:
+                db.execute(
+                    delete(IngestCheckpoint)
+                    .where(IngestCheckpoint.name == orphan._checkpoint_name)
+                )
+                db.commit()
+
+            self.replayed += orphan.replayed
+            self.flushed += orphan.flushed
+            self.batches += orphan.batches
+            self.failures += orphan.failures
+            self.dead_lettered += orphan.dead_lettered
+            logger.warning("adopted orphaned attempt spool %s", path)
+
+    def _segment_paths(self) -> List[str]:
+        # <spool_path>.<最后序号>，按序号排序
+        prefix = os.path.basename(self._spool_path) + "."
+        directory = os.path.dirname(os.path.abspath(self._spool_path))
+        seqs = sorted(
+            int(name[len(prefix):])
+            for name in os.listdir(directory)
+            if name.startswith(prefix) and name[len(prefix):].isdigit()
+        )
+        return [f"{self._spool_path}.{seq}" for seq in seqs]
+
+    def _rotate_spool(self, last_seq: int) -> None:
+        # 持 self._cond 调用：当前分段改名封存，新开一个空分段
+        self._spool.close()
+        segment = f"{self._spool_path}.{last_seq}"
+        os.replace(self._spool_path, segment)
+        self._segments.append((segment, last_seq))
+        self._spool = open(self._spool_path, "ab")
+        self._spool_count = 0
+
+    def _release_spool(self, committed_seq: int) -> None:
+        # 持 self._cond 调用：删掉已全部落库的分段；全部落库时清空当前分段
+        while self._segments and self._segments[0][1] <= committed_seq:
+            segment, _ = self._segments.popleft()
+            try:
+                os.remove(segment)
+            except FileNotFoundError:
+                pass
+        if self.pending == 0:
+            self._spool.truncate(0)
+            self._spool_count = 0
+
+    @classmethod
+    def _spool_checkpoint_name(cls, spool_path: str) -> str:
+        # attempts:<绝对路径>；超出 name 列长度时改用路径摘要
+        path = os.path.abspath(spool_path)
+        name = f"{cls.CHECKPOINT_NAME}:{path}"
+        if len(name) > IngestCheckpoint.name.type.length:
+            digest = hashlib.sha1(path.encode()).hexdigest()
+            name = f"{cls.CHECKPOINT_NAME}:sha1:{digest}"
+        return name
+
+    def _load_checkpoint(self, db: Session) -> int:
+        last_seq = db.scalar(
+            select(IngestCheckpoint.last_seq)
+            .where(IngestCheckpoint.name == self._checkpoint_name)
+        )
+        return last_seq or 0
+
+    def _save_checkpoint(self, db: Session, seq: int) -> None:
+        result = db.execute(
+            update(IngestCheckpoint)
+            .where(IngestCheckpoint.name == self._checkpoint_name)
+            .values(last_seq=seq)
+        )
+        if result.rowcount == 0:
+            db.add(IngestCheckpoint(name=self._checkpoint_name, last_seq=seq))
+
+    def _replay(self) -> None:
+        with self._session_factory() as db:
+            committed = self._load_checkpoint(db)
+
+        items: List[PendingAttempt] = []
+        max_seq = committed
+        segments = self._segment_paths()
+        for path in segments + [self._spool_path]:
+            with open(path, "rb") as f:
+                for line in f:
+                    try:
+                        record = orjson.loads(line)
+                    except orjson.JSONDecodeError:
+                        # 崩溃时写了一半的最后一行
+                        logger.warning("skipping truncated attempt spool line")
+                        continue
+                    record["created_at"] = datetime.fromisoformat(
+                        record["created_at"]
+                    )
+                    item = PendingAttempt(**record)
+                    max_seq = max(max_seq, item.seq)
+                    if item.seq > committed:
+                        items.append(item)
+
+        self._seq = max_seq
+        # 先把全部待重放的条数计入 pending：重放到一半时 pending 不会归零，
+        # spool 要等全部重放完才清空（中途再崩溃还能重来）
+        with self._cond:
+            self.pending += len(items)
+        for start in range(0, len(items), self._flush_size):
+            self._flush_with_retry(items[start:start + self._flush_size])
+
+        self.replayed += len(items)
+        if items:
+            logger.warning("replayed %d attempts from spool", len(items))
+
+        with self._cond:
+            for path in segments:
+                os.remove(path)
+            self._spool.truncate(0)
+            self._spool_count = 0
+
+    # ---------------- Metrics ----------------
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "running": self._running,
+                "pending": self.pending,
+                "flushed": self.flushed,
+                "batches": self.batches,
+                "failures": self.failures,
+                "rejected": self.rejected,
+                "replayed": self.replayed,
+                "dead_lettered": self.dead_lettered,
+            }
+
+
+attempt_writer = AttemptWriter(
+    session_factory=SessionLocal,
+    flush_size=settings.ATTEMPT_FLUSH_SIZE,
+    flush_interval=settings.ATTEMPT_FLUSH_INTERVAL,
+    max_pending=settings.ATTEMPT_MAX_PENDING,
+    spool_path=settings.ATTEMPT_SPOOL_PATH,
+    spool_fsync=settings.ATTEMPT_SPOOL_FSYNC,
+    spool_segment_size=settings.ATTEMPT_SPOOL_SEGMENT_SIZE,
+)
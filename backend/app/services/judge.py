@@ -1,4 +1,128 @@
-from app.models.problem import Problem
+import math
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, Protocol, Tuple
+
+from app.core.config import settings
+from app.services.catalog import ProblemSnapshot
+from app.services.expression import MAX_LENGTH, try_evaluate
+
+
+class JudgeTarget(Protocol):
+    """
+    判题需要的题目字段（Problem ORM / ProblemSnapshot 都满足）
+    """
+    id: int
+    problem_type: str
+    correct_answer: str
+
+
+# =====================================================
+# JudgeSpec（每道题编译一次）
+# =====================================================
+
+@dataclass(frozen=True, slots=True)
+class JudgeSpec:
+    """
+    编译后的判题规则
+
+    - expected：预处理过的正确答案（大写选项 / 选项集合 / 浮点数 / 去空白文本）
+    - match：闭包，已绑定 expected 和容差，判题时只处理用户答案
+    - source：编译时的 correct_answer，题型或答案改动后据此重新编译
+    """
+    problem_type: str
+    source: str
+    expected: Any
+    match: Callable[[str], bool]
+
+
+# correct_answer -> (expected, match)
+JudgeCompiler = Callable[[str], Tuple[Any, Callable[[str], bool]]]
+
+# problem_type -> JudgeCompiler
+JUDGE_TYPES: Dict[str, JudgeCompiler] = {}
+
+
+def register_judge(problem_type: str, compiler: JudgeCompiler) -> None:
+    """
+    注册题型（同名覆盖）
+    """
+    JUDGE_TYPES[problem_type] = compiler
+
+
+def compile_spec(problem_type: str, correct_answer: str) -> JudgeSpec:
+    compiler = JUDGE_TYPES.get(problem_type)
+    if compiler is None:
+        raise ValueError(f"Unsupported problem type: {problem_type}")
+
+    expected, match = compiler(correct_answer)
+
+    return JudgeSpec(
+        problem_type=problem_type,
+        source=correct_answer,
+        expected=expected,
+        match=match,
+    )
+
+
+# =====================================================
+# Spec Cache
+# - 题库快照（ProblemSnapshot）：不可变、改题就换新对象，编译结果直接挂在快照上
+# - 其它对象（ORM Problem 等）：按题目 id 缓存，取用时比对题型 / 答案
+# =====================================================
+
+_spec_cache: Dict[int, JudgeSpec] = {}
+_spec_cache_lock = threading.Lock()
+
+
+def get_judge_spec(problem: JudgeTarget) -> JudgeSpec:
+    """
+    取题目的 JudgeSpec，题型或答案变化时重新编译
+    """
+    if problem.__class__ is ProblemSnapshot:
+        return _snapshot_spec(problem)
+
+    spec = _spec_cache.get(problem.id)
+    if (
+        spec is not None
+        and spec.source == problem.correct_answer
+        and spec.problem_type == problem.problem_type
+    ):
+        return spec
+
+    return _compile_and_cache(problem)
+
+
+def _snapshot_spec(problem: ProblemSnapshot) -> JudgeSpec:
+    spec = problem.judge_spec
+    if spec is None:
+        spec = compile_spec(problem.problem_type, problem.correct_answer)
+        # 快照只读，这里只是惰性填充（并发时重复编译的结果相同，谁写进去都一样）
+        object.__setattr__(problem, "judge_spec", spec)
+    return spec
+
+
+def _compile_and_cache(problem: JudgeTarget) -> JudgeSpec:
+    spec = compile_spec(problem.problem_type, problem.correct_answer)
+
+    with _spec_cache_lock:
+        if len(_spec_cache) >= settings.JUDGE_SPEC_CACHE_SIZE:
+            _spec_cache.pop(next(iter(_spec_cache)))
+        _spec_cache[problem.id] = spec
+
+    return spec
+
+
+def invalidate_judge_spec(problem_id: Optional[int] = None) -> None:
+    """
+    丢弃缓存的 JudgeSpec（不传 id 时全部清空）
+    """
+    with _spec_cache_lock:
+        if problem_id is None:
+            _spec_cache.clear()
+        else:
+            _spec_cache.pop(problem_id, None)
 
 
 # =====================================================
@@ -7,63 +131,127 @@ from app.models.problem import Problem
 
 def judge_answer(
     *,
-    problem: Problem,
+    problem: JudgeTarget,
     user_answer: str,
 ) -> bool:
     """
     判题主入口
     """
-    problem_type = problem.problem_type
+    # get_judge_spec 的内联版本（热路径少一次函数调用）；
+    # 快照命中时只读一个属性，不查字典、不比对题型 / 答案
+    if problem.__class__ is ProblemSnapshot:
+        spec = problem.judge_spec
+        if spec is None:
+            spec = _snapshot_spec(problem)
+        return spec.match(user_answer)
 
-    if problem_type == "single_choice":
-        return _judge_single_choice(problem, user_answer)
+    spec = _spec_cache.get(problem.id)
+    if (
+        spec is None
+        or spec.source != problem.correct_answer
+        or spec.problem_type != problem.problem_type
+    ):
+        spec = _compile_and_cache(problem)
 
-    if problem_type == "multiple_choice":
-        return _judge_multiple_choice(problem, user_answer)
-
-    if problem_type == "numeric":
-        return _judge_numeric(problem, user_answer)
-
-    if problem_type == "text":
-        return _judge_text(problem, user_answer)
-
-    raise ValueError(f"Unsupported problem type: {problem_type}")
+    return spec.match(user_answer)
 
 
 # =====================================================
 # Judge Implementations
 # =====================================================
 
-def _judge_single_choice(problem: Problem, user_answer: str) -> bool:
-    correct = problem.correct_answer.strip().upper()
-    user = user_answer.strip().upper()
-    return user == correct
+NUMERIC_ABS_TOL = 1e-6
 
+# expression 题型：相对误差 + 绝对误差（接近 0 的答案靠绝对误差兜住）
+EXPRESSION_REL_TOL = 1e-6
+EXPRESSION_ABS_TOL = 1e-12
 
-def _judge_multiple_choice(problem: Problem, user_answer: str) -> bool:
-    correct_set = {
-        x.strip().upper()
-        for x in problem.correct_answer.split(",")
-        if x.strip()
-    }
-    user_set = {
+# 用户答案 -> 求值结果（None 表示无法解析）；同一道题的常见写法会反复出现
+_evaluate_answer = lru_cache(maxsize=settings.JUDGE_EXPRESSION_CACHE_SIZE)(
+    try_evaluate
+)
+
+
+def _never(user_answer: str) -> bool:
+    return False
+
+
+def _compile_single_choice(correct_answer: str):
+    expected = correct_answer.strip().upper()
+
+    def match(user_answer: str) -> bool:
+        return user_answer.strip().upper() == expected
+
+    return expected, match
+
+
+def _compile_multiple_choice(correct_answer: str):
+    expected = frozenset(
         x.strip().upper()
-        for x in user_answer.split(",")
+        for x in correct_answer.split(",")
         if x.strip()
-    }
-    return user_set == correct_set
+    )
+
+    def match(user_answer: str) -> bool:
+        user_set = {
+            x.strip().upper()
+            for x in user_answer.split(",")
+            if x.strip()
+        }
+        return user_set == expected
 
+    return expected, match
 
-def _judge_numeric(problem: Problem, user_answer: str) -> bool:
+
+def _compile_numeric(correct_answer: str):
     try:
-        correct = float(problem.correct_answer)
-        user = float(user_answer)
+        expected = float(correct_answer)
     except ValueError:
-        return False
+        return None, _never
+
+    def match(user_answer: str) -> bool:
+        try:
+            return abs(float(user_answer) - expected) <= NUMERIC_ABS_TOL
+        except ValueError:
+            return False
+
+    return expected, match
+
+
+def _compile_expression(correct_answer: str):
+    """
+    数学表达式：1/2、sqrt(2)/2、\\frac{1}{2}、2pi、3e5、50% 等写法按数值比较
+    """
+    expected = try_evaluate(correct_answer.strip())
+    if expected is None:
+        return None, _never
+
+    def match(user_answer: str) -> bool:
+        user_answer = user_answer.strip()
+        if len(user_answer) > MAX_LENGTH:
+            return False
+        value = _evaluate_answer(user_answer)
+        return value is not None and math.isclose(
+            value,
+            expected,
+            rel_tol=EXPRESSION_REL_TOL,
+            abs_tol=EXPRESSION_ABS_TOL,
+        )
+
+    return expected, match
+
+
+def _compile_text(correct_answer: str):
+    expected = correct_answer.strip()
+
+    def match(user_answer: str) -> bool:
+        return user_answer.strip() == expected
 
-    EPSILON = 1e-6
-    return abs(user - correct) <= EPSILON
+    return expected, match
 
 
-def _judge_text(problem: Problem, user_answer: str) -> bool:
-    return user_answer.strip() == problem.correct_answer.strip()
+register_judge("single_choice", _compile_single_choice)
+register_judge("multiple_choice", _compile_multiple_choice)
+register_judge("numeric", _compile_numeric)
+register_judge("text", _compile_text)
+register_judge("expression", _compile_expression)
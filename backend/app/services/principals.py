@@ -0,0 +1,179 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, Tuple
+
+from app.core.config import settings
+from app.models.user import User
+
+
+# =====================================================
+# Principal（已认证用户的只读快照）
+# =====================================================
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """
+    当前登录用户的只读快照（不是 ORM 对象，不绑定 Session）
+
+    字段与 UserOut 对齐，get_current_user 返回它
+    """
+    id: int
+    username: str
+    email: str
+    is_active: bool
+    is_superuser: bool
+    created_at: datetime
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            is_active=user.is_active,
+            is_superuser=user.is_superuser,
+            created_at=user.created_at,
+        )
+
+
+# =====================================================
+# Principal Cache（进程内 LRU + TTL）
+# =====================================================
+
+class PrincipalCache:
+    """
+    get_current_user 的用户缓存
+
+    - 按 user_id 缓存 Principal，省掉每个请求的 get_user_by_id
+    - 可选按 token 缓存 (user_id, exp)，省掉重复的 JWT 校验
+    - update_user 后同步失效；TTL 兜底多进程部署
+    """
+
+    def __init__(
+        self,
+        *,
+        enabled: bool,
+        ttl: float,
+        max_size: int,
+        by_token: bool,
+    ) -> None:
+        self.enabled = enabled
+        self.by_token = enabled and by_token
+        self._ttl = ttl
+        self._max_size = max_size
+        self._lock = threading.Lock()
+        self._generation = 0
+
+        self._principals: "OrderedDict[int, Tuple[float, Principal]]" = (
+            OrderedDict()
+        )
+        self._tokens: "OrderedDict[str, Tuple[float, int]]" = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.token_hits = 0
+        self.token_misses = 0
+        self.invalidations = 0
+
+    # ---------------- By Token ----------------
+
+    def get_user_id(self, token: str) -> Optional[int]:
+        """
+        token 已校验过且未过期时返回 user_id
+        """
+        if not self.by_token:
+            return None
+
+        with self._lock:
+            entry = self._tokens.get(token)
+            if entry is None or entry[0] <= time.time():
+                self.token_misses += 1
+                return None
+            self._tokens.move_to_end(token)
+            self.token_hits += 1
+            return entry[1]
+
+    def put_token(self, token: str, user_id: int, expires_at: float) -> None:
+        """
+        记录已校验的 token（expires_at 为 JWT exp 时间戳）
+        """
+        if not self.by_token:
+            return
+
+        with self._lock:
+            self._tokens[token] = (expires_at, user_id)
+            self._tokens.move_to_end(token)
+            while len(self._tokens) > self._max_size:
+                self._tokens.popitem(last=False)
+
+    # ---------------- By User Id ----------------
+
+    def get(self, user_id: int) -> Tuple[Optional[Principal], int]:
+        """
+        返回 (principal, generation)；未命中时 principal 为 None
+        """
+        if not self.enabled:
+            return None, 0
+
+        with self._lock:
+            entry = self._principals.get(user_id)
+            if entry is None or entry[0] <= time.monotonic():
+                self.misses += 1
+                return None, self._generation
+            self._principals.move_to_end(user_id)
+            self.hits += 1
+            return entry[1], self._generation
+
+    def put(self, principal: Principal, *, generation: int) -> None:
+        if not self.enabled:
+            return
+
+        with self._lock:
+            # 查询期间发生过失效，结果可能是旧的，不写回
+            if generation != self._generation:
+                return
+            self._principals[principal.id] = (
+                time.monotonic() + self._ttl,
+                principal,
+            )
+            self._principals.move_to_end(principal.id)
+            while len(self._principals) > self._max_size:
+                self._principals.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+            self._principals.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._principals.clear()
+            self._tokens.clear()
+
+    # ---------------- Metrics ----------------
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "size": len(self._principals),
+                "token_size": len(self._tokens),
+                "hits": self.hits,
+                "misses": self.misses,
+                "token_hits": self.token_hits,
+                "token_misses": self.token_misses,
+                "invalidations": self.invalidations,
+            }
+
+
+principal_cache = PrincipalCache(
+    enabled=settings.PRINCIPAL_CACHE_ENABLED,
+    ttl=settings.PRINCIPAL_CACHE_TTL,
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    by_token=settings.PRINCIPAL_CACHE_BY_TOKEN,
+)
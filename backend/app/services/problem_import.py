@@ -0,0 +1,246 @@
+import csv
+import io
+import json
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import IO, Iterable, Iterator, List, Literal, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from app.models.problem import Problem
+from app.schemas.problem import ProblemCreate
+from app.services.catalog import problem_catalog
+from app.services.recommend import difficulty_pools
+from app.services.search import index_problems
+from app.services.totals import list_totals
+
+
+ImportFormat = Literal["jsonl", "csv"]
+
+# 解析结果：(行号, 原始记录)；解析失败时记录为错误信息字符串
+RawRecord = Tuple[int, "dict | str"]
+
+# 每块的行数（一次校验、一条 INSERT、一次提交）
+DEFAULT_CHUNK_SIZE = 1000
+
+# 报告里最多保留的错误明细条数（超出只计数，内存不随文件增长）
+MAX_REPORTED_ERRORS = 1000
+
+# CSV 单元格最大字符数（csv 模块默认 131072，长 LaTeX 正文会超）；
+# 超过时该行记为错误。csv.field_size_limit 是进程级设置，只调大不调小
+CSV_FIELD_SIZE_LIMIT = 8 * 1024 * 1024
+
+if csv.field_size_limit() < CSV_FIELD_SIZE_LIMIT:
+    csv.field_size_limit(CSV_FIELD_SIZE_LIMIT)
+
+
+# =====================================================
+# Parsing（逐行流式读取）
+# =====================================================
+
+def detect_format(filename: Optional[str]) -> Optional[ImportFormat]:
+    """
+    按扩展名判断格式（.jsonl / .ndjson / .csv），无法判断时返回 None
+    """
+    name = (filename or "").lower()
+    if name.endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    if name.endswith(".csv"):
+        return "csv"
+    return None
+
+
+def _iter_jsonl(text: IO[str]) -> Iterator[RawRecord]:
+    for line_no, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_no, f"Invalid JSON: {e.msg}"
+            continue
+        if not isinstance(record, dict):
+            yield line_no, "Each line must be a JSON object"
+            continue
+        yield line_no, record
+
+
+def _iter_csv(text: IO[str]) -> Iterator[RawRecord]:
+    """
+    表头即字段名；options 列为 JSON 对象字符串，空单元格视为未填写
+
+    格式错误（单元格超过 CSV_FIELD_SIZE_LIMIT 等）记为该行的错误，继续读后面的行
+    """
+    reader = csv.DictReader(text)
+    while True:
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            # 出错的那一行还没计入 line_num
+            yield reader.line_num + 1, f"Invalid CSV: {e}"
+            continue
+        line_no = reader.line_num
+        record = {
+            key: value
+            for key, value in row.items()
+            if key is not None and value not in (None, "")
+        }
+        if "options" in record:
+            try:
+                record["options"] = json.loads(record["options"])
+            except json.JSONDecodeError as e:
+                yield line_no, f"Invalid options JSON: {e.msg}"
+                continue
+        yield line_no, record
+
+
+def iter_records(binary: IO[bytes], fmt: ImportFormat) -> Iterator[RawRecord]:
+    """
+    把上传文件 / 本地文件逐条解析成原始记录（不一次性读入内存）
+    """
+    text = io.TextIOWrapper(binary, encoding="utf-8-sig", newline="")
+    if fmt == "jsonl":
+        return _iter_jsonl(text)
+    return _iter_csv(text)
+
+
+def take_chunk(records: Iterator[RawRecord], size: int) -> List[RawRecord]:
+    return list(islice(records, size))
+
+
+# =====================================================
+# Import
+# =====================================================
+
+@dataclass
+class ImportReport:
+    total: int = 0
+    inserted: int = 0
+    failed: int = 0
+    errors: List[dict] = field(default_factory=list)
+
+    def add_error(self, row: int, error: str) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "error": error})
+
+    def as_dict(self) -> dict:
+        return {
+            "total": self.total,
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+def _format_validation_error(e: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc']) or 'row'}: {err['msg']}"
+        for err in e.errors()
+    )
+
+
+class ProblemImporter:
+    """
+    批量导入题目：每块先用 ProblemCreate 逐条校验，再一条 executemany INSERT、一次提交
+
+    - 校验失败的行记入报告，不影响同一块的其它行
+    - 整块 INSERT 失败（约束冲突等）时回滚，改为逐行插入找出出错的行
+    - 全文索引和题目同一事务写入
+    - 每块提交后立即让列表 total 和列表 ETag（题库版本号）失效，新题目随即可见
+    """
+
+    def __init__(
+        self,
+        *,
+        created_by_id: Optional[int] = None,
+        dry_run: bool = False,
+    ) -> None:
+        self._created_by_id = created_by_id
+        self._dry_run = dry_run
+        self.report = ImportReport()
+
+    def import_chunk(self, db: Session, chunk: Iterable[RawRecord]) -> None:
+        line_numbers: List[int] = []
+        rows: List[dict] = []
+
+        for line_no, record in chunk:
+            self.report.total += 1
+            if isinstance(record, str):
+                self.report.add_error(line_no, record)
+                continue
+            try:
+                problem_in = ProblemCreate.model_validate(record)
+            except ValidationError as e:
+                self.report.add_error(line_no, _format_validation_error(e))
+                continue
+
+            row = problem_in.model_dump()
+            row["created_by_id"] = self._created_by_id
+            rows.append(row)
+            line_numbers.append(line_no)
+
+        if not rows:
+            return
+        if self._dry_run:
+            self.report.inserted += len(rows)
+            return
+
+        try:
+            self._insert(db, rows)
+        except DBAPIError:
+            db.rollback()
+            self._insert_one_by_one(db, rows, line_numbers)
+
+    def _insert(self, db: Session, rows: List[dict]) -> None:
+        inserted = db.execute(
+            insert(Problem).returning(
+                Problem.id, Problem.title, Problem.content
+            ),
+            rows,
+        ).all()
+        index_problems(db, inserted)
+        db.commit()
+        self.report.inserted += len(rows)
+
+        problem_catalog.invalidate_many([row.id for row in inserted])
+        list_totals.invalidate_problems()
+        difficulty_pools.invalidate()
+
+    def _insert_one_by_one(
+        self,
+        db: Session,
+        rows: List[dict],
+        line_numbers: List[int],
+    ) -> None:
+        for line_no, row in zip(line_numbers, rows):
+            try:
+                self._insert(db, [row])
+            except DBAPIError as e:
+                db.rollback()
+                self.report.add_error(line_no, str(e.orig))
+
+
+def import_problems(
+    db: Session,
+    binary: IO[bytes],
+    fmt: ImportFormat,
+    *,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    created_by_id: Optional[int] = None,
+    dry_run: bool = False,
+) -> ImportReport:
+    """
+    同步版本（命令行用）：边读边导，内存只占一块
+    """
+    importer = ProblemImporter(created_by_id=created_by_id, dry_run=dry_run)
+    records = iter_records(binary, fmt)
+    while chunk := take_chunk(records, chunk_size):
+        importer.import_chunk(db, chunk)
+    return importer.report
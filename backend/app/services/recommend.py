@@ -0,0 +1,246 @@
+import random
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.generations import KeyedGenerations
+from app.models.problem import Problem
+from app.models.user_stats import UserSolvedProblem, UserStatsBreakdown
+from app.services.stats import UserStatsDeltas
+
+
+DIFFICULTIES = (1, 2, 3, 4, 5)
+
+# 升级规则：某难度做过至少这么多次且正确率达标，目标难度升到下一级
+PROMOTE_MIN_ATTEMPTS = 5
+PROMOTE_ACCURACY = 0.7
+
+# 随机抽样的次数，抽不到未做对的题目再顺序扫描
+_SAMPLE_TRIES = 32
+
+
+# =====================================================
+# Difficulty Pools（按难度 / 题型分组的启用题目 ID）
+# =====================================================
+
+class DifficultyPools:
+    """
+    启用中题目的 ID 池（进程内，按 难度 / 难度 + 题型 分组，array 存 ID）
+
+    - 每组第一次用到时单独加载（一条走覆盖索引的查询）
+    - 题目 create / update / 导入时整体失效
+    - TTL 兜底：多进程部署时其它 worker 的改动最多延迟 ttl 秒可见
+    """
+
+    def __init__(self, *, ttl: float) -> None:
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._pools: Dict[Tuple[int, Optional[str]], Tuple[float, array]] = {}
+
+    def get(
+        self,
+        db: Session,
+        difficulty: int,
+        problem_type: Optional[str] = None,
+    ) -> array:
+        key = (difficulty, problem_type)
+        with self._lock:
+            entry = self._pools.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                return entry[1]
+            generation = self._generation
+
+        pool = self._load(db, difficulty, problem_type)
+        with self._lock:
+            # 加载期间被失效过：这次照常使用，但不写回
+            if generation == self._generation:
+                self._pools[key] = (time.monotonic() + self._ttl, pool)
+        return pool
+
+    @staticmethod
+    def _load(
+        db: Session,
+        difficulty: int,
+        problem_type: Optional[str],
+    ) -> array:
+        # 只查 id：ix_problems_active_difficulty(_type) 是覆盖索引
+        stmt = select(Problem.id).where(
+            Problem.is_active.is_(True),
+            Problem.difficulty == difficulty,
+        )
+        if problem_type is not None:
+            stmt = stmt.where(Problem.problem_type == problem_type)
+        return array("q", db.scalars(stmt.order_by(Problem.id)))
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._pools.clear()
+
+
+# =====================================================
+# Solved Sets（每个用户做对过的题目 ID）
+# =====================================================
+
+class SolvedSets:
+    """
+    用户已做对题目集合的 LRU 缓存（进程内）
+
+    - 未命中时按 user_solved_problems 主键范围读一次，与做题记录条数无关
+    - 提交答案提交事务后直接把做对的题目加进已缓存的集合
+    - TTL 兜底其它 worker 的提交
+
+    按用户记 generation，防止「提交之前开始的加载」把旧集合写回缓存；
+    别的用户提交不影响这个用户正在进行的加载
+    """
+
+    def __init__(self, *, ttl: float, max_users: int) -> None:
+        self._ttl = ttl
+        self._max_users = max_users
+        self._lock = threading.Lock()
+        self._generations = KeyedGenerations(max_keys=max_users)
+        self._sets: "OrderedDict[int, Tuple[float, Set[int]]]" = OrderedDict()
+
+    def get(self, db: Session, user_id: int) -> Set[int]:
+        with self._lock:
+            entry = self._sets.get(user_id)
+            if entry is not None and entry[0] > time.monotonic():
+                self._sets.move_to_end(user_id)
+                return entry[1]
+            generation = self._generations.current()
+
+        solved = set(db.scalars(
+            select(UserSolvedProblem.problem_id)
+            .where(UserSolvedProblem.user_id == user_id)
+        ))
+        with self._lock:
+            if self._generations.fresh(user_id, generation):
+                self._sets[user_id] = (time.monotonic() + self._ttl, solved)
+                self._sets.move_to_end(user_id)
+                while len(self._sets) > self._max_users:
+                    self._sets.popitem(last=False)
+        return solved
+
+    def add(self, user_id: int, problem_ids: Iterable[int]) -> None:
+        with self._lock:
+            self._generations.touch(user_id)
+            entry = self._sets.get(user_id)
+            if entry is not None:
+                entry[1].update(problem_ids)
+
+    def add_from_stats(self, stats: UserStatsDeltas) -> None:
+        """
+        提交成功后调用：把这批做对的题目并入缓存
+        """
+        for user_id, problem_ids in stats.correct_problems():
+            self.add(user_id, problem_ids)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generations.touch_all()
+            self._sets.clear()
+
+
+difficulty_pools = DifficultyPools(ttl=settings.RECOMMEND_POOL_TTL)
+solved_sets = SolvedSets(
+    ttl=settings.RECOMMEND_SOLVED_CACHE_TTL,
+    max_users=settings.RECOMMEND_SOLVED_CACHE_MAX_USERS,
+)
+
+
+# =====================================================
+# Recommendation
+# =====================================================
+
+def target_difficulty(db: Session, *, user_id: int) -> int:
+    """
+    用户当前水平：从难度 1 开始，逐级满足升级规则就往上升一级
+
+    只读 user_stats_breakdown（主键范围查询）
+    """
+    rows = db.execute(
+        select(UserStatsBreakdown.key, UserStatsBreakdown.total,
+               UserStatsBreakdown.correct)
+        .where(
+            UserStatsBreakdown.user_id == user_id,
+            UserStatsBreakdown.dimension == "difficulty",
+        )
+    ).all()
+    by_difficulty = {key: (total, correct) for key, total, correct in rows}
+
+    level = DIFFICULTIES[0]
+    for difficulty in DIFFICULTIES[:-1]:
+        total, correct = by_difficulty.get(str(difficulty), (0, 0))
+        if total < PROMOTE_MIN_ATTEMPTS or correct / total < PROMOTE_ACCURACY:
+            break
+        level = difficulty + 1
+    return level
+
+
+def _search_order(level: int) -> List[int]:
+    """
+    目标难度优先，然后由近到远，同距离时先稍难的：3 -> 3, 4, 2, 5, 1
+    """
+    return sorted(DIFFICULTIES, key=lambda d: (abs(d - level), d < level))
+
+
+def _pick(
+    pool: array,
+    solved: Set[int],
+    exclude: Set[int],
+    rng: random.Random,
+) -> Optional[int]:
+    """
+    从池里随机取一个既没做对、也没被排除的 ID
+
+    先随机抽样（没做过的题多时几次就中），都落空再从随机位置顺序扫一圈；
+    solved 是缓存里的集合（其它线程可能正在往里加），这里只做成员判断，不遍历
+    """
+    size = len(pool)
+    if size == 0:
+        return None
+    for _ in range(min(_SAMPLE_TRIES, size)):
+        candidate = pool[rng.randrange(size)]
+        if candidate not in solved and candidate not in exclude:
+            return candidate
+    start = rng.randrange(size)
+    for index in range(size):
+        candidate = pool[(start + index) % size]
+        if candidate not in solved and candidate not in exclude:
+            return candidate
+    return None
+
+
+def recommend_next_problem(
+    db: Session,
+    *,
+    user_id: int,
+    difficulty: Optional[int] = None,
+    problem_type: Optional[str] = None,
+    exclude: Iterable[int] = (),
+    rng: Optional[random.Random] = None,
+) -> Tuple[int, Optional[int]]:
+    """
+    给用户挑一道没做对过的启用题目，返回 (目标难度, 题目 ID)
+
+    难度不传时按 target_difficulty 估计；目标难度没有可做的题时向相邻难度扩展；
+    全部做完时题目 ID 为 None。exclude：客户端刚跳过的题目
+    """
+    level = difficulty or target_difficulty(db, user_id=user_id)
+    solved = solved_sets.get(db, user_id)
+    excluded = set(exclude)
+    rng = rng or random.Random()
+
+    for candidate_difficulty in _search_order(level):
+        pool = difficulty_pools.get(db, candidate_difficulty, problem_type)
+        problem_id = _pick(pool, solved, excluded, rng)
+        if problem_id is not None:
+            return level, problem_id
+    return level, None
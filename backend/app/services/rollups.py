@@ -0,0 +1,344 @@
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import bindparam, delete, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.db import SessionLocal, upsert_insert
+from app.models.attempt import Attempt
+from app.models.problem_rollup import ProblemStatsRollup
+
+
+logger = logging.getLogger(__name__)
+
+# 粒度 -> 桶宽
+GRANULARITIES: Dict[str, timedelta] = {
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+}
+
+# 一次范围查询最多返回的桶数（小时粒度约 31 天，天粒度约 10 年）
+MAX_BUCKETS = 3660
+
+
+def as_utc(at: datetime) -> datetime:
+    """
+    换算成带时区的 UTC（无时区的时间按 UTC 处理，SQLite 读回来的就是这种）
+
+    查询前必须换算：SQLite 绑定带时区的值时只丢掉时区、不换算
+    """
+    if at.tzinfo is None:
+        return at.replace(tzinfo=timezone.utc)
+    return at.astimezone(timezone.utc)
+
+
+def bucket_start(at: datetime, granularity: str) -> datetime:
+    """
+    时间所在桶的起点（UTC；无时区的时间按 UTC 处理）
+    """
+    at = as_utc(at).replace(minute=0, second=0, microsecond=0)
+    if granularity == "day":
+        at = at.replace(hour=0)
+    return at
+
+
+# =====================================================
+# Rollup Deltas
+# =====================================================
+
+class ProblemRollupDeltas:
+    """
+    按 (题目, 粒度, 桶) 聚合的统计增量
+
+    每次提交同时计入小时桶和天桶；最终一条 executemany upsert 写入
+    """
+
+    __slots__ = ("_buckets",)
+
+    def __init__(self) -> None:
+        self._buckets: Dict[Tuple[int, str, datetime], List[int]] = {}
+
+    def add(
+        self,
+        problem_id: int,
+        *,
+        is_correct: bool,
+        time_spent: Optional[int],
+        at: datetime,
+    ) -> None:
+        for granularity in GRANULARITIES:
+            key = (problem_id, granularity, bucket_start(at, granularity))
+            counts = self._buckets.get(key)
+            if counts is None:
+                counts = self._buckets[key] = [0, 0, 0, 0]
+            counts[0] += 1
+            if is_correct:
+                counts[1] += 1
+            if time_spent is not None:
+                counts[2] += time_spent
+                counts[3] += 1
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def __bool__(self) -> bool:
+        return bool(self._buckets)
+
+
+# =====================================================
+# Apply（提交路径，不提交事务）
+# =====================================================
+
+_rollups = ProblemStatsRollup.__table__
+
+
+@lru_cache(maxsize=None)
+def _upsert_stmt(dialect: str):
+    stmt = upsert_insert(dialect)(_rollups).values(
+        problem_id=bindparam("problem_id"),
+        granularity=bindparam("granularity"),
+        bucket_start=bindparam("bucket_start"),
+        submit_count=bindparam("d_submit"),
+        correct_count=bindparam("d_correct"),
+        time_spent_total=bindparam("d_time"),
+        time_spent_count=bindparam("d_timed"),
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=["problem_id", "granularity", "bucket_start"],
+        set_={
+            name: _rollups.c[name] + stmt.excluded[name]
+            for name in (
+                "submit_count",
+                "correct_count",
+                "time_spent_total",
+                "time_spent_count",
+            )
+        },
+    )
+
+
+def apply_problem_rollups(db: Session, *, deltas: ProblemRollupDeltas) -> None:
+    """
+    把分桶增量写入数据库（不提交，由调用方和 Attempt 放在同一事务）
+    """
+    if not deltas:
+        return
+
+    params = [
+        {
+            "problem_id": problem_id,
+            "granularity": granularity,
+            "bucket_start": start,
+            "d_submit": submits,
+            "d_correct": correct,
+            "d_time": time_total,
+            "d_timed": timed,
+        }
+        for (problem_id, granularity, start), (
+            submits, correct, time_total, timed
+        ) in deltas._buckets.items()
+    ]
+    db.execute(_upsert_stmt(db.get_bind().dialect.name), params)
+
+
+# =====================================================
+# Read（范围查询，只读汇总表）
+# =====================================================
+
+def get_problem_rollups(
+    db: Session,
+    *,
+    problem_id: int,
+    granularity: str,
+    start: datetime,
+    end: datetime,
+) -> List[dict]:
+    """
+    [start, end) 范围内的分桶统计（按桶起点升序，没有提交的桶补 0）
+
+    start 向下对齐到桶起点；桶数超过 MAX_BUCKETS 时抛 ValueError
+    """
+    step = GRANULARITIES[granularity]
+    start = bucket_start(start, granularity)
+    end = as_utc(end)
+    if end <= start:
+        return []
+    if (end - start) / step > MAX_BUCKETS:
+        raise ValueError(
+            f"Range too large: at most {MAX_BUCKETS} {granularity} buckets"
+        )
+
+    rows = db.execute(
+        select(_rollups)
+        .where(
+            _rollups.c.problem_id == problem_id,
+            _rollups.c.granularity == granularity,
+            _rollups.c.bucket_start >= start,
+            _rollups.c.bucket_start < end,
+        )
+        .order_by(_rollups.c.bucket_start)
+    ).all()
+    found = {as_utc(row.bucket_start): row for row in rows}
+
+    buckets = []
+    at = start
+    while at < end:
+        row = found.get(at)
+        submits = row.submit_count if row else 0
+        correct = row.correct_count if row else 0
+        time_total = row.time_spent_total if row else 0
+        timed = row.time_spent_count if row else 0
+        buckets.append({
+            "bucket_start": at,
+            "submit_count": submits,
+            "correct_count": correct,
+            "accuracy": round(correct / submits, 4) if submits else 0.0,
+            "time_spent_total": time_total,
+            "avg_time_spent": round(time_total / timed, 2) if timed else None,
+        })
+        at += step
+    return buckets
+
+
+# =====================================================
+# Compaction（过期分桶清理）
+# =====================================================
+
+def compact_rollups(
+    db: Session,
+    *,
+    now: Optional[datetime] = None,
+) -> Dict[str, int]:
+    """
+    删除过期的分桶，返回每种粒度删除的行数
+
+    天桶和小时桶是分别累加的，删小时桶不影响天桶；
+    保留天数 <= 0 表示该粒度永久保留
+    """
+    now = now or datetime.now(timezone.utc)
+    retention = {
+        "hour": settings.ROLLUP_HOURLY_RETENTION_DAYS,
+        "day": settings.ROLLUP_DAILY_RETENTION_DAYS,
+    }
+
+    deleted: Dict[str, int] = {}
+    for granularity, days in retention.items():
+        if days <= 0:
+            continue
+        cutoff = bucket_start(now - timedelta(days=days), granularity)
+        result = db.execute(
+            delete(_rollups).where(
+                _rollups.c.granularity == granularity,
+                _rollups.c.bucket_start < cutoff,
+            )
+        )
+        deleted[granularity] = result.rowcount
+    db.commit()
+    return deleted
+
+
+class RollupCompactor:
+    """
+    后台定时执行 compact_rollups（每 interval 秒一次）
+
+    多进程部署时每个进程都会跑，DELETE 是幂等的，重复执行无害
+    """
+
+    def __init__(
+        self,
+        *,
+        session_factory: Callable[[], Session],
+        interval: float,
+    ) -> None:
+        self._session_factory = session_factory
+        self._interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._interval <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            name="rollup-compactor",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self) -> None:
+        while True:
+            try:
+                with self._session_factory() as db:
+                    deleted = compact_rollups(db)
+                if any(deleted.values()):
+                    logger.info("compacted problem rollups: %s", deleted)
+            except Exception:
+                logger.exception("problem rollup compaction failed")
+            if self._stop.wait(self._interval):
+                return
+
+
+rollup_compactor = RollupCompactor(
+    session_factory=SessionLocal,
+    interval=settings.ROLLUP_COMPACT_INTERVAL,
+)
+
+
+# =====================================================
+# Rebuild（从 attempts 回填，离线使用）
+# =====================================================
+
+def rebuild_problem_rollups(
+    db: Session,
+    *,
+    since: datetime,
+    chunk_size: int = 10000,
+) -> int:
+    """
+    重算 since 所在那天零点之后的全部分桶，返回处理的做题记录数
+
+    用于上线前的历史数据回填，或者手工改过 attempts 之后；
+    这里会扫 attempts，不要在请求路径上调用
+    """
+    since = bucket_start(since, "day")
+    db.execute(delete(_rollups).where(_rollups.c.bucket_start >= since))
+
+    attempts = Attempt.__table__
+    result = db.execute(
+        select(
+            attempts.c.problem_id,
+            attempts.c.is_correct,
+            attempts.c.time_spent,
+            attempts.c.created_at,
+        )
+        .where(attempts.c.created_at >= since)
+        .execution_options(yield_per=chunk_size)
+    )
+
+    count = 0
+    for partition in result.partitions():
+        deltas = ProblemRollupDeltas()
+        for problem_id, is_correct, time_spent, created_at in partition:
+            deltas.add(
+                problem_id,
+                is_correct=is_correct,
+                time_spent=time_spent,
+                at=created_at,
+            )
+        apply_problem_rollups(db, deltas=deltas)
+        count += len(partition)
+
+    db.commit()
+    return count
@@ -0,0 +1,293 @@
+import html
+import re
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Engine, text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.problem import Problem
+
+
+# =====================================================
+# Problem Search（SQLite FTS5）
+#
+# problems_fts 只存「归一化后」的 title / content，rowid = problems.id：
+# - LaTeX：\frac / \sqrt 等命令保留命令名作为词；\left、\mathrm 这类纯排版命令去掉
+# - 中文：unicode61 不会给中文分词，写入前逐字加空格，查询时按短语匹配（字相邻）
+# 非 SQLite（或没有编译 FTS5）时索引维护全部跳过，搜索接口返回 501
+# =====================================================
+
+FTS_TABLE = "problems_fts"
+
+# 默认排序函数（列权重：标题命中比正文重要）；写进 FTS 配置后按隐藏列 rank 排序，
+# FTS5 在虚表内部排好序，不再额外建临时 B-tree
+_RANK_FUNCTION = "bm25(10.0, 1.0)"
+
+# 只影响排版、不影响语义的 LaTeX 命令
+_LATEX_LAYOUT_COMMANDS = {
+    "left", "right", "big", "Big", "bigg", "Bigg",
+    "displaystyle", "textstyle", "scriptstyle",
+    "mathrm", "mathbf", "mathit", "mathsf", "mathtt", "mathbb", "mathcal",
+    "text", "textbf", "textit", "operatorname",
+    "quad", "qquad", "hspace", "vspace",
+    "begin", "end",
+}
+
+_LATEX_COMMAND = re.compile(r"\\([A-Za-z]+)|\\.")
+_CJK = (
+    "㐀-䶿"   # 扩展 A
+    "一-鿿"   # 基本汉字
+    "豈-﫿"   # 兼容汉字
+    "぀-ヿ"   # 假名
+    "가-힯"   # 韩文音节
+)
+_CJK_CHAR = re.compile(f"([{_CJK}])")
+# 查询里的词：一串中日韩字（按短语）或一串字母数字
+_QUERY_TERM = re.compile(f"[{_CJK}]+|[^\\W_]+")
+
+
+def _replace_latex_command(match: re.Match) -> str:
+    name = match.group(1)
+    if name is None or name in _LATEX_LAYOUT_COMMANDS:
+        return " "
+    return f" {name} "
+
+
+def normalize_for_search(value: str) -> str:
+    """
+    写入 FTS 和查询前共用的归一化（两边一致才能匹配上）
+    """
+    value = _LATEX_COMMAND.sub(_replace_latex_command, value)
+    return _CJK_CHAR.sub(r" \1 ", value)
+
+
+def query_terms(query: str) -> List[str]:
+    """
+    搜索框输入 -> 词列表（中文连续字为一个词，按短语匹配）
+    """
+    return _QUERY_TERM.findall(_LATEX_COMMAND.sub(_replace_latex_command, query))
+
+
+def build_match_query(terms: Sequence[str]) -> Optional[str]:
+    """
+    词列表 -> FTS5 MATCH 表达式（各词 AND；每个词都加引号，用户输入里的 FTS 语法不生效）
+
+    最后一个字母数字词按前缀匹配，边输入边搜
+    """
+    parts = []
+    for index, term in enumerate(terms):
+        phrase = normalize_for_search(term).split()
+        quoted = '"' + " ".join(phrase).replace('"', "") + '"'
+        is_last = index == len(terms) - 1
+        if is_last and not _CJK_CHAR.match(term) and len(term) >= 2:
+            quoted += "*"
+        parts.append(quoted)
+    return " ".join(parts) or None
+
+
+# =====================================================
+# Index Maintenance
+# =====================================================
+
+class SearchUnavailable(Exception):
+    """
+    当前数据库不支持全文搜索（调用方应返回 501）
+    """
+
+
+def search_supported(bind) -> bool:
+    return bind.dialect.name == "sqlite"
+
+
+def ensure_search_index(engine: Engine) -> None:
+    """
+    启动时建 FTS 表；新建（或为空）而题库里已有题目时全量回填
+    """
+    if not search_supported(engine):
+        return
+    with Session(engine) as db:
+        db.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+            "USING fts5(title, content, "
+            "tokenize = 'unicode61 remove_diacritics 2')"
+        ))
+        db.execute(
+            text(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rank) VALUES ('rank', :rank)"),
+            {"rank": _RANK_FUNCTION},
+        )
+        empty = db.execute(
+            text(f"SELECT 1 FROM {FTS_TABLE} LIMIT 1")
+        ).first() is None
+        has_problems = db.execute(
+            text("SELECT 1 FROM problems LIMIT 1")
+        ).first() is not None
+        db.commit()
+        if empty and has_problems:
+            rebuild_search_index(db)
+
+
+def index_problems(
+    db: Session,
+    problems: Iterable[Tuple[int, str, str]],
+) -> None:
+    """
+    写入 / 覆盖 (id, title, content) 的索引（不提交，和题目写入放在同一事务）
+    """
+    if not search_supported(db.get_bind()):
+        return
+    rows = [
+        {
+            "id": problem_id,
+            "title": normalize_for_search(title),
+            "content": normalize_for_search(content),
+        }
+        for problem_id, title, content in problems
+    ]
+    if not rows:
+        return
+    db.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), rows)
+    db.execute(
+        text(
+            f"INSERT INTO {FTS_TABLE} (rowid, title, content) "
+            "VALUES (:id, :title, :content)"
+        ),
+        rows,
+    )
+
+
+def rebuild_search_index(db: Session, *, chunk_size: int = 5000) -> int:
+    """
+    清空后按 problems 全量重建，返回索引的题目数
+    """
+    if not search_supported(db.get_bind()):
+        return 0
+    db.execute(text(f"DELETE FROM {FTS_TABLE}"))
+
+    count = 0
+    result = db.execute(
+        Problem.__table__.select()
+        .with_only_columns(Problem.id, Problem.title, Problem.content)
+        .execution_options(yield_per=chunk_size)
+    )
+    for partition in result.partitions():
+        index_problems(db, partition)
+        count += len(partition)
+
+    db.execute(text(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')"))
+    db.commit()
+    return count
+
+
+# =====================================================
+# Search
+# =====================================================
+
+_SNIPPET_RADIUS = 40
+
+
+def make_snippet(
+    value: str,
+    terms: Sequence[str],
+    *,
+    radius: int = _SNIPPET_RADIUS,
+    mark: Tuple[str, str] = ("<mark>", "</mark>"),
+) -> str:
+    """
+    在原文（不是归一化文本）上截取第一个命中附近的片段，命中词用 mark 包起来
+
+    返回 HTML：原文先 html.escape 再加 mark（题目里的 < & 等不会变成标签）
+    """
+    if not terms:
+        return html.escape(value[: radius * 2])
+    pattern = re.compile(
+        "|".join(re.escape(term) for term in sorted(terms, key=len, reverse=True)),
+        re.IGNORECASE,
+    )
+    first = pattern.search(value)
+    center = first.start() if first else 0
+    start = max(0, center - radius)
+    end = min(len(value), center + radius)
+
+    window = value[start:end]
+    parts = []
+    last = 0
+    for match in pattern.finditer(window):
+        parts.append(html.escape(window[last:match.start()]))
+        parts.append(f"{mark[0]}{html.escape(match.group(0))}{mark[1]}")
+        last = match.end()
+    parts.append(html.escape(window[last:]))
+    return (
+        ("…" if start > 0 else "")
+        + "".join(parts)
+        + ("…" if end < len(value) else "")
+    )
+
+
+def search_problems(
+    db: Session,
+    *,
+    query: str,
+    difficulty: Optional[int] = None,
+    problem_type: Optional[str] = None,
+    limit: int = 20,
+    offset: int = 0,
+) -> Tuple[List[dict], bool]:
+    """
+    全文搜索启用中的题目，按 bm25 相关度排序（标题权重更高）
+
+    命中超过 SEARCH_MAX_RANKED 条时只在最新的那部分命中里排序
+
+    返回 (items, has_more)；非 SQLite 时抛 SearchUnavailable
+    """
+    if not search_supported(db.get_bind()):
+        raise SearchUnavailable("Problem search requires SQLite FTS5")
+
+    terms = query_terms(query)
+    match = build_match_query(terms)
+    if match is None:
+        return [], False
+
+    filters = ""
+    params = {"match": match, "limit": limit + 1, "offset": offset}
+    if settings.SEARCH_MAX_RANKED > 0:
+        # 只给 rowid 最大（最新）的 MAX_RANKED 条命中排序；FTS5 按 rowid 倒序
+        # 取第 N 条很便宜，外层再带上 rowid 下界，bm25 只算这一段
+        filters += (
+            f" AND {FTS_TABLE}.rowid >= COALESCE(("
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match "
+            "ORDER BY rowid DESC LIMIT 1 OFFSET :max_ranked), 0)"
+        )
+        params["max_ranked"] = settings.SEARCH_MAX_RANKED - 1
+    if difficulty is not None:
+        filters += " AND p.difficulty = :difficulty"
+        params["difficulty"] = difficulty
+    if problem_type is not None:
+        filters += " AND p.problem_type = :problem_type"
+        params["problem_type"] = problem_type
+
+    rows = db.execute(
+        text(
+            "SELECT p.id, p.title, p.content, p.problem_type, p.difficulty, "
+            f"{FTS_TABLE}.rank "
+            f"FROM {FTS_TABLE} JOIN problems AS p ON p.id = {FTS_TABLE}.rowid "
+            f"WHERE {FTS_TABLE} MATCH :match AND p.is_active = 1{filters} "
+            f"ORDER BY {FTS_TABLE}.rank LIMIT :limit OFFSET :offset"
+        ),
+        params,
+    ).all()
+
+    items = [
+        {
+            "id": row.id,
+            "title": make_snippet(row.title, terms, radius=200),
+            "problem_type": row.problem_type,
+            "difficulty": row.difficulty,
+            "snippet": make_snippet(row.content, terms),
+            # bm25 越小越相关，对外给正数（越大越相关）；不取整：
+            # 常见词的 bm25 远小于 1e-4，取整后全是 0，排序信息就丢了
+            "score": -row.rank,
+        }
+        for row in rows[:limit]
+    ]
+    return items, len(rows) > limit
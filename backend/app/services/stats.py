@@ -0,0 +1,459 @@
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from sqlalchemy import (
+    Date,
+    String,
+    bindparam,
+    case,
+    cast,
+    delete,
+    func,
+    literal,
+    select,
+    true,
+)
+from sqlalchemy.orm import Session
+
+from app.core.db import upsert_insert
+from app.models.attempt import Attempt
+from app.models.problem import Problem
+from app.models.user_stats import (
+    UserSolvedProblem,
+    UserStats,
+    UserStatsBreakdown,
+)
+
+
+# 拆分维度：dimension -> 题目上的字段
+DIMENSIONS = {
+    "difficulty": "difficulty",
+    "type": "problem_type",
+}
+
+
+# =====================================================
+# User Stats Deltas
+# =====================================================
+
+class _UserDelta:
+    __slots__ = ("total", "correct", "correct_problems", "breakdown", "days")
+
+    def __init__(self) -> None:
+        self.total = 0
+        self.correct = 0
+        self.correct_problems: Set[int] = set()
+        self.breakdown: Dict[Tuple[str, str], List[int]] = {}
+        self.days: Set[date] = set()
+
+
+class UserStatsDeltas:
+    """
+    按用户聚合的学习统计增量
+
+    和 ProblemCounterDeltas 一样先在内存里合并，
+    最终每张统计表只发一条语句（见 apply_user_stats）
+    """
+
+    __slots__ = ("_users",)
+
+    def __init__(self) -> None:
+        self._users: Dict[int, _UserDelta] = defaultdict(_UserDelta)
+
+    def add(
+        self,
+        user_id: int,
+        problem: Any,
+        *,
+        is_correct: bool,
+        day: date,
+    ) -> None:
+        """
+        problem：有 id / difficulty / problem_type 的对象（ProblemSnapshot 或 ORM）；
+        题目已不存在时传 None，只计总数，不计拆分
+        """
+        delta = self._users[user_id]
+        delta.total += 1
+        delta.days.add(day)
+        if is_correct:
+            delta.correct += 1
+
+        if problem is None:
+            return
+        if is_correct:
+            delta.correct_problems.add(problem.id)
+        for dimension, attr in DIMENSIONS.items():
+            counts = delta.breakdown.setdefault(
+                (dimension, str(getattr(problem, attr))),
+                [0, 0],
+            )
+            counts[0] += 1
+            if is_correct:
+                counts[1] += 1
+
+    def correct_problems(self) -> Iterator[Tuple[int, Set[int]]]:
+        """
+        (user_id, 这批里做对的题目 ID)，提交后更新进程内缓存用
+        """
+        for user_id, delta in self._users.items():
+            if delta.correct_problems:
+                yield user_id, delta.correct_problems
+
+    def __bool__(self) -> bool:
+        return bool(self._users)
+
+
+# =====================================================
+# Apply（提交路径，不提交事务）
+# =====================================================
+
+_stats = UserStats.__table__
+_breakdown = UserStatsBreakdown.__table__
+_solved = UserSolvedProblem.__table__
+
+
+@lru_cache(maxsize=None)
+def _statements(dialect: str):
+    """
+    按方言生成 upsert 语句（INSERT ... ON CONFLICT）
+    """
+    insert = upsert_insert(dialect)
+
+    # 第一次做对的 (user, problem)：冲突忽略，RETURNING 只返回真正插入的行
+    solved = (
+        insert(_solved)
+        .on_conflict_do_nothing(index_elements=["user_id", "problem_id"])
+        .returning(_solved.c.user_id)
+    )
+
+    breakdown = insert(_breakdown).values(
+        user_id=bindparam("user_id"),
+        dimension=bindparam("dimension"),
+        key=bindparam("key"),
+        total=bindparam("d_total"),
+        correct=bindparam("d_correct"),
+    )
+    breakdown = breakdown.on_conflict_do_update(
+        index_elements=["user_id", "dimension", "key"],
+        set_={
+            "total": _breakdown.c.total + breakdown.excluded.total,
+            "correct": _breakdown.c.correct + breakdown.excluded.correct,
+        },
+    )
+
+    stats = insert(_stats).values(
+        user_id=bindparam("user_id"),
+        total_attempts=bindparam("d_total"),
+        correct_attempts=bindparam("d_correct"),
+        solved_count=bindparam("d_solved"),
+        current_streak=1,
+        longest_streak=1,
+        last_active_date=bindparam("day", type_=Date),
+    )
+    day = stats.excluded.last_active_date
+    last = _stats.c.last_active_date
+    # 连续天数：同一天不变；紧接着前一天 +1；否则从 1 重新开始
+    # 比已记录日期更早的提交（重放等乱序情况）不改连续天数
+    streak = case(
+        (last.is_(None), 1),
+        (day <= last, _stats.c.current_streak),
+        (
+            last == bindparam("prev_day", type_=Date),
+            _stats.c.current_streak + 1,
+        ),
+        else_=1,
+    )
+    stats = stats.on_conflict_do_update(
+        index_elements=["user_id"],
+        set_={
+            "total_attempts": (
+                _stats.c.total_attempts + stats.excluded.total_attempts
+            ),
+            "correct_attempts": (
+                _stats.c.correct_attempts + stats.excluded.correct_attempts
+            ),
+            "solved_count": _stats.c.solved_count + stats.excluded.solved_count,
+            "current_streak": streak,
+            "longest_streak": case(
+                (streak > _stats.c.longest_streak, streak),
+                else_=_stats.c.longest_streak,
+            ),
+            "last_active_date": case(
+                (last.is_(None) | (day > last), day),
+                else_=last,
+            ),
+            "updated_at": func.now(),
+        },
+    )
+
+    return solved, breakdown, stats
+
+
+def apply_user_stats(db: Session, *, deltas: UserStatsDeltas) -> None:
+    """
+    把学习统计增量写入数据库（不提交，由调用方和 Attempt 放在同一事务）
+
+    最多三条语句：新做对的题目、拆分正确率（executemany）、用户汇总（executemany）；
+    全部是原子累加，并发提交不会丢失更新
+    """
+    if not deltas:
+        return
+
+    solved_stmt, breakdown_stmt, stats_stmt = _statements(
+        db.get_bind().dialect.name
+    )
+    users = deltas._users
+
+    # 1️⃣ 第一次做对的题目 -> 每个用户新增的 solved 数
+    solved_rows = [
+        {"user_id": user_id, "problem_id": problem_id}
+        for user_id, delta in users.items()
+        for problem_id in delta.correct_problems
+    ]
+    newly_solved: Counter = Counter()
+    if solved_rows:
+        newly_solved.update(
+            db.scalars(solved_stmt.values(solved_rows)).all()
+        )
+
+    # 2️⃣ 按难度 / 类型拆分
+    breakdown_params = [
+        {
+            "user_id": user_id,
+            "dimension": dimension,
+            "key": key,
+            "d_total": total,
+            "d_correct": correct,
+        }
+        for user_id, delta in users.items()
+        for (dimension, key), (total, correct) in delta.breakdown.items()
+    ]
+    if breakdown_params:
+        db.execute(breakdown_stmt, breakdown_params)
+
+    # 3️⃣ 用户汇总：计数只在第一轮累加；
+    #    一批跨了多天（写后台重放）时按日期顺序多跑几轮，逐天推进连续天数
+    rounds = {
+        user_id: sorted(delta.days)
+        for user_id, delta in users.items()
+    }
+    first = True
+    while rounds:
+        params = []
+        for user_id, days in rounds.items():
+            day = days.pop(0)
+            delta = users[user_id]
+            params.append({
+                "user_id": user_id,
+                "d_total": delta.total if first else 0,
+                "d_correct": delta.correct if first else 0,
+                "d_solved": newly_solved[user_id] if first else 0,
+                "day": day,
+                "prev_day": day - timedelta(days=1),
+            })
+        db.execute(stats_stmt, params)
+        rounds = {user_id: days for user_id, days in rounds.items() if days}
+        first = False
+
+
+# =====================================================
+# Read
+# =====================================================
+
+def _accuracy(correct: int, total: int) -> float:
+    return round(correct / total, 4) if total else 0.0
+
+
+def get_user_stats(
+    db: Session,
+    *,
+    user_id: int,
+    today: date,
+) -> dict:
+    """
+    读取用户学习统计（两次主键查询，与做题记录数量无关）
+
+    today 之前一天之后都没做题的，当前连续天数视为 0
+    """
+    row = db.get(UserStats, user_id)
+    breakdown = db.scalars(
+        select(UserStatsBreakdown)
+        .where(UserStatsBreakdown.user_id == user_id)
+    ).all()
+
+    result: dict = {
+        "total_attempts": 0,
+        "correct_attempts": 0,
+        "accuracy": 0.0,
+        "solved_count": 0,
+        "current_streak": 0,
+        "longest_streak": 0,
+        "last_active_date": None,
+        "by_difficulty": [],
+        "by_type": [],
+    }
+    if row is not None:
+        streak_alive = (
+            row.last_active_date is not None
+            and row.last_active_date >= today - timedelta(days=1)
+        )
+        result.update(
+            total_attempts=row.total_attempts,
+            correct_attempts=row.correct_attempts,
+            accuracy=_accuracy(row.correct_attempts, row.total_attempts),
+            solved_count=row.solved_count,
+            current_streak=row.current_streak if streak_alive else 0,
+            longest_streak=row.longest_streak,
+            last_active_date=row.last_active_date,
+        )
+
+    for item in sorted(breakdown, key=lambda b: (b.dimension, b.key)):
+        target = "by_difficulty" if item.dimension == "difficulty" else "by_type"
+        result[target].append({
+            "key": item.key,
+            "total": item.total,
+            "correct": item.correct,
+            "accuracy": _accuracy(item.correct, item.total),
+        })
+
+    return result
+
+
+# =====================================================
+# Rebuild（从 attempts 全量重算）
+# =====================================================
+
+def _streaks(days: Sequence[date]) -> Tuple[int, int]:
+    """
+    升序且去重的做题日期 -> (截至最后一天的连续天数, 最长连续天数)
+    """
+    current = longest = 0
+    previous: Optional[date] = None
+    for day in days:
+        if previous is not None and day - previous == timedelta(days=1):
+            current += 1
+        else:
+            current = 1
+        longest = max(longest, current)
+        previous = day
+    return current, longest
+
+
+def _as_date(value: Any) -> date:
+    # SQLite 的 date() 返回字符串，PostgreSQL 返回 date
+    return value if isinstance(value, date) else date.fromisoformat(value)
+
+
+def _user_filter(column, user_ids: Optional[Sequence[int]]):
+    return column.in_(user_ids) if user_ids is not None else true()
+
+
+def rebuild_user_stats(
+    db: Session,
+    *,
+    user_ids: Optional[Iterable[int]] = None,
+) -> int:
+    """
+    按 attempts 重算学习统计（user_ids 为空时重算全部用户），返回重算的用户数
+
+    整个过程一个事务；重算期间的新提交可能被覆盖，建议在低峰期执行
+    """
+    if user_ids is not None:
+        user_ids = list(user_ids)
+
+    for table in (_stats, _breakdown, _solved):
+        db.execute(delete(table).where(_user_filter(table.c.user_id, user_ids)))
+
+    attempts = Attempt.__table__
+    problems = Problem.__table__
+    in_scope = _user_filter(attempts.c.user_id, user_ids)
+    correct = func.sum(case((attempts.c.is_correct, 1), else_=0))
+
+    # 1️⃣ 做对过的题目
+    db.execute(
+        _solved.insert().from_select(
+            ["user_id", "problem_id", "solved_at"],
+            select(
+                attempts.c.user_id,
+                attempts.c.problem_id,
+                func.min(attempts.c.created_at),
+            )
+            .where(in_scope, attempts.c.is_correct)
+            .group_by(attempts.c.user_id, attempts.c.problem_id),
+        )
+    )
+
+    # 2️⃣ 按难度 / 类型拆分
+    for dimension, attr in DIMENSIONS.items():
+        column = problems.c[attr]
+        db.execute(
+            _breakdown.insert().from_select(
+                ["user_id", "dimension", "key", "total", "correct"],
+                select(
+                    attempts.c.user_id,
+                    literal(dimension, String),
+                    cast(column, String),
+                    func.count(),
+                    correct,
+                )
+                .join(problems, problems.c.id == attempts.c.problem_id)
+                .where(in_scope)
+                .group_by(attempts.c.user_id, column),
+            )
+        )
+
+    # 3️⃣ 汇总 + 连续天数（按用户、日期顺序流式读取）
+    totals = {
+        user_id: (total, correct_count or 0)
+        for user_id, total, correct_count in db.execute(
+            select(attempts.c.user_id, func.count(), correct)
+            .where(in_scope)
+            .group_by(attempts.c.user_id)
+        )
+    }
+    solved_counts = dict(db.execute(
+        select(_solved.c.user_id, func.count())
+        .where(_user_filter(_solved.c.user_id, user_ids))
+        .group_by(_solved.c.user_id)
+    ).all())
+
+    day_column = func.date(attempts.c.created_at)
+    active_days: Dict[int, List[date]] = defaultdict(list)
+    for user_id, day in db.execute(
+        select(attempts.c.user_id, day_column)
+        .where(in_scope)
+        .distinct()
+        .order_by(attempts.c.user_id, day_column)
+    ):
+        active_days[user_id].append(_as_date(day))
+
+    rows = []
+    for user_id, (total, correct_count) in totals.items():
+        days = active_days[user_id]
+        current, longest = _streaks(days)
+        rows.append({
+            "user_id": user_id,
+            "total_attempts": total,
+            "correct_attempts": correct_count,
+            "solved_count": solved_counts.get(user_id, 0),
+            "current_streak": current,
+            "longest_streak": longest,
+            "last_active_date": days[-1] if days else None,
+        })
+    if rows:
+        db.execute(_stats.insert(), rows)
+
+    db.commit()
+    return len(rows)
@@ -0,0 +1,142 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+
+from app.core.config import settings
+from app.core.generations import KeyedGenerations
+
+
+# =====================================================
+# List Totals Cache
+# =====================================================
+
+class ListTotals:
+    """
+    分页列表 total 的缓存（进程内）
+
+    - 题目列表：按筛选条件缓存 COUNT，create/update 题目时整体失效
+    - 做题记录：按用户缓存条数，提交答案后直接累加
+    - TTL 兜底：多进程部署时其它 worker 的写入最多延迟 ttl 秒可见
+
+    generation 用来防止「失效之前开始的 COUNT」把旧值写回缓存
+    （做题记录按用户记，别的用户提交不影响）
+    """
+
+    def __init__(self, *, ttl: float, max_users: int) -> None:
+        self._ttl = ttl
+        self._max_users = max_users
+        self._lock = threading.Lock()
+
+        self._problem_generation = 0
+        self._problem_totals: Dict[Hashable, Tuple[float, int]] = {}
+        self._attempt_generations = KeyedGenerations(max_keys=max_users)
+        self._attempt_sets = 0
+        self._attempt_totals: "OrderedDict[int, Tuple[float, int, int]]" = (
+            OrderedDict()
+        )
+
+    # ---------------- Problems ----------------
+
+    def get_problem_total(self, key: Hashable) -> Tuple[Optional[int], int]:
+        """
+        返回 (total, generation)；未命中时 total 为 None
+        """
+        with self._lock:
+            entry = self._problem_totals.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                return entry[1], self._problem_generation
+            return None, self._problem_generation
+
+    def set_problem_total(
+        self,
+        key: Hashable,
+        total: int,
+        *,
+        generation: int,
+    ) -> None:
+        with self._lock:
+            if generation != self._problem_generation:
+                return
+            self._problem_totals[key] = (time.monotonic() + self._ttl, total)
+
+    def invalidate_problems(self) -> None:
+        with self._lock:
+            self._problem_generation += 1
+            self._problem_totals.clear()
+
+    # ---------------- Attempts ----------------
+
+    def get_attempt_total(self, user_id: int) -> Tuple[Optional[int], int]:
+        """
+        返回 (total, generation)；未命中时 total 为 None
+        """
+        with self._lock:
+            generation = self._attempt_generations.current()
+            entry = self._attempt_totals.get(user_id)
+            if entry is None or entry[0] <= time.monotonic():
+                return None, generation
+            self._attempt_totals.move_to_end(user_id)
+            return entry[1], generation
+
+    def set_attempt_total(
+        self,
+        user_id: int,
+        total: int,
+        *,
+        generation: int,
+    ) -> None:
+        with self._lock:
+            # COUNT 期间这个用户提交过，结果可能是旧的，不写回
+            if not self._attempt_generations.fresh(user_id, generation):
+                return
+            self._attempt_sets += 1
+            self._attempt_totals[user_id] = (
+                time.monotonic() + self._ttl,
+                total,
+                self._attempt_sets,
+            )
+            self._attempt_totals.move_to_end(user_id)
+            while len(self._attempt_totals) > self._max_users:
+                self._attempt_totals.popitem(last=False)
+
+    def attempt_mark(self) -> int:
+        """
+        提交事务之前调用，返回值传给 add_attempts
+        """
+        with self._lock:
+            return self._attempt_sets
+
+    def add_attempts(self, user_id: int, count: int, *, mark: int) -> None:
+        """
+        提交成功后累加（未缓存的用户不处理，下次查询时再 COUNT）
+
+        mark 之后才写回的条数，COUNT 可能发生在提交之后（已经包含这次的记录），
+        再累加会重复计数，直接丢掉
+        """
+        with self._lock:
+            self._attempt_generations.touch(user_id)
+            entry = self._attempt_totals.get(user_id)
+            if entry is None:
+                return
+            if entry[2] > mark:
+                del self._attempt_totals[user_id]
+                return
+            self._attempt_totals[user_id] = (
+                entry[0],
+                entry[1] + count,
+                entry[2],
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._problem_generation += 1
+            self._problem_totals.clear()
+            self._attempt_generations.touch_all()
+            self._attempt_totals.clear()
+
+
+list_totals = ListTotals(
+    ttl=settings.TOTALS_CACHE_TTL,
+    max_users=settings.TOTALS_CACHE_MAX_USERS,
+)
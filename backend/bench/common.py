@@ -0,0 +1,113 @@
+"""
+压测公共工具：造数据、统计分位数
+"""
+import math
+import random
+from typing import Dict, List, Sequence
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.models.problem import Problem
+from app.models.user import User
+
+
+BENCH_PASSWORD = "bench-password"
+
+PROBLEM_TYPES = {
+    "single_choice": "B",
+    "multiple_choice": "A,C",
+    "numeric": "3.5",
+    "text": "x^2 + 1",
+}
+
+
+# =====================================================
+# Seed
+# =====================================================
+
+def seed_users(
+    db: Session,
+    *,
+    count: int,
+    hashed_password: str,
+    prefix: str = "bench",
+) -> List[str]:
+    """
+    批量创建用户（共用同一个密码哈希，避免造数据时反复跑 Argon2）
+    """
+    usernames = [f"{prefix}{i}" for i in range(count)]
+    db.execute(
+        insert(User),
+        [
+            {
+                "username": username,
+                "email": f"{username}@bench.local",
+                "hashed_password": hashed_password,
+                "is_active": True,
+                "is_superuser": False,
+            }
+            for username in usernames
+        ],
+    )
+    db.commit()
+    return usernames
+
+
+def seed_problems(db: Session, *, count: int, seed: int = 0) -> None:
+    """
+    批量创建题目（四种题型轮流，难度 1~5）
+    """
+    rng = random.Random(seed)
+    types = list(PROBLEM_TYPES)
+    rows = []
+    for i in range(count):
+        problem_type = types[i % len(types)]
+        rows.append({
+            "title": f"Bench problem {i}",
+            "content": (
+                f"已知 $f(x) = {rng.randint(1, 9)}x + {rng.randint(1, 9)}$，"
+                f"求 $f({rng.randint(1, 9)})$。" * rng.randint(1, 8)
+            ),
+            "problem_type": problem_type,
+            "difficulty": rng.randint(1, 5),
+            "options": (
+                {"A": "1", "B": "2", "C": "3", "D": "4"}
+                if problem_type.endswith("choice") else None
+            ),
+            "correct_answer": PROBLEM_TYPES[problem_type],
+            "submit_count": 0,
+            "correct_count": 0,
+            "is_active": True,
+        })
+    db.execute(insert(Problem), rows)
+    db.commit()
+
+
+# =====================================================
+# Stats
+# =====================================================
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """
+    最近秩分位数（sorted_values 需已排序）
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies: List[float], duration: float) -> Dict[str, float]:
+    """
+    延迟列表（秒）-> 吞吐 + 分位数（毫秒）
+    """
+    values = sorted(latencies)
+    return {
+        "count": len(values),
+        "rps": round(len(values) / duration, 2) if duration else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p95_ms": round(percentile(values, 95) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+        "max_ms": round(values[-1] * 1000, 3) if values else 0.0,
+    }
@@ -0,0 +1,51 @@
+"""
+对比两次 bench.load 的 JSON 结果（按接口列出吞吐和分位数变化）
+
+用法（在 backend 目录下）：
+    python -m bench.compare base.json new.json
+"""
+import argparse
+import json
+
+METRICS = ("rps", "p50_ms", "p95_ms", "p99_ms")
+
+
+def _change(old: float, new: float) -> str:
+    if not old:
+        return "     n/a"
+    return f"{(new - old) / old * 100:>+7.1f}%"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("base")
+    parser.add_argument("new")
+    args = parser.parse_args()
+
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.new, encoding="utf-8") as f:
+        new = json.load(f)
+
+    print(f"base: {base['meta']['git']} {base['meta']['env']}")
+    print(f"new:  {new['meta']['git']} {new['meta']['env']}")
+    print(
+        f"total rps {base['total_rps']:.1f} -> {new['total_rps']:.1f} "
+        f"({_change(base['total_rps'], new['total_rps']).strip()})"
+    )
+
+    header = "".join(f"{metric:>26}" for metric in METRICS)
+    print(f"{'endpoint':<16}{header}")
+    for name in sorted(set(base["endpoints"]) | set(new["endpoints"])):
+        old_stats = base["endpoints"].get(name, {})
+        new_stats = new["endpoints"].get(name, {})
+        cells = []
+        for metric in METRICS:
+            old = old_stats.get(metric, 0.0)
+            now = new_stats.get(metric, 0.0)
+            cells.append(f"{old:>8.1f} -> {now:>8.1f}{_change(old, now)}")
+        print(f"{name:<16}" + "".join(f"{cell:>26}" for cell in cells))
+
+
+if __name__ == "__main__":
+    main()
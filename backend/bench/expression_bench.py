@@ -0,0 +1,87 @@
+"""
+expression 题型判题吞吐：numeric（float + 绝对误差）vs expression（受限表达式求值）
+
+expression 分两组：
+- cold：每次先清空用户答案缓存（每次都要分词 + 解析）
+- memo：用户答案求值结果已缓存（同一道题的常见写法反复出现时的情况）
+
+另外列出每个答案两种题型的判题结果，看 numeric 会误判哪些写法
+
+用法（在 backend 目录下）：
+    python -m bench.expression_bench
+    python -m bench.expression_bench --number 100000 --repeat 7
+"""
+import argparse
+import timeit
+from types import SimpleNamespace
+
+from app.services.judge import _evaluate_answer, invalidate_judge_spec, judge_answer
+
+
+# (正确答案, 用户答案)
+CASES = [
+    ("0.5", "0.5"),
+    ("0.5", "1/2"),
+    ("0.7071067811865476", "sqrt(2)/2"),
+    ("300000", "3e5"),
+    ("0.5", "50%"),
+    ("3.141592653589793", "\\frac{2\\pi}{2}"),
+    # 大数：绝对误差 1e-6 对 1e23 量级没有意义
+    ("6.02214076e23", "6.022140760000001e23"),
+    # 小数：1e-9 和 2e-9 差了一倍，绝对误差 1e-6 却判对
+    ("1e-9", "2e-9"),
+]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    invalidate_judge_spec()
+
+    print(
+        f"{'answer':<24}{'numeric':>9}{'expr':>6}"
+        f"{'numeric ops/s':>16}{'cold ops/s':>14}{'memo ops/s':>14}"
+    )
+    for index, (correct_answer, user_answer) in enumerate(CASES):
+        numeric = SimpleNamespace(
+            id=2 * index + 1,
+            problem_type="numeric",
+            correct_answer=correct_answer,
+        )
+        expression = SimpleNamespace(
+            id=2 * index + 2,
+            problem_type="expression",
+            correct_answer=correct_answer,
+        )
+
+        def judge_numeric():
+            return judge_answer(problem=numeric, user_answer=user_answer)
+
+        def judge_cold():
+            _evaluate_answer.cache_clear()
+            return judge_answer(problem=expression, user_answer=user_answer)
+
+        def judge_memo():
+            return judge_answer(problem=expression, user_answer=user_answer)
+
+        # 取多轮中的最好成绩，减少调度噪声
+        timings = [
+            min(timeit.repeat(fn, number=args.number, repeat=args.repeat))
+            for fn in (judge_numeric, judge_cold, judge_memo)
+        ]
+        print(
+            f"{user_answer:<24}"
+            f"{'ok' if judge_numeric() else 'wrong':>9}"
+            f"{'ok' if judge_memo() else 'wrong':>6}"
+            + "".join(
+                f"{args.number / seconds:>{width},.0f}"
+                for seconds, width in zip(timings, (16, 14, 14))
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+判题吞吐 microbenchmark：旧实现（每次重新解析答案）vs JudgeSpec
+
+- snapshot：题库快照（请求路径上实际判题的对象），编译结果挂在快照上
+- id-cache：其它对象（ORM Problem 等），按题目 id 查编译缓存
+
+用法（在 backend 目录下）：
+    python -m bench.judge_bench
+    python -m bench.judge_bench --number 200000 --repeat 7
+"""
+import argparse
+import timeit
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from app.services.catalog import ProblemSnapshot
+from app.services.judge import invalidate_judge_spec, judge_answer
+
+
+# =====================================================
+# 旧实现（原 judge_answer 的 if 链 + 每次解析）
+# =====================================================
+
+def legacy_judge_answer(*, problem, user_answer: str) -> bool:
+    problem_type = problem.problem_type
+
+    if problem_type == "single_choice":
+        return (
+            user_answer.strip().upper()
+            == problem.correct_answer.strip().upper()
+        )
+
+    if problem_type == "multiple_choice":
+        correct_set = {
+            x.strip().upper()
+            for x in problem.correct_answer.split(",")
+            if x.strip()
+        }
+        user_set = {
+            x.strip().upper()
+            for x in user_answer.split(",")
+            if x.strip()
+        }
+        return user_set == correct_set
+
+    if problem_type == "numeric":
+        try:
+            correct = float(problem.correct_answer)
+            user = float(user_answer)
+        except ValueError:
+            return False
+        return abs(user - correct) <= 1e-6
+
+    if problem_type == "text":
+        return user_answer.strip() == problem.correct_answer.strip()
+
+    raise ValueError(f"Unsupported problem type: {problem_type}")
+
+
+# =====================================================
+# Cases
+# =====================================================
+
+CASES = [
+    ("single_choice", " b ", "B"),
+    ("multiple_choice", "A, C, D", "d,c,a"),
+    ("numeric", "3.1415926", "3.1415927"),
+    ("text", "  x^2 + 1  ", "x^2 + 1"),
+]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    invalidate_judge_spec()
+
+    print(
+        f"{'type':<16}{'legacy ops/s':>16}{'snapshot ops/s':>16}"
+        f"{'speedup':>9}{'id-cache ops/s':>16}{'speedup':>9}"
+    )
+    now = datetime.now(timezone.utc)
+    for index, (problem_type, correct_answer, user_answer) in enumerate(CASES):
+        problem = SimpleNamespace(
+            id=index + 1,
+            problem_type=problem_type,
+            correct_answer=correct_answer,
+        )
+        snapshot = ProblemSnapshot(
+            id=index + 1,
+            title="",
+            content="",
+            problem_type=problem_type,
+            difficulty=1,
+            options=None,
+            correct_answer=correct_answer,
+            submit_count=0,
+            correct_count=0,
+            is_active=True,
+            created_at=now,
+        )
+
+        expected = legacy_judge_answer(problem=problem, user_answer=user_answer)
+        assert expected == judge_answer(problem=problem, user_answer=user_answer)
+        assert expected == judge_answer(problem=snapshot, user_answer=user_answer)
+
+        # 取多轮中的最好成绩，减少调度噪声
+        legacy, on_snapshot, on_id_cache = (
+            min(timeit.repeat(fn, number=args.number, repeat=args.repeat))
+            for fn in (
+                lambda: legacy_judge_answer(
+                    problem=problem, user_answer=user_answer
+                ),
+                lambda: judge_answer(problem=snapshot, user_answer=user_answer),
+                lambda: judge_answer(problem=problem, user_answer=user_answer),
+            )
+        )
+
+        print(
+            f"{problem_type:<16}"
+            f"{args.number / legacy:>16,.0f}"
+            f"{args.number / on_snapshot:>16,.0f}"
+            f"{legacy / on_snapshot:>8.2f}x"
+            f"{args.number / on_id_cache:>16,.0f}"
+            f"{legacy / on_id_cache:>8.2f}x"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+"""
+HTTP 负载压测：真实起一个 uvicorn main:app，混合请求打满各接口
+
+- 临时 SQLite 库 + 造数据（用户 / 题目）
+- 并发客户端按权重随机发请求：
+  login / 题目列表 / 题目详情 / 提交答案 / 我的做题记录
+- 按接口输出吞吐和 p50/p95/p99，可存 JSON，两次结果用 bench.compare 对比
+
+用法（在 backend 目录下）：
+    python -m bench.load --duration 20 --clients 32 --output base.json
+    python -m bench.load --env DB_ASYNC=1 --output async.json
+    python -m bench.compare base.json async.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+
+# 接口 -> 权重（大致模拟刷题场景：读多写少，登录最少）
+DEFAULT_MIX = {
+    "login": 2,
+    "problems_list": 35,
+    "problem_detail": 30,
+    "submit_attempt": 20,
+    "my_attempts": 13,
+}
+
+
+# =====================================================
+# Server
+# =====================================================
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _seed(args: argparse.Namespace) -> List[str]:
+    # 必须在设置好 DATABASE_URL 之后再导入 app
+    from app.core.db import SessionLocal
+    from app.core.security import get_password_hash, password_hash_pool
+    from bench.common import BENCH_PASSWORD, seed_problems, seed_users
+    import main  # noqa: F401  建表 + 索引
+
+    with SessionLocal() as db:
+        usernames = seed_users(
+            db,
+            count=args.users,
+            hashed_password=get_password_hash(BENCH_PASSWORD),
+        )
+        seed_problems(db, count=args.problems)
+
+    password_hash_pool.shutdown()
+    return usernames
+
+
+def _start_server(args: argparse.Namespace, env: dict, port: int, log):
+    command = [
+        sys.executable, "-m", "uvicorn", "main:app",
+        "--host", "127.0.0.1",
+        "--port", str(port),
+        "--workers", str(args.workers),
+        "--log-level", "warning",
+        "--no-access-log",
+    ]
+    return subprocess.Popen(command, env=env, stdout=log, stderr=log)
+
+
+def _wait_ready(base_url: str, server, timeout: float = 30.0) -> None:
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError("uvicorn exited during startup")
+        try:
+            if httpx.get(f"{base_url}/problems", timeout=1).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("uvicorn did not become ready in time")
+
+
+# =====================================================
+# Workload
+# =====================================================
+
+async def _drive(
+    args: argparse.Namespace,
+    base_url: str,
+    usernames: List[str],
+) -> dict:
+    import httpx
+
+    from bench.common import BENCH_PASSWORD, PROBLEM_TYPES, summarize
+
+    endpoints = list(args.mix)
+    weights = [args.mix[name] for name in endpoints]
+    latencies: Dict[str, List[float]] = {name: [] for name in endpoints}
+    statuses: Dict[str, Dict[str, int]] = {name: {} for name in endpoints}
+    answers = list(PROBLEM_TYPES.values())
+
+    limits = httpx.Limits(max_connections=args.clients)
+    async with httpx.AsyncClient(
+        base_url=base_url,
+        timeout=60,
+        limits=limits,
+    ) as client:
+
+        async def login(username: str) -> httpx.Response:
+            return await client.post(
+                "/auth/login",
+                data={"username": username, "password": BENCH_PASSWORD},
+            )
+
+        # 每个客户端一个固定用户，先登录拿 token（不计入结果）
+        tokens = []
+        for index in range(args.clients):
+            response = await login(usernames[index % len(usernames)])
+            response.raise_for_status()
+            tokens.append(response.json()["access_token"])
+
+        async def request(name: str, index: int, rng: random.Random):
+            headers = {"Authorization": f"Bearer {tokens[index]}"}
+            if name == "login":
+                return await login(usernames[rng.randrange(len(usernames))])
+            if name == "problems_list":
+                params = {"skip": rng.randrange(0, 200, 20), "limit": 20}
+                if rng.random() < 0.3:
+                    params["difficulty"] = rng.randint(1, 5)
+                return await client.get("/problems", params=params)
+            if name == "problem_detail":
+                problem_id = rng.randint(1, args.problems)
+                return await client.get(f"/problems/{problem_id}")
+            if name == "submit_attempt":
+                return await client.post(
+                    "/attempts",
+                    json={
+                        "problem_id": rng.randint(1, args.problems),
+                        "user_answer": rng.choice(answers),
+                        "time_spent": rng.randint(5, 300),
+                    },
+                    headers=headers,
+                )
+            return await client.get(
+                "/attempts/me",
+                params={"limit": 20},
+                headers=headers,
+            )
+
+        async def worker(index: int, warmup_end: float, stop: float):
+            rng = random.Random(args.seed + index)
+            while True:
+                started = time.perf_counter()
+                if started >= stop:
+                    return
+                name = rng.choices(endpoints, weights)[0]
+                response = await request(name, index, rng)
+                elapsed = time.perf_counter() - started
+                if started < warmup_end:
+                    continue
+                code = str(response.status_code)
+                statuses[name][code] = statuses[name].get(code, 0) + 1
+                if response.status_code < 400:
+                    latencies[name].append(elapsed)
+
+        warmup_end = time.perf_counter() + args.warmup
+        stop = warmup_end + args.duration
+        await asyncio.gather(
+            *(worker(i, warmup_end, stop) for i in range(args.clients))
+        )
+
+    total = sum(len(values) for values in latencies.values())
+    return {
+        "total_rps": round(total / args.duration, 2),
+        "endpoints": {
+            name: {
+                **summarize(latencies[name], args.duration),
+                "status": statuses[name],
+            }
+            for name in endpoints
+        },
+    }
+
+
+# =====================================================
+# Entry
+# =====================================================
+
+def _parse_env(pairs: List[str]) -> Dict[str, str]:
+    env = {}
+    for pair in pairs:
+        key, sep, value = pair.partition("=")
+        if not sep:
+            raise SystemExit(f"--env expects KEY=VALUE, got {pair!r}")
+        env[key] = value
+    return env
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--warmup", type=float, default=3.0)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--problems", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--mix",
+        type=json.loads,
+        default=DEFAULT_MIX,
+        help='接口权重 JSON，例如 \'{"problems_list": 1, "login": 1}\'',
+    )
+    parser.add_argument(
+        "--env",
+        action="append",
+        default=[],
+        metavar="KEY=VALUE",
+        help="传给服务进程的配置（可重复）",
+    )
+    parser.add_argument("--output", help="结果写入 JSON 文件")
+    args = parser.parse_args()
+
+    unknown = set(args.mix) - set(DEFAULT_MIX)
+    if unknown:
+        raise SystemExit(f"unknown endpoints in --mix: {sorted(unknown)}")
+
+    server_env = _parse_env(args.env)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ.update({
+            "DATABASE_URL": f"sqlite:///{tmp}/load.db",
+            "DB_PROFILE": "bench",
+            **server_env,
+        })
+        usernames = _seed(args)
+
+        port = _free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        with open(os.path.join(tmp, "server.log"), "w") as log:
+            server = _start_server(args, dict(os.environ), port, log)
+            try:
+                _wait_ready(base_url, server)
+                result = asyncio.run(_drive(args, base_url, usernames))
+            except Exception:
+                log.flush()
+                with open(log.name) as f:
+                    sys.stderr.write(f.read())
+                raise
+            finally:
+                server.terminate()
+                server.wait(timeout=30)
+
+    report = {
+        "meta": {
+            "git": _git_revision(),
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "duration_s": args.duration,
+            "clients": args.clients,
+            "workers": args.workers,
+            "users": args.users,
+            "problems": args.problems,
+            "mix": args.mix,
+            "env": server_env,
+        },
+        **result,
+    }
+
+    print(f"total {report['total_rps']:.1f} req/s")
+    print(
+        f"{'endpoint':<16}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}"
+        f"{'p99 ms':>10}  status"
+    )
+    for name, stats in report["endpoints"].items():
+        print(
+            f"{name:<16}{stats['rps']:>9.1f}{stats['p50_ms']:>10.1f}"
+            f"{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}  "
+            f"{stats['status']}"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+登录洪峰压测：登录吞吐 + 同时进行的 /problems 读延迟
+
+对比 PASSWORD_HASH_EXECUTOR 不同取值（每种模式在独立子进程中运行）：
+- inline：旧行为，Argon2 与读接口共用 FastAPI 线程池
+- thread / process：专用有界执行器
+
+用法（在 backend 目录下）：
+    python -m bench.login_bench
+    python -m bench.login_bench --executors inline,thread,process --duration 15
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def _run_child(args: argparse.Namespace) -> dict:
+    # 必须在导入 app 之前设置好环境变量（Settings 在导入时读取）
+    import httpx
+
+    from app.core.db import SessionLocal
+    from app.core.security import get_password_hash, password_hash_pool
+    from bench.common import BENCH_PASSWORD, seed_problems, seed_users, summarize
+    import main
+
+    with SessionLocal() as db:
+        usernames = seed_users(
+            db,
+            count=args.users,
+            hashed_password=get_password_hash(BENCH_PASSWORD),
+        )
+        seed_problems(db, count=500)
+
+    login_latencies: list[float] = []
+    read_latencies: list[float] = []
+    statuses: dict[str, int] = {}
+
+    async def login_worker(client: httpx.AsyncClient, index: int, stop: float):
+        i = index
+        while time.perf_counter() < stop:
+            started = time.perf_counter()
+            response = await client.post(
+                "/auth/login",
+                data={
+                    "username": usernames[i % len(usernames)],
+                    "password": BENCH_PASSWORD,
+                },
+            )
+            statuses[str(response.status_code)] = (
+                statuses.get(str(response.status_code), 0) + 1
+            )
+            if response.status_code == 200:
+                login_latencies.append(time.perf_counter() - started)
+            i += args.login_clients
+
+    async def read_worker(client: httpx.AsyncClient, index: int, stop: float):
+        i = index
+        while time.perf_counter() < stop:
+            started = time.perf_counter()
+            response = await client.get(
+                "/problems",
+                params={"skip": (i * 20) % 400, "limit": 20},
+            )
+            response.raise_for_status()
+            read_latencies.append(time.perf_counter() - started)
+            i += 1
+
+    async def run() -> float:
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(
+            transport=transport,
+            base_url="http://bench",
+            timeout=60,
+        ) as client:
+            started = time.perf_counter()
+            stop = started + args.duration
+            await asyncio.gather(
+                *(login_worker(client, i, stop) for i in range(args.login_clients)),
+                *(read_worker(client, i, stop) for i in range(args.read_clients)),
+            )
+            return time.perf_counter() - started
+
+    elapsed = asyncio.run(run())
+    password_hash_pool.shutdown()
+
+    return {
+        "executor": os.environ["PASSWORD_HASH_EXECUTOR"],
+        "duration_s": round(elapsed, 2),
+        "login": summarize(login_latencies, elapsed),
+        "problems": summarize(read_latencies, elapsed),
+        "login_status": statuses,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--executors", default="inline,thread")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--login-clients", type=int, default=64)
+    parser.add_argument("--read-clients", type=int, default=8)
+    parser.add_argument("--output", help="结果写入 JSON 文件")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(_run_child(args)))
+        return
+
+    results = []
+    for executor in args.executors.split(","):
+        with tempfile.TemporaryDirectory() as tmp:
+            env = {
+                **os.environ,
+                "DATABASE_URL": f"sqlite:///{tmp}/bench.db",
+                "DB_PROFILE": "bench",
+                "PASSWORD_HASH_EXECUTOR": executor,
+            }
+            output = subprocess.run(
+                [sys.executable, "-m", "bench.login_bench", "--child",
+                 *sys.argv[1:]],
+                env=env,
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        results.append(result)
+
+        print(
+            f"[{executor:>7}] "
+            f"login {result['login']['rps']:>7.1f}/s "
+            f"p95 {result['login']['p95_ms']:>8.1f}ms | "
+            f"/problems {result['problems']['rps']:>7.1f}/s "
+            f"p50 {result['problems']['p50_ms']:>7.1f}ms "
+            f"p99 {result['problems']['p99_ms']:>7.1f}ms | "
+            f"status {result['login_status']}"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+推荐下一题：进程内已做对集合 + 难度 ID 池 vs 每次 NOT IN 反连接
+
+造 --problems 道题和一个做对了 --solved 道题的用户，分别测：
+- anti-join：难度 = ? AND id NOT IN (该用户做对的题) ORDER BY random() LIMIT 1
+- cached：recommend_next_problem（缓存已热，只剩一次难度拆分统计的主键查询）
+- cold：每次都清空缓存（已做对集合 + ID 池都重新加载）
+
+用法（在 backend 目录下）：
+    python -m bench.recommend_bench
+    python -m bench.recommend_bench --problems 20000 --solved 15000
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime, timezone
+
+
+def _run(args: argparse.Namespace) -> None:
+    # 必须在设置好 DATABASE_URL 之后再导入 app
+    from sqlalchemy import func, insert, select
+
+    from app.core.db import SessionLocal
+    from app.core.security import get_password_hash
+    from app.models.problem import Problem
+    from app.models.user_stats import UserSolvedProblem
+    from app.services.recommend import (
+        difficulty_pools,
+        recommend_next_problem,
+        solved_sets,
+    )
+    from bench.common import BENCH_PASSWORD, seed_problems, seed_users, summarize
+    import main  # noqa: F401  建表
+
+    with SessionLocal() as db:
+        seed_users(db, count=1, hashed_password=get_password_hash(BENCH_PASSWORD))
+        seed_problems(db, count=args.problems)
+        now = datetime.now(timezone.utc)
+        db.execute(insert(UserSolvedProblem), [
+            {"user_id": 1, "problem_id": problem_id, "solved_at": now}
+            for problem_id in range(1, args.solved + 1)
+        ])
+        db.commit()
+
+    solved = select(UserSolvedProblem.problem_id).where(
+        UserSolvedProblem.user_id == 1
+    )
+
+    def anti_join(db) -> None:
+        db.scalar(
+            select(Problem.id)
+            .where(
+                Problem.is_active.is_(True),
+                Problem.difficulty == 3,
+                Problem.id.not_in(solved),
+            )
+            .order_by(func.random())
+            .limit(1)
+        )
+
+    def cached(db) -> None:
+        recommend_next_problem(db, user_id=1, difficulty=3)
+
+    def cold(db) -> None:
+        solved_sets.clear()
+        difficulty_pools.invalidate()
+        recommend_next_problem(db, user_id=1, difficulty=3)
+
+    print(f"{'impl':<10} {'p50_ms':>9} {'p95_ms':>9}")
+    for name, fn in (("anti-join", anti_join), ("cached", cached), ("cold", cold)):
+        latencies = []
+        with SessionLocal() as db:
+            fn(db)
+            started = time.perf_counter()
+            for _ in range(args.number):
+                t0 = time.perf_counter()
+                fn(db)
+                latencies.append(time.perf_counter() - t0)
+        result = summarize(latencies, time.perf_counter() - started)
+        print(f"{name:<10} {result['p50_ms']:>9} {result['p95_ms']:>9}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--problems", type=int, default=100_000)
+    parser.add_argument("--solved", type=int, default=50_000)
+    parser.add_argument("--number", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{tmp}/recommend.db"
+        os.environ["DB_PROFILE"] = "bench"
+        os.environ["QUERY_BUDGET_MODE"] = "off"
+        _run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+全文搜索对比：FTS5（search_problems）vs LIKE '%词%' 全表匹配
+
+在临时库里造 --problems 道题（默认 10 万），对几类查询各跑 --number 次：
+- common：几乎每道题都命中（bm25 要给全部命中排序，FTS 的最坏情况）
+- rare：只命中一道题（LIKE 必须扫完全表）
+- miss：没有命中
+
+用法（在 backend 目录下）：
+    python -m bench.search_bench
+    python -m bench.search_bench --problems 20000 --number 50
+"""
+import argparse
+import os
+import tempfile
+import time
+from typing import Callable, List
+
+
+QUERIES = {
+    "common": "已知",
+    "rare": "98765",
+    "miss": "integral",
+}
+
+
+def _run(args: argparse.Namespace) -> None:
+    # 必须在设置好 DATABASE_URL 之后再导入 app
+    from sqlalchemy import or_, select
+
+    from app.core.db import SessionLocal
+    from app.models.problem import Problem
+    from app.services.search import rebuild_search_index, search_problems
+    from bench.common import seed_problems, summarize
+    import main  # noqa: F401  建表 + FTS 虚表
+
+    with SessionLocal() as db:
+        seed_problems(db, count=args.problems)
+        started = time.perf_counter()
+        indexed = rebuild_search_index(db)
+        print(
+            f"indexed {indexed} problems "
+            f"in {time.perf_counter() - started:.2f}s"
+        )
+
+    def fts(db, query: str) -> List:
+        return search_problems(db, query=query, limit=args.limit)[0]
+
+    def like(db, query: str) -> List:
+        pattern = f"%{query}%"
+        return db.scalars(
+            select(Problem)
+            .where(
+                Problem.is_active.is_(True),
+                or_(Problem.title.like(pattern), Problem.content.like(pattern)),
+            )
+            .order_by(Problem.id)
+            .limit(args.limit)
+        ).all()
+
+    def measure(fn: Callable, query: str) -> dict:
+        latencies = []
+        with SessionLocal() as db:
+            fn(db, query)  # 预热页缓存
+            started = time.perf_counter()
+            for _ in range(args.number):
+                t0 = time.perf_counter()
+                fn(db, query)
+                latencies.append(time.perf_counter() - t0)
+        return summarize(latencies, time.perf_counter() - started)
+
+    print(f"{'query':<8} {'impl':<5} {'hits':>5} {'p50_ms':>9} {'p95_ms':>9}")
+    for label, query in QUERIES.items():
+        for name, fn in (("fts", fts), ("like", like)):
+            with SessionLocal() as db:
+                hits = len(fn(db, query))
+            result = measure(fn, query)
+            print(
+                f"{label:<8} {name:<5} {hits:>5} "
+                f"{result['p50_ms']:>9} {result['p95_ms']:>9}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--problems", type=int, default=100_000)
+    parser.add_argument("--number", type=int, default=30)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{tmp}/search.db"
+        os.environ["DB_PROFILE"] = "bench"
+        os.environ["QUERY_BUDGET_MODE"] = "off"
+        _run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+列表序列化对比：response_model（Pydantic 校验 + json）vs FAST_JSON（dict + orjson）
+
+两组结果：
+- serialize：只算序列化（题库缓存里的快照 -> bytes）
+- GET /problems：进程内完整请求（题库缓存已热，COUNT 已缓存）
+
+用法（在 backend 目录下）：
+    python -m bench.serialization_bench
+    python -m bench.serialization_bench --sizes 10,50,100 --number 200 --repeat 7
+"""
+import argparse
+import json
+import os
+import tempfile
+import timeit
+
+
+def _run(args: argparse.Namespace) -> None:
+    # 必须在设置好 DATABASE_URL 之后再导入 app
+    import orjson
+    from fastapi.testclient import TestClient
+    from pydantic import TypeAdapter
+
+    from app.core.config import settings
+    from app.core.db import SessionLocal
+    from app.core.serialization import FastJSONResponse, field_extractor
+    from app.crud.problem import get_problem_list
+    from app.schemas.problem import ProblemListOut, ProblemOut
+    from bench.common import seed_problems
+    import main
+
+    with SessionLocal() as db:
+        seed_problems(db, count=max(args.sizes) * 2)
+        _, snapshots = get_problem_list(db, limit=max(args.sizes))
+
+    adapter = TypeAdapter(ProblemListOut)
+    problem_out = field_extractor(ProblemOut)
+
+    # FastAPI 默认路径：校验 response_model -> 按 JSON 模式 dump -> json.dumps
+    def standard(payload) -> bytes:
+        value = adapter.validate_python(payload)
+        content = adapter.dump_python(value, mode="json")
+        return json.dumps(
+            content,
+            ensure_ascii=False,
+            allow_nan=False,
+            indent=None,
+            separators=(",", ":"),
+        ).encode("utf-8")
+
+    def fast(payload) -> bytes:
+        return FastJSONResponse(None).render({
+            "total": payload["total"],
+            "items": [problem_out(item) for item in payload["items"]],
+            "next_cursor": payload["next_cursor"],
+        })
+
+    def best(fn) -> float:
+        return min(timeit.repeat(fn, number=args.number, repeat=args.repeat))
+
+    print("serialize (us per page)")
+    print(f"{'size':>6}{'standard':>12}{'fast':>12}{'speedup':>10}")
+    for size in args.sizes:
+        payload = {
+            "total": len(snapshots),
+            "items": snapshots[:size],
+            "next_cursor": None,
+        }
+        assert orjson.loads(standard(payload)) == orjson.loads(fast(payload))
+
+        slow_s = best(lambda: standard(payload)) / args.number
+        fast_s = best(lambda: fast(payload)) / args.number
+        print(
+            f"{size:>6}{slow_s * 1e6:>12.1f}{fast_s * 1e6:>12.1f}"
+            f"{slow_s / fast_s:>9.2f}x"
+        )
+
+    print()
+    print("GET /problems (us per request, in-process)")
+    print(f"{'size':>6}{'standard':>12}{'fast':>12}{'speedup':>10}")
+    with TestClient(main.app) as client:
+        for size in args.sizes:
+            params = {"limit": size}
+            timings = {}
+            for fast_json in (False, True):
+                settings.FAST_JSON = fast_json
+                client.get("/problems", params=params).raise_for_status()
+                timings[fast_json] = best(
+                    lambda: client.get("/problems", params=params)
+                ) / args.number
+            settings.FAST_JSON = False
+            print(
+                f"{size:>6}{timings[False] * 1e6:>12.1f}"
+                f"{timings[True] * 1e6:>12.1f}"
+                f"{timings[False] / timings[True]:>9.2f}x"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes",
+        type=lambda value: [int(x) for x in value.split(",")],
+        default=[10, 20, 50, 100],
+    )
+    parser.add_argument("--number", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{tmp}/serialization.db"
+        os.environ["DB_PROFILE"] = "bench"
+        os.environ["QUERY_BUDGET_MODE"] = "off"
+        _run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,13 +2,14 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 
 # =====================================================
 # Routers
 # - 只在 main.py 里统一管理 prefix / tags
 # - Router 文件里只写 APIRouter() + 相对路径（比如 "/login"、"/me"）
 # =====================================================
-from app.routers import auth, users, attempts, problems
+from app.routers import auth, users, attempts, problems, metrics
 
 
 # =====================================================
@@ -16,12 +17,37 @@ from app.routers import auth, users, attempts, problems
 # - 你目前用 SQLite + Base.metadata.create_all() 没问题
 # - 为了让 SQLAlchemy “发现”所有模型，建议把所有 model import 一次
 # =====================================================
-from app.core.db import Base, engine
+from app.core.db import (
+    Base,
+    async_engine,
+    check_upsert_supported,
+    create_missing_indexes,
+    engine,
+)
+from app.core.config import settings
+from app.core.metrics import MetricsMiddleware
+from app.core.query_budget import QueryBudgetMiddleware
+from app.core.security import password_hash_pool
 from app.models.user import User
 from app.models.problem import Problem
 from app.models.attempt import Attempt
+from app.models.ingest_checkpoint import IngestCheckpoint
+from app.models.ingest_dead_letter import IngestDeadLetter
+from app.models.problem_rollup import ProblemStatsRollup
+from app.models.user_problem_bitmap import UserProblemBitmap
+from app.models.user_stats import (
+    UserSolvedProblem,
+    UserStats,
+    UserStatsBreakdown,
+)
+from app.services.ingest import attempt_writer
+from app.services.rollups import rollup_compactor
+from app.services.search import ensure_search_index
 
+check_upsert_supported(engine)
 Base.metadata.create_all(bind=engine)
+create_missing_indexes(engine)
+ensure_search_index(engine)
 
 
 # =====================================================
@@ -31,8 +57,18 @@ Base.metadata.create_all(bind=engine)
 # =====================================================
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # write-behind：先重放 spool 里未落库的记录，再启动后台写线程
+    if settings.ATTEMPT_WRITE_MODE == "write_behind":
+        await run_in_threadpool(attempt_writer.start)
+    rollup_compactor.start()
     print("🚀 Backend started")
     yield
+    await run_in_threadpool(rollup_compactor.stop)
+    # 先把队列里的提交写完，再关连接池
+    await run_in_threadpool(attempt_writer.stop)
+    password_hash_pool.shutdown()
+    if async_engine is not None:
+        await async_engine.dispose()
     print("🛑 Backend shutdown")
 
 
@@ -55,8 +91,20 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    # 前端要能读到 ETag，才能带 If-None-Match 做条件请求
+    expose_headers=["ETag"],
 )
 
+# =====================================================
+# Query Budget（按路由 @query_budget 检查 SQL 条数）
+# Metrics（最外层，按路由统计延迟 / SQL / 连接池等待）
+# =====================================================
+if settings.QUERY_BUDGET_MODE != "off":
+    app.add_middleware(QueryBudgetMiddleware)
+
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # =====================================================
 # Routers 注册（统一管理 prefix / tags）
 # - 这样 Swagger 分组清晰，路径也不容易写重复
@@ -90,6 +138,13 @@ app.include_router(
     tags=["Attempts"],
 )
 
+# Metrics：Prometheus 抓取（不带 prefix）
+if settings.METRICS_ENABLED:
+    app.include_router(
+        metrics.router,
+        tags=["Metrics"],
+    )
+
 # =====================================================
 # Root
 # =====================================================
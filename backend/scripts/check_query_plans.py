@@ -0,0 +1,298 @@
+"""
+查询计划回归检查：对每个 CRUD 查询跑 EXPLAIN QUERY PLAN
+
+在临时 SQLite 库上造数据，逐个调用 CRUD 函数，拦截它们实际发出的
+SELECT / UPDATE / DELETE，出现以下计划即判失败（退出码 1）：
+- SCAN <table>：全表扫描（包括整条索引扫描；FTS5 虚表的 MATCH / rowid 查询除外）
+- USE TEMP B-TREE：没有索引兜住排序 / 分组
+
+用法（在 backend 目录下）：
+    python -m scripts.check_query_plans
+    python -m scripts.check_query_plans --verbose
+"""
+import argparse
+import os
+import sys
+import tempfile
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, List, Tuple
+
+
+# (case, statement, plan 明细)
+PlanRecord = Tuple[str, str, List[str]]
+
+_EXPLAINED_PREFIXES = ("SELECT", "UPDATE", "DELETE")
+
+
+def _is_violation(detail: str) -> bool:
+    # FTS5 虚表在计划里总显示为 SCAN；INDEX n: 后面带约束（M = MATCH，= 为 rowid）
+    # 才是走倒排索引 / rowid，空的才是全表扫描
+    if detail.startswith("SCAN ") and "VIRTUAL TABLE INDEX" in detail:
+        return detail.endswith(":")
+    return detail.startswith("SCAN ") or "USE TEMP B-TREE" in detail
+
+
+def _build_cases() -> List[Tuple[str, Callable]]:
+    from app.crud import attempt as crud_attempt
+    from app.crud import problem as crud_problem
+    from app.crud import user as crud_user
+    from app.schemas.attempt import AttemptCreate
+    from app.schemas.problem import ProblemCreate, ProblemUpdate
+    from app.services.bitmaps import user_bitmaps
+    from app.services.catalog import problem_catalog
+    from app.services.counters import ProblemCounterDeltas
+    from app.services.attempt_export import (
+        AttemptExportFilter,
+        iter_attempt_batches,
+    )
+    from app.services.recommend import (
+        DifficultyPools,
+        recommend_next_problem,
+        solved_sets,
+        target_difficulty,
+    )
+    from app.services.rollups import compact_rollups, get_problem_rollups
+    from app.services.search import search_problems
+    from app.services.stats import get_user_stats
+
+    cases: List[Tuple[str, Callable]] = [
+        ("user.get_user_by_id",
+         lambda db: crud_user.get_user_by_id(db, 1)),
+        ("user.get_user_by_username",
+         lambda db: crud_user.get_user_by_username(db, "plan1")),
+        ("user.get_user_by_email",
+         lambda db: crud_user.get_user_by_email(db, "plan1@bench.local")),
+        ("problem.get_problem_by_id",
+         lambda db: crud_problem.get_problem_by_id(db, problem_id=1)),
+        ("problem.create_problem",
+         lambda db: crud_problem.create_problem(
+             db,
+             problem_in=ProblemCreate(
+                 title="plan",
+                 content="1 + 1 = ?",
+                 problem_type="numeric",
+                 difficulty=1,
+                 correct_answer="2",
+             ),
+         )),
+        ("problem.update_problem",
+         lambda db: crud_problem.update_problem(
+             db,
+             problem=crud_problem.get_problem_by_id(db, problem_id=2),
+             problem_in=ProblemUpdate(difficulty=3),
+         )),
+        ("problem.apply_problem_counters",
+         lambda db: _apply_counters(db, crud_problem, ProblemCounterDeltas)),
+        ("catalog.get_many",
+         lambda db: problem_catalog.get_many(db, [3, 4, 5])),
+        ("attempt.create_attempt",
+         lambda db: crud_attempt.create_attempt(
+             db,
+             user_id=1,
+             attempt_in=AttemptCreate(problem_id=6, user_answer="B"),
+         )),
+        ("attempt.create_attempt_batch",
+         lambda db: crud_attempt.create_attempt_batch(
+             db,
+             user_id=1,
+             attempts_in=[
+                 AttemptCreate(problem_id=pid, user_answer="A")
+                 for pid in (7, 8, 9)
+             ],
+         )),
+        ("stats.get_user_stats",
+         lambda db: get_user_stats(db, user_id=1, today=date.today())),
+        ("rollups.get_problem_rollups",
+         lambda db: get_problem_rollups(
+             db,
+             problem_id=7,
+             granularity="hour",
+             start=datetime.now(timezone.utc) - timedelta(hours=24),
+             end=datetime.now(timezone.utc),
+         )),
+        ("rollups.compact_rollups",
+         lambda db: compact_rollups(db)),
+        ("export.iter_attempt_batches (user)",
+         lambda db: list(iter_attempt_batches(
+             db, AttemptExportFilter(user_id=1),
+         ))),
+        ("export.iter_attempt_batches (user, range)",
+         lambda db: list(iter_attempt_batches(
+             db,
+             AttemptExportFilter(
+                 user_id=1,
+                 start=datetime.now(timezone.utc) - timedelta(days=1),
+             ),
+         ))),
+        ("export.iter_attempt_batches (problem)",
+         lambda db: list(iter_attempt_batches(
+             db, AttemptExportFilter(problem_id=5),
+         ))),
+        ("attempt.get_attempt_list_by_user (offset)",
+         lambda db: crud_attempt.get_attempt_list_by_user(
+             db, user_id=1, skip=20, limit=20,
+         )),
+        ("attempt.get_attempt_list_by_user (cursor)",
+         lambda db: crud_attempt.get_attempt_list_by_user(
+             db, user_id=1, limit=20, before_id=50,
+         )),
+    ]
+
+    # 题目列表的做题标记：位图缓存未命中时按主键范围读
+    cases.append((
+        "bitmaps.user_bitmaps.get",
+        lambda db: (user_bitmaps.clear(), user_bitmaps.get(db, 1)),
+    ))
+
+    # 推荐下一题：缓存未命中时的三条查询
+    cases += [
+        ("recommend.target_difficulty",
+         lambda db: target_difficulty(db, user_id=1)),
+        ("recommend.DifficultyPools._load",
+         lambda db: DifficultyPools._load(db, 2, None)),
+        ("recommend.DifficultyPools._load (type)",
+         lambda db: DifficultyPools._load(db, 2, "numeric")),
+        ("recommend.recommend_next_problem",
+         lambda db: (
+             solved_sets.clear(),
+             recommend_next_problem(db, user_id=1, difficulty=2),
+         )),
+    ]
+
+    # 全文搜索：中文短语 / 前缀 × 有无筛选
+    for query, filters in (
+        ("已知", {}),
+        ("已知 f", {"difficulty": 2}),
+        ("求", {"problem_type": "numeric"}),
+    ):
+        cases.append((
+            f"search.search_problems ({query!r}, {filters or '-'})",
+            lambda db, q=query, f=filters: search_problems(
+                db, query=q, limit=20, offset=20, **f,
+            ),
+        ))
+
+    # 列表：每种筛选组合 × offset / keyset
+    filter_combos = [
+        {},
+        {"difficulty": 2},
+        {"problem_type": "numeric"},
+        {"difficulty": 2, "problem_type": "numeric"},
+    ]
+    for filters in filter_combos:
+        label = ", ".join(f"{k}={v}" for k, v in filters.items()) or "-"
+        cases.append((
+            f"problem.get_problem_list ({label}, offset)",
+            lambda db, f=filters: crud_problem.get_problem_list(
+                db, skip=20, limit=20, **f,
+            ),
+        ))
+        cases.append((
+            f"problem.get_problem_list ({label}, cursor)",
+            lambda db, f=filters: crud_problem.get_problem_list(
+                db, limit=20, after_id=40, **f,
+            ),
+        ))
+
+    return cases
+
+
+def _apply_counters(db, crud_problem, deltas_cls) -> None:
+    deltas = deltas_cls()
+    deltas.add(10, is_correct=True)
+    crud_problem.apply_problem_counters(db, deltas=deltas)
+    db.commit()
+
+
+def _run(args: argparse.Namespace) -> List[PlanRecord]:
+    # 必须在设置好 DATABASE_URL 之后再导入 app
+    from sqlalchemy import event
+
+    from app.core.db import SessionLocal, engine
+    from app.core.security import get_password_hash
+    from app.crud.attempt import create_attempt_batch
+    from app.services.search import rebuild_search_index
+    from app.schemas.attempt import AttemptCreate
+    from app.services.catalog import problem_catalog
+    from app.services.totals import list_totals
+    from bench.common import seed_problems, seed_users
+    import main  # noqa: F401  建表 + 索引
+
+    with SessionLocal() as db:
+        seed_users(
+            db,
+            count=args.users,
+            hashed_password=get_password_hash("plan"),
+            prefix="plan",
+        )
+        seed_problems(db, count=args.problems)
+        rebuild_search_index(db)
+        for user_id in range(1, args.users + 1):
+            create_attempt_batch(
+                db,
+                user_id=user_id,
+                attempts_in=[
+                    AttemptCreate(problem_id=pid, user_answer="A")
+                    for pid in range(1, args.attempts_per_user + 1)
+                ],
+            )
+
+    records: List[PlanRecord] = []
+    current = {"case": ""}
+
+    def explain(conn, cursor, statement, parameters, context, executemany):
+        if executemany:
+            return
+        if not statement.lstrip().upper().startswith(_EXPLAINED_PREFIXES):
+            return
+        rows = cursor.connection.execute(
+            "EXPLAIN QUERY PLAN " + statement,
+            parameters,
+        ).fetchall()
+        records.append((current["case"], statement, [row[-1] for row in rows]))
+
+    event.listen(engine, "before_cursor_execute", explain)
+    try:
+        for name, fn in _build_cases():
+            # 清掉进程内缓存，保证查询真的落到数据库
+            problem_catalog.clear()
+            list_totals.clear()
+            current["case"] = name
+            with SessionLocal() as db:
+                fn(db)
+    finally:
+        event.remove(engine, "before_cursor_execute", explain)
+
+    return records
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=5)
+    parser.add_argument("--problems", type=int, default=500)
+    parser.add_argument("--attempts-per-user", type=int, default=100)
+    parser.add_argument("--verbose", action="store_true", help="打印全部计划")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{tmp}/plans.db"
+        os.environ["DB_PROFILE"] = "bench"
+        records = _run(args)
+
+    failures = 0
+    for case, statement, plan in records:
+        bad = [detail for detail in plan if _is_violation(detail)]
+        failures += bool(bad)
+        if not (bad or args.verbose):
+            continue
+        print(f"[{'FAIL' if bad else ' ok '}] {case}")
+        print(f"       {' '.join(statement.split())[:160]}")
+        for detail in plan:
+            print(f"         {'!!' if detail in bad else '  '} {detail}")
+
+    print(f"{len(records)} statements checked, {failures} with bad plans")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
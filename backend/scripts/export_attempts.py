@@ -0,0 +1,71 @@
+"""
+流式导出做题记录（NDJSON / CSV），服务端游标逐批读取，内存占用与行数无关
+
+用法（在 backend 目录下）：
+    python -m scripts.export_attempts --output attempts.ndjson
+    python -m scripts.export_attempts --format csv --user 42 --start 2025-09-01 > out.csv
+"""
+import argparse
+import sys
+import time
+from datetime import datetime
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    parser.add_argument("--user", type=int, default=None)
+    parser.add_argument("--problem", type=int, default=None)
+    parser.add_argument(
+        "--start",
+        type=datetime.fromisoformat,
+        default=None,
+        help="created_at 起（含），ISO 格式；不带时区按 UTC",
+    )
+    parser.add_argument(
+        "--end",
+        type=datetime.fromisoformat,
+        default=None,
+        help="created_at 止（不含），ISO 格式；不带时区按 UTC",
+    )
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--output", default=None, help="输出文件（默认 stdout）")
+    args = parser.parse_args()
+
+    from app.services.attempt_export import (
+        DEFAULT_BATCH_SIZE,
+        AttemptExportFilter,
+        export_attempts,
+    )
+
+    filters = AttemptExportFilter(
+        user_id=args.user,
+        problem_id=args.problem,
+        start=args.start,
+        end=args.end,
+    )
+    out = open(args.output, "wb") if args.output else sys.stdout.buffer
+
+    started = time.perf_counter()
+    size = 0
+    try:
+        for chunk in export_attempts(
+            args.format,
+            filters,
+            batch_size=args.batch_size or DEFAULT_BATCH_SIZE,
+        ):
+            out.write(chunk)
+            size += len(chunk)
+    finally:
+        if args.output:
+            out.close()
+
+    print(
+        f"exported {size / 2**20:.1f} MiB "
+        f"in {time.perf_counter() - started:.2f}s",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+从 JSONL / CSV 文件批量导入题目（流式读取，内存只占一块）
+
+JSONL：每行一个 JSON 对象，字段同 ProblemCreate
+CSV：表头为字段名（title, content, problem_type, difficulty, options, correct_answer），
+     options 列填 JSON 对象字符串
+
+用法（在 backend 目录下）：
+    python -m scripts.import_problems problems.jsonl
+    python -m scripts.import_problems problems.csv --chunk-size 2000 --dry-run
+"""
+import argparse
+import sys
+import time
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=["jsonl", "csv"], default=None)
+    parser.add_argument("--chunk-size", type=int, default=None)
+    parser.add_argument("--created-by", type=int, default=None, help="出题人用户 ID")
+    parser.add_argument("--dry-run", action="store_true", help="只校验，不写库")
+    parser.add_argument("--show-errors", type=int, default=20, help="打印前 N 条错误")
+    args = parser.parse_args()
+
+    from app.core.db import SessionLocal
+    from app.services.problem_import import (
+        DEFAULT_CHUNK_SIZE,
+        detect_format,
+        import_problems,
+    )
+    import main as _app  # noqa: F401  建表
+
+    fmt = args.format or detect_format(args.path)
+    if fmt is None:
+        parser.error("cannot detect format from file name, pass --format")
+
+    started = time.perf_counter()
+    with open(args.path, "rb") as f, SessionLocal() as db:
+        report = import_problems(
+            db,
+            f,
+            fmt,
+            chunk_size=args.chunk_size or DEFAULT_CHUNK_SIZE,
+            created_by_id=args.created_by,
+            dry_run=args.dry_run,
+        )
+    elapsed = time.perf_counter() - started
+
+    print(
+        f"{report.total} rows, {report.inserted} "
+        f"{'valid' if args.dry_run else 'inserted'}, {report.failed} failed "
+        f"in {elapsed:.2f}s ({report.total / max(elapsed, 1e-9):.0f} rows/s)"
+    )
+    for error in report.errors[:args.show_errors]:
+        print(f"  line {error['row']}: {error['error']}")
+    if report.failed > args.show_errors:
+        print(f"  ... {report.failed - args.show_errors} more")
+
+    sys.exit(1 if report.failed else 0)
+
+
+if __name__ == "__main__":
+    main()
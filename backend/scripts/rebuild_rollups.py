@@ -0,0 +1,46 @@
+"""
+按 attempts 回填题目分桶统计（problem_stats_rollups）
+
+重算 --days 天前那天零点之后的全部小时桶 / 天桶；上线前回填历史数据时使用。
+这里会扫 attempts，建议在低峰期执行
+
+用法（在 backend 目录下）：
+    python -m scripts.rebuild_rollups
+    python -m scripts.rebuild_rollups --days 90
+"""
+import argparse
+import time
+from datetime import datetime, timedelta, timezone
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--days",
+        type=int,
+        default=None,
+        help="回填最近多少天（默认 ROLLUP_HOURLY_RETENTION_DAYS）",
+    )
+    args = parser.parse_args()
+
+    from app.core.config import settings
+    from app.core.db import SessionLocal
+    from app.services.rollups import compact_rollups, rebuild_problem_rollups
+    import main as _app  # noqa: F401  建表（含分桶统计表）
+
+    days = args.days or settings.ROLLUP_HOURLY_RETENTION_DAYS
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+
+    started = time.perf_counter()
+    with SessionLocal() as db:
+        count = rebuild_problem_rollups(db, since=since)
+        # 超出保留期的小时桶回填后立即清理
+        compact_rollups(db)
+    print(
+        f"rebuilt rollups from {count} attempts "
+        f"in {time.perf_counter() - started:.2f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""
+按 problems 全量重建全文索引（problems_fts）
+
+题目的创建 / 修改 / 批量导入会同步写索引；绕过应用直接改了 problems 表
+（手工 SQL、数据迁移）之后用这个脚本重建。仅 SQLite
+
+用法（在 backend 目录下）：
+    python -m scripts.rebuild_search_index
+"""
+import argparse
+import time
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.parse_args()
+
+    from app.core.db import SessionLocal
+    from app.services.search import rebuild_search_index
+    import main as _app  # noqa: F401  建表（含 FTS 虚表）
+
+    started = time.perf_counter()
+    with SessionLocal() as db:
+        count = rebuild_search_index(db)
+    print(
+        f"indexed {count} problems "
+        f"in {time.perf_counter() - started:.2f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
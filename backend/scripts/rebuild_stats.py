@@ -0,0 +1,43 @@
+"""
+按 attempts 全量重算用户学习统计（user_stats / user_stats_breakdown / user_solved_problems）
+和做题位图（user_problem_bitmaps）
+
+用于：首次上线（老数据没有统计行）、手工改过 attempts、怀疑增量统计有偏差时
+
+用法（在 backend 目录下）：
+    python -m scripts.rebuild_stats
+    python -m scripts.rebuild_stats --user 1 --user 42
+"""
+import argparse
+import time
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--user",
+        dest="user_ids",
+        type=int,
+        action="append",
+        help="只重算指定用户（可重复）；不传则重算全部",
+    )
+    args = parser.parse_args()
+
+    from app.core.db import SessionLocal
+    from app.services.bitmaps import rebuild_user_bitmaps
+    from app.services.stats import rebuild_user_stats
+    import main as _app  # noqa: F401  建表（含新加的统计表）
+
+    started = time.perf_counter()
+    with SessionLocal() as db:
+        count = rebuild_user_stats(db, user_ids=args.user_ids)
+        attempts = rebuild_user_bitmaps(db, user_ids=args.user_ids)
+    print(
+        f"rebuilt stats for {count} users "
+        f"and bitmaps from {attempts} attempts "
+        f"in {time.perf_counter() - started:.2f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()